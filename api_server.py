@@ -0,0 +1,387 @@
+"""
+대시보드 조회 API 서버 (asyncio, 표준 라이브러리만 사용)
+
+index.html은 대시보드 데이터 전체를 받아 브라우저에서 거르지만, 여러 사람이 쓰는
+공용 배포에서는 서버가 데이터를 한 번만 읽어 두고 화면에 보이는 만큼만 돌려줍니다.
+
+  GET /api/meta        브랜드 · 색상 · brand_stats · 행 수 · 개요 차트 요약 (브랜드 개요 탭 전부)
+  GET /api/brands      브랜드별 통계 (brand_stats)
+  GET /api/dongs       행정동 목록      q(이름 자모 검색) brand(진출 브랜드) sort order page page_size
+  GET /api/recommend   입지 추천 후보   q brand score page page_size (RecommendEngine 전체 후보 기준)
+  GET /api/map         지도 질의        bbox=남,서,북,동 zoom brands=브랜드,브랜드
+                       (map_lod.py와 같은 규칙: 매장이 많으면 줌별 클러스터)
+  GET /                index.html (API 모드로 주입)
+
+목록 응답의 items는 dashboard_payload.py 컬럼형 표현이고 total은 조건에 맞는 전체 행 수입니다.
+응답은 (데이터 버전, 경로, 정렬한 질의 문자열)별 LRU 캐시에 본문 · gzip 본문 · ETag로 보관합니다.
+If-None-Match가 ETag와 같으면 본문 없이 304를 돌려주고, Accept-Encoding: gzip이면 압축본을 보냅니다.
+preprocess.py가 데이터를 다시 쓰면(payload_version 변경) 다음 요청에서 새로 읽습니다.
+
+사용법:
+    python api_server.py                          # http://127.0.0.1:8765/
+    python api_server.py --host 0.0.0.0 --port 8000 --cache-size 2048
+    index.html?api=http://서버:8000/api           # 따로 호스팅한 index.html에서 API 사용
+"""
+
+import argparse
+import asyncio
+import collections
+import gzip
+import hashlib
+import json
+import os
+import threading
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+
+import perf_log
+from dashboard_payload import overview_section, records_to_columns
+from data_store import DataStore, payload_version
+from dong_search import DongSearchIndex
+from map_lod import MapLOD
+from recommend import ALL, SCORES, RecommendEngine
+from spatial_index import load_or_build
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+HTML_PATH = os.path.join(BASE_DIR, 'index.html')
+DEFAULT_PORT = 8765
+CACHE_SIZE = 1024           # 보관할 응답 수
+MAX_PAGE_SIZE = 500
+MAX_HEADER_BYTES = 16 * 1024
+DONG_SORTS = ['total_brand_count', 'attractiveness_score', 'demand_score', 'competition_score',
+              'cost_score', 'monthly_sales', 'total_workers', 'cafe_count']
+
+
+class BadRequest(ValueError):
+    """잘못된 질의 인자 (400 응답)"""
+
+
+# ─────────────────────────────────────────────
+# 질의 (데이터 버전 하나당 한 벌, 인덱스는 처음 쓸 때 생성)
+# ─────────────────────────────────────────────
+def frame_records(df):
+    """DataFrame → JSON 레코드 (NaN → None, numpy 값 → 파이썬 값)"""
+    return json.loads(df.to_json(orient='records', force_ascii=False))
+
+
+def _int_arg(params, name, default, lo, hi):
+    try:
+        value = int(params.get(name, default))
+    except ValueError:
+        raise BadRequest(f'{name}은(는) 정수여야 합니다')
+    return min(max(value, lo), hi)
+
+
+def _choice_arg(params, name, default, choices):
+    value = params.get(name) or default
+    if value not in choices:
+        raise BadRequest(f'{name}={value}: {", ".join(map(str, choices))} 중 하나여야 합니다')
+    return value
+
+
+class QueryService:
+    def __init__(self, store, base_dir):
+        self.store = store
+        self.base_dir = base_dir
+        self.brands = store.brands
+        self._lock = threading.RLock()
+        self._built = {}
+
+    def _get(self, name, build):
+        """검색 · 추천 · 지도 인덱스 (처음 요청한 스레드가 만들고 나머지는 기다림)"""
+        with self._lock:
+            if name not in self._built:
+                self._built[name] = build()
+            return self._built[name]
+
+    @property
+    def search(self):
+        return self._get('search', lambda: DongSearchIndex(self.store.df_dong['dong_name']))
+
+    @property
+    def engine(self):
+        return self._get('engine', lambda: RecommendEngine(self.store.df_dong, self.brands,
+                                                           search_index=self.search))
+
+    @property
+    def lod(self):
+        def build():
+            df_map = self.store.df_map
+            return MapLOD(df_map, load_or_build(self.base_dir, df_map, self.brands))
+        return self._get('lod', build)
+
+    @property
+    def dong_rows(self):
+        """dong_data와 같은 모양의 레코드 (브랜드 수는 'brands' dict)"""
+        def build():
+            df = self.store.df_dong
+            cnt = [f'cnt_{b}' for b in self.brands]
+            rows = frame_records(df.drop(columns=cnt))
+            counts = df[cnt].fillna(0).astype(int).to_numpy().tolist()
+            for row, c in zip(rows, counts):
+                row['brands'] = dict(zip(self.brands, c))
+            return rows
+        return self._get('dong_rows', build)
+
+    # ── 엔드포인트 ──
+    def meta(self, params):
+        return {
+            'brands': self.brands,
+            'brand_colors': self.store.brand_colors,
+            'brand_stats': self.store.brand_stats,
+            'counts': {s: self.store.count(s) for s in ['dong_data', 'map_points', 'recommend_top']},
+            'overview': overview_section(self.dong_rows),
+        }
+
+    def brand_stats(self, params):
+        return self.store.brand_stats
+
+    def dongs(self, params):
+        sort = _choice_arg(params, 'sort', 'total_brand_count', DONG_SORTS)
+        order = _choice_arg(params, 'order', 'desc', ['asc', 'desc'])
+        brand = _choice_arg(params, 'brand', '', [''] + self.brands)
+        page = _int_arg(params, 'page', 0, 0, 1 << 30)
+        page_size = _int_arg(params, 'page_size', 50, 1, MAX_PAGE_SIZE)
+
+        df = self.store.df_dong
+        mask = self.search.mask(params.get('q', ''))
+        if brand:
+            mask &= df[f'cnt_{brand}'].fillna(0).to_numpy() > 0
+        idx = np.flatnonzero(mask)
+        values = df[sort].to_numpy(dtype=np.float64)[idx]
+        # 안정 정렬, 값이 없는 행은 방향과 관계없이 맨 뒤
+        idx = idx[np.argsort(values if order == 'asc' else -values, kind='stable')]
+
+        rows = self.dong_rows
+        start = page * page_size
+        return {
+            'total': len(idx), 'page': page, 'page_size': page_size,
+            'items': records_to_columns([rows[i] for i in idx[start:start + page_size]]),
+        }
+
+    def recommend(self, params):
+        brand = _choice_arg(params, 'brand', ALL, [ALL] + self.brands)
+        score = _choice_arg(params, 'score', SCORES[0], SCORES)
+        page = _int_arg(params, 'page', 0, 0, 1 << 30)
+        page_size = _int_arg(params, 'page_size', 24, 1, MAX_PAGE_SIZE)
+        result, total = self.engine.page(brand, score, page=page, page_size=page_size,
+                                         search=params.get('q') or None)
+        return {
+            'total': total, 'page': page, 'page_size': page_size,
+            'items': records_to_columns(frame_records(result), ['brand'], {'brand': self.brands}),
+        }
+
+    def map(self, params):
+        try:
+            south, west, north, east = map(float, params['bbox'].split(','))
+        except (KeyError, ValueError):
+            raise BadRequest('bbox=남,서,북,동 (위경도 4개)가 필요합니다')
+        zoom = _int_arg(params, 'zoom', 11, 0, 22)
+        brands = [b for b in params['brands'].split(',') if b] if 'brands' in params else self.brands
+        unknown = sorted(set(brands) - set(self.brands))
+        if unknown:
+            raise BadRequest(f'알 수 없는 브랜드: {", ".join(unknown)}')
+
+        mode, view = self.lod.view_bbox(south, west, north, east, zoom, brands)
+        columns = ['brand', 'name', 'lat', 'lng'] if mode == 'points' else ['brand', 'lat', 'lng', 'count']
+        view = view[columns].assign(brand=view['brand'].astype(str))
+        return {
+            'mode': mode, 'total': len(view),
+            'items': records_to_columns(frame_records(view), ['brand'], {'brand': self.brands}),
+        }
+
+
+# ─────────────────────────────────────────────
+# HTTP (asyncio 스트림, GET/HEAD · keep-alive)
+# ─────────────────────────────────────────────
+Response = collections.namedtuple('Response', 'body gzip_body etag content_type')
+STATUS_TEXT = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found',
+               405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+def make_response(body, content_type='application/json; charset=utf-8'):
+    """본문 · gzip 본문 · ETag(본문 해시)를 한 번에 계산해 캐시에 넣을 응답"""
+    etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+    return Response(body, gzip.compress(body, compresslevel=6), etag, content_type)
+
+
+def json_bytes(payload):
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def etag_matches(header, etag):
+    """If-None-Match 값(여러 개 · 약한 ETag · *)이 etag와 맞는지"""
+    tags = [t.strip() for t in header.split(',')]
+    return '*' in tags or etag in (t[2:] if t.startswith('W/') else t for t in tags)
+
+
+class ApiServer:
+    def __init__(self, base_dir=BASE_DIR, cache_size=CACHE_SIZE, html_path=HTML_PATH):
+        self.base_dir = base_dir
+        self.html_path = html_path
+        self.cache_size = cache_size
+        self._cache = collections.OrderedDict()
+        self._service = None
+        self._service_lock = threading.Lock()
+        self.routes = {
+            '/api/meta': QueryService.meta,
+            '/api/brands': QueryService.brand_stats,
+            '/api/dongs': QueryService.dongs,
+            '/api/recommend': QueryService.recommend,
+            '/api/map': QueryService.map,
+        }
+
+    def service(self, version):
+        """데이터 버전의 QueryService (버전이 바뀌면 새로 읽음)"""
+        with self._service_lock:
+            if self._service is None or self._service.store.version != version:
+                self._service = QueryService(DataStore(*version), self.base_dir)
+            return self._service
+
+    def _cached(self, key):
+        response = self._cache.get(key)
+        if response is not None:
+            self._cache.move_to_end(key)
+        return response
+
+    def _store(self, key, response):
+        self._cache[key] = response
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _index_html(self):
+        with open(self.html_path, 'r', encoding='utf-8') as f:
+            html = f.read()
+        # streamlit_app.py와 같이 <body 앞에 주입 → index.html이 /api를 씀
+        return html.replace('<body', '<script>window.DASHBOARD_API = "/api";</script><body').encode('utf-8')
+
+    async def respond(self, method, target, headers):
+        """요청 → (상태 코드, 헤더 dict, 본문)"""
+        if method not in ('GET', 'HEAD'):
+            return self._error(405, f'{method}는 지원하지 않습니다')
+        url = urlsplit(target)
+
+        if url.path in ('/', '/index.html'):
+            key = ('html', os.stat(self.html_path).st_mtime_ns)
+            response = self._cached(key)
+            if response is None:
+                response = make_response(self._index_html(), 'text/html; charset=utf-8')
+                self._store(key, response)
+            return self._send(response, headers)
+
+        route = self.routes.get(url.path)
+        if route is None:
+            return self._error(404, f'{url.path}: 없는 경로입니다')
+
+        try:
+            version = payload_version(self.base_dir)
+        except FileNotFoundError as err:
+            return self._error(500, str(err))
+        params = sorted(parse_qsl(url.query, keep_blank_values=True))
+        key = (version, url.path, tuple(params))
+        response = self._cached(key)
+        if response is None:
+            # 질의 계산(처음 요청 시 데이터 · 인덱스 생성 포함)은 스레드에서 → 다른 연결을 막지 않음
+            try:
+                payload = await asyncio.to_thread(lambda: route(self.service(version), dict(params)))
+            except BadRequest as err:
+                return self._error(400, str(err))
+            response = make_response(json_bytes(payload))
+            self._store(key, response)
+        return self._send(response, headers)
+
+    def _send(self, response, headers):
+        out = {
+            'Content-Type': response.content_type,
+            'ETag': response.etag,
+            'Cache-Control': 'no-cache',          # 매번 ETag로 재검증
+            'Vary': 'Accept-Encoding',
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Expose-Headers': 'ETag',
+        }
+        if etag_matches(headers.get('if-none-match', ''), response.etag):
+            return 304, out, b''
+        if 'gzip' in headers.get('accept-encoding', ''):
+            out['Content-Encoding'] = 'gzip'
+            return 200, out, response.gzip_body
+        return 200, out, response.body
+
+    @staticmethod
+    def _error(status, message):
+        headers = {'Content-Type': 'application/json; charset=utf-8', 'Access-Control-Allow-Origin': '*'}
+        return status, headers, json_bytes({'error': message})
+
+    async def handle(self, reader, writer):
+        """연결 하나: 요청을 차례로 읽어 응답 (Connection: close 또는 연결 종료까지)"""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, target, _ = lines[0].split(' ', 2)
+                except ValueError:
+                    break
+                # 퍼센트 인코딩하지 않은 한글 경로·질의도 받도록 UTF-8로 다시 해석
+                target = target.encode('latin-1').decode('utf-8', 'replace')
+                headers = {}
+                for line in lines[1:]:
+                    name, sep, value = line.partition(':')
+                    if sep:
+                        headers[name.strip().lower()] = value.strip()
+                if int(headers.get('content-length') or 0):
+                    await reader.readexactly(int(headers['content-length']))   # GET 본문은 버림
+
+                with perf_log.timer('api:' + urlsplit(target).path, source='api') as span:
+                    try:
+                        status, out, body = await self.respond(method, target, headers)
+                    except Exception as err:  # 한 요청의 오류로 서버가 멈추지 않게
+                        status, out, body = self._error(500, f'{type(err).__name__}: {err}')
+                    span.fields.update(status=status, bytes=len(body))
+
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                out['Content-Length'] = str(len(body))
+                out['Connection'] = 'keep-alive' if keep_alive else 'close'
+                lines = [f'HTTP/1.1 {status} {STATUS_TEXT[status]}'] + [f'{k}: {v}' for k, v in out.items()]
+                writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+                if method != 'HEAD':
+                    writer.write(body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+
+async def serve(host, port, server):
+    listener = await asyncio.start_server(server.handle, host, port, limit=MAX_HEADER_BYTES)
+    print(f"☕ 대시보드 API: http://{host}:{port}/  (데이터: {server.base_dir})")
+    async with listener:
+        await listener.serve_forever()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='카페 입지 분석 대시보드 조회 API 서버 (asyncio)')
+    parser.add_argument('--host', default='127.0.0.1', help='바인드 주소 (기본 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'포트 (기본 {DEFAULT_PORT})')
+    parser.add_argument('--data-dir', default=BASE_DIR, metavar='DIR',
+                        help='preprocess.py 출력 폴더 (대시보드 데이터 · 공간 인덱스, 기본: 스크립트 폴더)')
+    parser.add_argument('--cache-size', type=int, default=CACHE_SIZE,
+                        help=f'메모리에 보관할 응답 수 (기본 {CACHE_SIZE})')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    server = ApiServer(os.path.abspath(args.data_dir), args.cache_size)
+    try:
+        asyncio.run(serve(args.host, args.port, server))
+    except KeyboardInterrupt:
+        print("\n종료합니다.")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,13 +3,29 @@
 Streamlit 버전 - dashboard_data.json 기반
 """
 
-import json
+import math
 import os
 import streamlit as st
+import streamlit.components.v1 as components
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 
+import perf_log
+from data_store import DataStore, payload_version
+from density_grid import DensityGrid
+from dong_cube import AGE_MEASURES, gu_name
+from dong_cube import load_or_build as load_or_build_cube
+from dong_search import DongSearchIndex
+from history import HISTORY_FILENAME, History
+from map_lod import DETAIL_ZOOM, MapLOD
+from overview_charts import build_overview_figures
+from recommend import RecommendEngine
+from recommend_cards import cards_html
+from saturation import SATURATION_COLORS, SATURATION_LEVELS, SATURATION_RADIUS_M
+from scoring import DEFAULT_WEIGHTS, ScoreModel, Weights
+from spatial_index import load_or_build
+
 # ──────────────────────────────────────────────
 # 페이지 설정
 # ──────────────────────────────────────────────
@@ -23,33 +39,103 @@ st.set_page_config(
 # ──────────────────────────────────────────────
 # 데이터 로드
 # ──────────────────────────────────────────────
-@st.cache_data
-def load_data():
-    """dashboard_data.json 로드 (캐시)"""
-    json_path = os.path.join(os.path.dirname(__file__), "dashboard_data.json")
-    with open(json_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@st.cache_resource(max_entries=2)
+def load_store(path, mtime_ns):
+    """섹션 분할 manifest · 컬럼형 · JSON 중 최신 파일 (세션 간 공유, 읽기 전용, 분할 포맷은 섹션을 처음 쓸 때 읽음)"""
+    return DataStore(path, mtime_ns)
+
+
+# 아래 캐시들은 모두 데이터 버전(경로, 수정 시각)을 키에 포함 → 파일이 바뀌면 함께 다시 생성
+@st.cache_resource(max_entries=2)
+def load_store_index(version, _df_map, brands):
+    """매장 공간 인덱스 (반경 · kNN · bbox 질의용, 세션 간 공유)"""
+    return load_or_build(BASE_DIR, _df_map, brands)
+
+
+@st.cache_resource(max_entries=2)
+def load_map_lod(version, _df_map, brands):
+    """줌별 클러스터 + 뷰포트 필터 (세션 간 공유)"""
+    return MapLOD(_df_map, load_store_index(version, _df_map, brands))
+
+
+@st.cache_resource(max_entries=2)
+def load_dong_search(version, _df_dong):
+    """행정동 이름 자모 n-gram 검색 인덱스 (행정동 분석 · 입지 추천 탭 공용)"""
+    return DongSearchIndex(_df_dong["dong_name"])
+
+
+@st.cache_resource(max_entries=8)
+def load_recommend_engine(version, _df_dong, brands, weights):
+    """전체 입지 추천 후보 + 브랜드·점수별 정렬 인덱스 (가중치별로 세션 간 공유)"""
+    return RecommendEngine(_df_dong, brands, search_index=load_dong_search(version, _df_dong))
+
+
+@st.cache_resource(max_entries=2)
+def load_score_model(version, _df_dong):
+    """정규화된 원본 지표 (가중치 재계산용)"""
+    return ScoreModel(_df_dong)
+
+
+@st.cache_resource(max_entries=8)
+def rescore(version, _df_dong, weights):
+    """가중치 튜플별 재계산 결과 (기본 가중치는 CSV 원본 점수 그대로)"""
+    if weights == DEFAULT_WEIGHTS:
+        return _df_dong
+    return _df_dong.assign(**load_score_model(version, _df_dong).compute(weights))
+
+
+@st.cache_resource(max_entries=2)
+def load_density_grid(version, _grid):
+    """preprocess.py가 만든 격자 셀별 브랜드 매장 수"""
+    return DensityGrid(_grid)
+
+
+@st.cache_resource(max_entries=2)
+def load_cube(version, _df_dong, brands):
+    """행정동 × 브랜드 × 인구통계 큐브 + 구·서울 합계 (preprocess.py가 만든 파일이 없으면 생성)"""
+    return load_or_build_cube(BASE_DIR, _df_dong, brands)
+
+
+@st.cache_resource(max_entries=4)
+def overview_figures(version, theme_mode, _store, _layout, _grid_style):
+    """브랜드 개요 차트 (데이터 버전 × 테마별로 한 번만 생성, 세션 간 공유·읽기 전용)"""
+    return build_overview_figures(_store.df_dong, _store.brands, _store.brand_stats,
+                                  _store.brand_colors, _layout, _grid_style,
+                                  cube=load_cube(version, _store.df_dong, _store.brands))
+
+
+@st.cache_resource(max_entries=1)
+def load_history(path, mtime_ns):
+    """월별 이력 (월·행정동 목록만 읽고, 월별 배열은 선택한 기간만 필요할 때 압축 해제)"""
+    return History(path)
+
 
-    # 행정동 DataFrame
-    df_dong = pd.DataFrame(data["dong_data"])
-    # 브랜드 컬럼 분리
-    brands_df = pd.json_normalize(df_dong["brands"])
-    brands_df.columns = [f"cnt_{c}" for c in brands_df.columns]
-    df_dong = pd.concat([df_dong.drop(columns=["brands"]), brands_df], axis=1)
+def month_label(month):
+    """'202401' → '2024.01'"""
+    return f"{month[:4]}.{month[4:]}"
 
-    # 지도 포인트 DataFrame
-    df_map = pd.DataFrame(data["map_points"])
 
-    # 추천 DataFrame
-    df_rec = pd.DataFrame(data["recommend_top"])
+@st.cache_resource(max_entries=2)
+def dong_centers(version, _df_map):
+    """행정동별 매장 좌표 평균 (지도 중심 이동용)"""
+    return _df_map.groupby("dong_code", observed=True)[["lat", "lng"]].mean()
 
-    return data, df_dong, df_map, df_rec
 
-data, df_dong, df_map, df_rec = load_data()
+with perf_log.timer("load_data"):
+    store = load_store(*payload_version(BASE_DIR))
+df_dong = store.df_dong      # 지도 탭의 map_points · density_grid는 탭을 열 때 읽음
+DATA_VERSION = store.version
 
-BRANDS      = data["brands"]
-BRAND_COLORS = data["brand_colors"]
-BRAND_STATS  = data["brand_stats"]
+# preprocess.py --history로 만든 월별 이력이 있으면 기간 추이 탭 표시
+HISTORY_PATH = os.path.join(BASE_DIR, HISTORY_FILENAME)
+HISTORY = load_history(HISTORY_PATH, os.stat(HISTORY_PATH).st_mtime_ns) if os.path.exists(HISTORY_PATH) else None
+
+BRANDS      = store.brands
+BRAND_COLORS = store.brand_colors
+BRAND_STATS  = store.brand_stats
 
 # ──────────────────────────────────────────────
 # 테마 설정 (사이드바 최상단)
@@ -74,15 +160,16 @@ THEME = {
 }
 
 # 라이트 모드에서 형광색 시인성 확보를 위한 브랜드 색상 조정
-ADJUSTED_BRAND_COLORS = data["brand_colors"].copy()
+# (레지스트리에 새로 추가한 브랜드는 원래 색 그대로)
+ADJUSTED_BRAND_COLORS = BRAND_COLORS.copy()
 if is_light:
-    ADJUSTED_BRAND_COLORS = {
+    ADJUSTED_BRAND_COLORS.update({b: c for b, c in {
         "더벤티": "#d12d2d",
         "매머드커피": "#09a39a",
         "메가커피": "#b18e00",
         "빽다방": "#2e8b57",
         "컴포즈커피": "#8a63d2",
-    }
+    }.items() if b in ADJUSTED_BRAND_COLORS})
 
 # ──────────────────────────────────────────────
 # 커스텀 CSS
@@ -183,10 +270,10 @@ GRID_STYLE = dict(gridcolor=THEME["border"], zerolinecolor=THEME["border"])
 # ──────────────────────────────────────────────
 # 헤더
 # ──────────────────────────────────────────────
-st.markdown("""
+st.markdown(f"""
 <div class="main-header">
   <h1>☕ 서울 저가 커피 브랜드 입지 분석</h1>
-  <p>행정동별 브랜드 현황 · 매출 분석 · 입지 추천 | 더벤티 · 매머드커피 · 메가커피 · 빽다방 · 컴포즈커피</p>
+  <p>행정동별 브랜드 현황 · 매출 분석 · 입지 추천 | {' · '.join(BRANDS)}</p>
 </div>
 """, unsafe_allow_html=True)
 
@@ -199,7 +286,8 @@ with st.sidebar:
     st.markdown("### 🔍 필터")
     selected_tab = st.radio(
         "분석 메뉴",
-        ["📊 브랜드 개요", "🗺️ 지도", "🏙️ 행정동 분석", "⭐ 입지 추천"],
+        ["📊 브랜드 개요", "🗺️ 지도", "🏙️ 행정동 분석", "⭐ 입지 추천", "🧭 지역 드릴다운"]
+        + (["📈 기간 추이"] if HISTORY is not None else []),
         label_visibility="collapsed",
     )
     st.divider()
@@ -209,12 +297,14 @@ with st.sidebar:
         brand_filter = st.selectbox("브랜드 필터", ["전체"] + BRANDS)
         sort_by = st.selectbox(
             "정렬 기준",
-            ["total_brand_count", "attractiveness_score", "monthly_sales", "total_workers"],
+            ["total_brand_count", "attractiveness_score", "monthly_sales", "total_workers"]
+            + (["crowded_share"] if "crowded_share" in df_dong.columns else []),
             format_func=lambda x: {
                 "total_brand_count": "총 브랜드 수",
                 "attractiveness_score": "매력도 점수",
                 "monthly_sales": "월 매출",
                 "total_workers": "근로자 수",
+                "crowded_share": "과밀 매장 비율",
             }[x],
         )
 
@@ -230,6 +320,7 @@ with st.sidebar:
             }[x],
         )
         rec_search = st.text_input("행정동 검색", placeholder="예: 강남...")
+        rec_page_size = st.selectbox("페이지당 카드 수", [12, 24, 48], index=1)
 
     elif selected_tab == "🗺️ 지도":
         map_brands = st.multiselect(
@@ -237,9 +328,67 @@ with st.sidebar:
             BRANDS,
             default=BRANDS,
         )
+        map_mode = st.radio(
+            "표시 방식", ["매장", "밀도 격자"], horizontal=True,
+            help="밀도 격자: 500m 격자별 매장 수 집계로 히트맵을 그립니다.",
+            disabled=not store.has_section("density_grid"),
+        )
+        # 매장별 경쟁·포화 지표 (preprocess.py가 map_points에 넣은 컬럼, 예전 데이터에는 없음)
+        has_saturation = "saturation" in store.df_map.columns
+        map_color = st.radio(
+            "색상 기준", ["브랜드", "포화도"], horizontal=True,
+            help=f"포화도: 반경 {SATURATION_RADIUS_M}m 안 다른 저가 브랜드 매장 수 기준 (여유 · 보통 · 과밀)",
+            disabled=not has_saturation or map_mode == "밀도 격자",
+        )
+        map_levels = st.multiselect(
+            "포화 단계", SATURATION_LEVELS, default=SATURATION_LEVELS,
+            help="매장 · 클러스터 표시와 아래 요약에 적용됩니다 (밀도 격자 제외).",
+            disabled=not has_saturation,
+        )
+        map_zoom = st.slider("줌 레벨", 9, 16, 11,
+                             help=f"줌 {DETAIL_ZOOM} 미만에서 매장이 많으면 격자 클러스터로 묶어 표시합니다.")
+        dong_names = df_dong.set_index("dong_code")["dong_name"]
+        centers = dong_centers(DATA_VERSION, store.df_map)
+        map_center = st.selectbox(
+            "지도 중심",
+            ["서울 전체"] + [c for c in dong_names.index if c in centers.index],
+            format_func=lambda c: c if c == "서울 전체" else dong_names[c],
+        )
+
+    elif selected_tab == "🧭 지역 드릴다운":
+        cube = load_cube(DATA_VERSION, df_dong, BRANDS)
+        drill_gu = st.selectbox("구", ["서울 전체"] + cube.gu_codes.tolist(),
+                                format_func=lambda c: c if c == "서울 전체" else gu_name(c))
+        drill_dong = "구 전체"
+        if drill_gu != "서울 전체":
+            drill_dong = st.selectbox("행정동", ["구 전체"] + cube.dongs_in(drill_gu).tolist(),
+                                      format_func=lambda c: c if c == "구 전체" else cube.dong_name(c),
+                                      key=f"drill_dong:{drill_gu}")
+
+    elif selected_tab == "📈 기간 추이":
+        # 기본: 최근 12개월
+        hist_months = HISTORY.months
+        hist_range = st.select_slider(
+            "기간", options=hist_months,
+            value=(hist_months[max(len(hist_months) - 12, 0)], hist_months[-1]),
+            format_func=month_label,
+        )
+        hist_brands = st.multiselect("표시할 브랜드", HISTORY.brands, default=HISTORY.brands)
+
+    # 매력도 가중치 (바꾸면 행정동 점수와 입지 추천 순위를 즉시 재계산)
+    with st.expander("⚖️ 매력도 가중치"):
+        weights = Weights(
+            demand=st.slider("수요", 0.0, 1.0, DEFAULT_WEIGHTS.demand, 0.05),
+            competition=st.slider("경쟁", 0.0, 1.0, DEFAULT_WEIGHTS.competition, 0.05),
+            cost=st.slider("비용", 0.0, 1.0, DEFAULT_WEIGHTS.cost, 0.05),
+            sales_share=st.slider("수요 중 매출 비중", 0.0, 1.0, DEFAULT_WEIGHTS.sales_share, 0.05,
+                                  help="나머지는 종사자 수 비중"),
+        )
+        if weights != DEFAULT_WEIGHTS:
+            st.caption("사용자 가중치 적용 중 — 세 가중치는 합으로 나눠 0~100 범위로 맞춥니다.")
 
     st.divider()
-    st.caption(f"행정동 {len(df_dong)}개 · 매장 {len(df_map):,}개")
+    st.caption(f"행정동 {len(df_dong)}개 · 매장 {store.count('map_points'):,}개")
 
     # 점수 계산 방법 설명 (항상 접근 가능)
     with st.expander("❓ 점수 계산 방법"):
@@ -254,13 +403,20 @@ with st.sidebar:
 | ⭐ **매력도** | 수요×0.4 + 경쟁×0.3 + 비용×0.3 | 종합 입지 지수 |
         """)
 
+# 가중치 반영 점수 (기본 가중치면 원본 그대로)
+with perf_log.timer("rescore", default=tuple(weights) == DEFAULT_WEIGHTS):
+    df_dong = rescore(DATA_VERSION, df_dong, tuple(weights))
+
+# 탭 렌더링 전체 시간 (파일 끝에서 stop)
+tab_span = perf_log.start(f"tab:{selected_tab}", theme=theme_mode)
+
 # ══════════════════════════════════════════════
 # 탭 1: 브랜드 개요
 # ══════════════════════════════════════════════
 if selected_tab == "📊 브랜드 개요":
 
-    # 브랜드 카드 (5개)
-    cols = st.columns(5)
+    # 브랜드 카드 (브랜드 레지스트리의 추적 브랜드 수만큼)
+    cols = st.columns(len(BRANDS))
     for i, brand in enumerate(BRANDS):
         s = BRAND_STATS[brand]
         color = ADJUSTED_BRAND_COLORS[brand]
@@ -284,75 +440,38 @@ if selected_tab == "📊 브랜드 개요":
 
     st.markdown("<br>", unsafe_allow_html=True)
 
+    # 차트는 (데이터 버전, 테마)별로 캐시된 Figure 재사용
+    with perf_log.timer("overview:figures", theme=theme_mode):
+        figures, build_ms = overview_figures(DATA_VERSION, theme_mode, store, PLOT_LAYOUT, GRID_STYLE)
+
     # 차트 행 1
     c1, c2 = st.columns(2)
 
     with c1:
         st.markdown("##### 브랜드별 총 매장 수")
-        fig = go.Figure(go.Bar(
-            x=BRANDS,
-            y=[BRAND_STATS[b]["total_stores"] for b in BRANDS],
-            marker_color=[BRAND_COLORS[b] for b in BRANDS],
-            text=[BRAND_STATS[b]["total_stores"] for b in BRANDS],
-            textposition="outside",
-        ))
-        fig.update_layout(**PLOT_LAYOUT, height=300)
-        fig.update_xaxes(**GRID_STYLE)
-        fig.update_yaxes(**GRID_STYLE)
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(figures["brand_stores"], use_container_width=True)
 
     with c2:
         st.markdown("##### 브랜드별 진출 행정동 수")
-        fig = go.Figure(go.Pie(
-            labels=BRANDS,
-            values=[BRAND_STATS[b]["dong_count"] for b in BRANDS],
-            marker_colors=[BRAND_COLORS[b] for b in BRANDS],
-            hole=0.45,
-            textinfo="label+percent",
-        ))
-        fig.update_layout(**PLOT_LAYOUT, height=300,
-            legend=dict(orientation="h", y=-0.1),
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(figures["brand_dongs"], use_container_width=True)
 
     # 차트 행 2: 상위 30개 동 누적 막대
     st.markdown("##### 행정동별 브랜드 분포 (총 브랜드 수 상위 30개 동)")
-    top30 = df_dong[df_dong["total_brand_count"] > 0].nlargest(30, "total_brand_count")
-    fig = go.Figure()
-    for brand in BRANDS:
-        col = f"cnt_{brand}"
-        if col in top30.columns:
-            fig.add_trace(go.Bar(
-                name=brand,
-                x=top30["dong_name"],
-                y=top30[col],
-                marker_color=BRAND_COLORS[brand],
-            ))
-    fig.update_layout(
-        **PLOT_LAYOUT, barmode="stack", height=350,
-        legend=dict(orientation="h", y=1.05),
-    )
-    fig.update_xaxes(tickangle=-40, **GRID_STYLE)
-    fig.update_yaxes(**GRID_STYLE)
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(figures["top30_dongs"], use_container_width=True)
 
     # 차트 행 3: 연령대별 매출
     st.markdown("##### 연령대별 총 매출 합계")
-    age_cols  = ["age_10","age_20","age_30","age_40","age_50","age_60"]
-    age_labels = ["10대","20대","30대","40대","50대","60대+"]
-    age_colors = ["#FF6B6B","#FFE66D","#4ECDC4","#58a6ff","#bc8cff","#A8E6CF"]
-    age_totals = [df_dong[c].sum() / 1e8 for c in age_cols]
-
-    fig = go.Figure(go.Bar(
-        x=age_labels, y=age_totals,
-        marker_color=age_colors,
-        text=[f"{v:.0f}억" for v in age_totals],
-        textposition="outside",
-    ))
-    fig.update_layout(**PLOT_LAYOUT, height=300)
-    fig.update_xaxes(**GRID_STYLE)
-    fig.update_yaxes(title="매출(억원)", **GRID_STYLE)
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(figures["age_sales"], use_container_width=True)
+
+    with st.expander("⏱️ 차트 생성 시간"):
+        st.caption("데이터 버전·테마별 최초 1회 생성 비용이며, 이후 rerun과 다른 세션은 캐시를 재사용합니다.")
+        st.dataframe(
+            pd.DataFrame({
+                "차트": ["브랜드별 총 매장 수", "브랜드별 진출 행정동 수", "상위 30개 동 누적 막대", "연령대별 매출"],
+                "생성 시간(ms)": [round(build_ms[name], 1) for name in figures],
+            }),
+            hide_index=True, use_container_width=True,
+        )
 
     # ── 점수 계산 방법 설명 ──
     st.markdown("---")
@@ -400,8 +519,17 @@ if selected_tab == "📊 브랜드 개요":
 elif selected_tab == "🗺️ 지도":
     st.markdown("##### 저가 커피 브랜드 매장 위치")
 
+    # 매장 좌표 (섹션 분할 포맷이면 이 탭을 처음 열 때 읽음)
+    with perf_log.timer("map:load", rows=store.count("map_points")):
+        df_map = store.df_map
+
     # 선택 브랜드 필터
-    filtered_map = df_map[df_map["brand"].isin(map_brands)] if map_brands else df_map.iloc[0:0]
+    with perf_log.timer("map:filter", brands=len(map_brands)):
+        filtered_map = df_map[df_map["brand"].isin(map_brands)] if map_brands else df_map.iloc[0:0]
+        # 포화 단계를 일부만 고른 경우에만 거름 (전체 선택이면 미리 만든 클러스터 그대로 사용)
+        sat_levels = map_levels if has_saturation and len(map_levels) < len(SATURATION_LEVELS) else None
+        if sat_levels is not None:
+            filtered_map = filtered_map[filtered_map["saturation"].isin(sat_levels)]
 
     if filtered_map.empty:
         st.warning("표시할 브랜드를 사이드바에서 선택하세요.")
@@ -411,23 +539,71 @@ elif selected_tab == "🗺️ 지도":
             h = h.lstrip("#")
             return [int(h[i:i+2], 16) for i in (0, 2, 4)] + [200]
 
-        filtered_map = filtered_map.copy()
-        filtered_map["color"] = filtered_map["brand"].map(
-            lambda b: hex_to_rgb(BRAND_COLORS.get(b, "#888888"))
-        )
+        if map_center == "서울 전체":
+            center_lat, center_lng = 37.5665, 126.9780
+        else:
+            center_lat, center_lng = centers.loc[map_center, ["lat", "lng"]]
 
         import pydeck as pdk
-        layer = pdk.Layer(
-            "ScatterplotLayer",
-            data=filtered_map,
-            get_position=["lng", "lat"],
-            get_fill_color="color",
-            get_radius=80,
-            pickable=True,
-            auto_highlight=True,
-        )
-        view = pdk.ViewState(latitude=37.5665, longitude=126.9780, zoom=10.5, pitch=0)
-        tooltip = {"html": "<b>{brand}</b><br>{name}", "style": {"background": THEME["surface"], "color": THEME["text"]}}
+        with perf_log.timer("map:layers", mode=map_mode, zoom=map_zoom) as layer_span:
+            if map_mode == "밀도 격자":
+                # 원본 좌표 대신 격자 집계만 전달 (셀 중심 좌표 + 선택 브랜드 매장 수)
+                density = load_density_grid(DATA_VERSION, store.density_grid)
+                view_df = density.frame(map_brands)
+                st.caption(f"{density.cell_m:.0f}m 격자 {len(view_df):,}개 셀로 집계")
+                layer = pdk.Layer(
+                    "HeatmapLayer",
+                    data=view_df,
+                    get_position=["lng", "lat"],
+                    get_weight="count",
+                    radius_pixels=40,
+                )
+            else:
+                # 뷰포트 안의 데이터만 전달 (축소 화면은 줌별 클러스터)
+                lod_mode, view_df = load_map_lod(DATA_VERSION, df_map, BRANDS).view(
+                    center_lat, center_lng, map_zoom, map_brands, levels=sat_levels)
+                if map_color == "포화도" and lod_mode == "points":
+                    view_df["color"] = view_df["saturation"].astype(str).map(
+                        lambda s: hex_to_rgb(SATURATION_COLORS.get(s, "#888888"))
+                    )
+                    st.markdown(" ".join(
+                        f'<span style="color:{SATURATION_COLORS[s]}">●</span> {s}' for s in SATURATION_LEVELS
+                    ) + f" — 반경 {SATURATION_RADIUS_M}m 안 다른 저가 브랜드 매장 수 기준", unsafe_allow_html=True)
+                else:
+                    view_df["color"] = view_df["brand"].astype(str).map(
+                        lambda b: hex_to_rgb(BRAND_COLORS.get(b, "#888888"))
+                    )
+                if has_saturation and lod_mode == "points":
+                    # 툴팁: 매장명 · 포화 단계 · 반경 내 매장 수 · 같은/다른 브랜드 최근접 거리
+                    def fmt_m(col):
+                        return view_df[col].map(lambda v: f"{v:,.0f}m" if pd.notna(v) else "-")
+                    view_df["label"] = (
+                        view_df["name"].astype(str) + " · " + view_df["saturation"].astype(str)
+                        + f" ({SATURATION_RADIUS_M}m 내 " + view_df[f"within_{SATURATION_RADIUS_M}m"].astype(str) + "개)"
+                        + "<br>같은 브랜드 최근접 " + fmt_m("nearest_same_m")
+                        + " · 다른 브랜드 최근접 " + fmt_m("nearest_other_m")
+                    )
+                elif map_color == "포화도":
+                    st.caption("포화도 색상은 개별 매장 표시에서 적용됩니다 (클러스터는 브랜드 색).")
+                if lod_mode == "clusters":
+                    # 클러스터 크기는 매장 수의 제곱근에 비례 (면적 ∝ 매장 수)
+                    view_df["radius"] = view_df["count"] ** 0.5 * 60
+                    st.caption(f"클러스터 {len(view_df):,}개로 표시 중 — 줌을 {DETAIL_ZOOM} 이상으로 올리면 개별 매장이 표시됩니다.")
+                else:
+                    view_df["radius"] = 80
+                    st.caption(f"화면 안 매장 {len(view_df):,}개 표시 중")
+                layer = pdk.Layer(
+                    "ScatterplotLayer",
+                    data=view_df[["brand", "label", "lat", "lng", "color", "radius"]],
+                    get_position=["lng", "lat"],
+                    get_fill_color="color",
+                    get_radius="radius",
+                    pickable=True,
+                    auto_highlight=True,
+                )
+            layer_span.fields["rows"] = len(view_df)
+        view = pdk.ViewState(latitude=center_lat, longitude=center_lng, zoom=map_zoom, pitch=0)
+        tooltip = {"html": "<b>{brand}</b><br>{label}", "style": {"background": THEME["surface"], "color": THEME["text"]}}
 
         st.pydeck_chart(pdk.Deck(
             layers=[layer],
@@ -452,21 +628,75 @@ elif selected_tab == "🗺️ 지도":
                 </div>
                 """, unsafe_allow_html=True)
 
+        # 브랜드별 포화도 요약 (매장별 최근접 거리 · 반경 내 매장 수)
+        if has_saturation:
+            st.markdown("##### 브랜드별 포화도")
+            sat_summary = (
+                filtered_map.assign(crowded=(filtered_map["saturation"] == SATURATION_LEVELS[-1]) * 100.0)
+                .groupby(filtered_map["brand"].astype(str))
+                .agg(stores=("name", "size"), same=("nearest_same_m", "median"),
+                     other=("nearest_other_m", "median"), within=(f"within_{SATURATION_RADIUS_M}m", "mean"),
+                     crowded=("crowded", "mean"))
+                .reindex([b for b in map_brands if b in set(filtered_map["brand"].astype(str))])
+                .round(1)
+            )
+            st.dataframe(
+                sat_summary.rename_axis("브랜드").rename(columns={
+                    "stores": "매장 수",
+                    "same": "같은 브랜드 최근접 중앙값(m)",
+                    "other": "다른 브랜드 최근접 중앙값(m)",
+                    "within": f"{SATURATION_RADIUS_M}m 내 매장 평균",
+                    "crowded": "과밀 비율(%)",
+                }),
+                use_container_width=True,
+            )
+
+        # 반경 내 경쟁 매장 조회 (공간 인덱스)
+        st.markdown("---")
+        st.markdown("##### 📍 반경 내 경쟁 매장 조회")
+        store_index = load_store_index(DATA_VERSION, df_map, BRANDS)
+        q1, q2, q3 = st.columns(3)
+        q_lat = q1.number_input("위도", value=37.5665, format="%.5f")
+        q_lng = q2.number_input("경도", value=126.9780, format="%.5f")
+        q_radius = q3.slider("반경 (m)", 100, 2000, 300, step=50)
+
+        radius_cols = st.columns(len(BRANDS))
+        for i, brand in enumerate(BRANDS):
+            cnt = store_index.radius_count(q_lat, q_lng, q_radius, brand)
+            radius_cols[i].metric(brand, f"{cnt}개")
+
+        if store.has_section("density_grid"):
+            # 격자 집계로 본 주변 경쟁 밀도 (조회 지점 셀 + 인접 8셀)
+            density = load_density_grid(DATA_VERSION, store.density_grid)
+            around = density.density_at(q_lat, q_lng)[0]
+            span = density.cell_m * 3 / 1000
+            st.caption(f"주변 {span:.1f}km × {span:.1f}km 격자 내 매장: " + " · ".join(
+                f"{b} {n}개" for b, n in zip(density.brands, around.tolist())))
+
+        near_idx, near_dist = store_index.knn(q_lat, q_lng, 5)
+        nearest = df_map.iloc[near_idx][["brand", "name"]].assign(**{"거리(m)": near_dist.round(0).astype(int)})
+        st.caption("가장 가까운 매장 5곳")
+        st.dataframe(
+            nearest.rename(columns={"brand": "브랜드", "name": "매장명"}),
+            use_container_width=True, hide_index=True,
+        )
+
 
 # ══════════════════════════════════════════════
 # 탭 3: 행정동 분석
 # ══════════════════════════════════════════════
 elif selected_tab == "🏙️ 행정동 분석":
 
-    # 필터 적용
-    df_view = df_dong.copy()
-    if dong_search:
-        df_view = df_view[df_view["dong_name"].str.contains(dong_search)]
-    if brand_filter != "전체":
-        col = f"cnt_{brand_filter}"
-        if col in df_view.columns:
-            df_view = df_view[df_view[col] > 0]
-    df_view = df_view.sort_values(sort_by, ascending=False, na_position="last")
+    # 필터 적용 (공유 원본은 복사하지 않고 조건 마스크를 모아 한 번만 추림)
+    with perf_log.timer("dong:filter", search=bool(dong_search), brand=brand_filter):
+        mask = pd.Series(True, index=df_dong.index)
+        if dong_search:
+            mask &= load_dong_search(DATA_VERSION, df_dong).mask(dong_search)
+        if brand_filter != "전체":
+            col = f"cnt_{brand_filter}"
+            if col in df_dong.columns:
+                mask &= df_dong[col] > 0
+        df_view = df_dong[mask].sort_values(sort_by, ascending=False, na_position="last")
 
     st.markdown(f"##### 행정동 분석 — {len(df_view)}개 동")
 
@@ -476,7 +706,8 @@ elif selected_tab == "🏙️ 행정동 분석":
     with left:
         # 표시 컬럼 선택
         display_cols = ["dong_name"] + [f"cnt_{b}" for b in BRANDS] + \
-                       ["total_brand_count", "attractiveness_score", "monthly_sales", "total_workers"]
+                       ["total_brand_count", "attractiveness_score", "monthly_sales", "total_workers",
+                        "crowded_share"]
         display_cols = [c for c in display_cols if c in df_view.columns]
 
         rename_map = {"dong_name": "행정동"}
@@ -487,9 +718,10 @@ elif selected_tab == "🏙️ 행정동 분석":
             "attractiveness_score": "매력도",
             "monthly_sales": "월매출(억)",
             "total_workers": "근로자",
+            "crowded_share": "과밀(%)",
         })
 
-        show_df = df_view[display_cols].rename(columns=rename_map).head(200).copy()
+        show_df = df_view[display_cols].head(200).rename(columns=rename_map)
         if "월매출(억)" in show_df.columns:
             show_df["월매출(억)"] = (show_df["월매출(억)"] / 1e8).round(1)
         if "매력도" in show_df.columns:
@@ -528,6 +760,16 @@ elif selected_tab == "🏙️ 행정동 분석":
             st.markdown(f"**근로자** {int(d.get('total_workers',0)):,}명 (여성 {int(d.get('female_workers',0)):,}명)")
             st.markdown(f"**카페 수** {int(d.get('cafe_count',0))}개")
             st.markdown(f"**월 매출** {d.get('monthly_sales',0)/1e8:.1f}억원")
+            if pd.notna(d.get("crowded_share")):
+                # 동 안 저가 브랜드 매장의 포화도 요약 (preprocess.py 매장별 지표의 행정동 집계)
+                def fmt_m(v):
+                    return f"{v:,.0f}m" if pd.notna(v) else "-"
+                st.markdown(
+                    f"**포화도** 같은 브랜드 최근접 {fmt_m(d.get('median_nearest_same_m'))} · "
+                    f"다른 브랜드 최근접 {fmt_m(d.get('median_nearest_other_m'))} (중앙값) · "
+                    f"{SATURATION_RADIUS_M}m 내 평균 {d.get(f'avg_within_{SATURATION_RADIUS_M}m', 0):.1f}개 · "
+                    f"과밀 매장 {d['crowded_share']:.0f}%"
+                )
 
             # 브랜드 현황
             st.markdown("**브랜드 현황**")
@@ -547,14 +789,15 @@ elif selected_tab == "🏙️ 행정동 분석":
             # 연령대 차트
             st.markdown("**연령대별 매출**")
             age_vals = [d.get(c, 0) / 1e6 for c in ["age_10","age_20","age_30","age_40","age_50","age_60"]]
-            fig = go.Figure(go.Bar(
-                x=["10대","20대","30대","40대","50대","60대+"],
-                y=age_vals,
-                marker_color=["#FF6B6B","#FFE66D","#4ECDC4","#58a6ff","#bc8cff","#A8E6CF"],
-            ))
-            fig.update_layout(**PLOT_LAYOUT, height=220)
-            fig.update_xaxes(**GRID_STYLE)
-            fig.update_yaxes(title="백만원", **GRID_STYLE)
+            with perf_log.timer("dong:figure"):
+                fig = go.Figure(go.Bar(
+                    x=["10대","20대","30대","40대","50대","60대+"],
+                    y=age_vals,
+                    marker_color=["#FF6B6B","#FFE66D","#4ECDC4","#58a6ff","#bc8cff","#A8E6CF"],
+                ))
+                fig.update_layout(**PLOT_LAYOUT, height=220)
+                fig.update_xaxes(**GRID_STYLE)
+                fig.update_yaxes(title="백만원", **GRID_STYLE)
             st.plotly_chart(fig, use_container_width=True)
         else:
             st.info("👆 테이블에서 행을 클릭하면 상세 정보가 표시됩니다.")
@@ -565,68 +808,172 @@ elif selected_tab == "🏙️ 행정동 분석":
 # ══════════════════════════════════════════════
 elif selected_tab == "⭐ 입지 추천":
 
-    # 필터
-    df_r = df_rec.copy()
-    if rec_brand != "전체":
-        df_r = df_r[df_r["brand"] == rec_brand]
-    if rec_search:
-        df_r = df_r[df_r["dong_name"].str.contains(rec_search)]
-    df_r = df_r.sort_values(rec_sort, ascending=False).head(60)
+    # 전체 후보에서 브랜드·정렬 기준별 미리 정렬된 인덱스로 현재 페이지만 조회
+    with perf_log.timer("recommend:engine"):
+        engine = load_recommend_engine(DATA_VERSION, df_dong, BRANDS, tuple(weights))
+    n_match = engine.count(rec_brand, rec_sort, search=rec_search)
+    n_pages = max(math.ceil(n_match / rec_page_size), 1)
+
+    head_l, head_r = st.columns([3, 1])
+    with head_r:
+        # 필터가 바뀌면 key가 달라져 1페이지로 돌아감
+        rec_page = st.number_input(
+            f"페이지 (총 {n_pages:,})", min_value=1, max_value=n_pages, value=1, step=1,
+            key=f"rec_page:{rec_brand}:{rec_sort}:{rec_search}:{rec_page_size}",
+        )
+    with perf_log.timer("recommend:page", page=rec_page, page_size=rec_page_size):
+        df_r, _ = engine.page(rec_brand, rec_sort, page=rec_page - 1, page_size=rec_page_size, search=rec_search)
 
-    st.markdown(f"##### ⭐ 입지 추천 — {len(df_r)}개 결과")
+    with head_l:
+        st.markdown(f"##### ⭐ 입지 추천 — {n_match:,}개 결과")
+        st.caption(f"전체 후보 {engine.n_candidates(rec_brand):,}개 중 조건에 맞는 후보 · "
+                   f"{(rec_page - 1) * rec_page_size + 1:,}~{(rec_page - 1) * rec_page_size + len(df_r):,}위 표시")
     st.caption("매력도 점수 기준 해당 브랜드가 **아직 진출하지 않은** 행정동을 추천합니다.")
 
     if df_r.empty:
         st.warning("조건에 맞는 추천 결과가 없습니다.")
     else:
-        # 3열 카드 그리드
-        for row_start in range(0, len(df_r), 3):
-            cols = st.columns(3)
-            for ci, idx in enumerate(range(row_start, min(row_start + 3, len(df_r)))):
-                r = df_r.iloc[idx]
-                color = BRAND_COLORS.get(r["brand"], "#888")
-                score = r.get("attractiveness_score")
-                score_color = "#4ECDC4" if score and score > 60 else "#FFE66D" if score and score > 40 else "#FF6B6B"
-
-                with cols[ci]:
-                    st.markdown(f"""
-                    <div style="background:#161b22;border:1px solid #30363d;border-radius:10px;
-                         padding:16px;border-top:3px solid {color};margin-bottom:12px">
-                      <div style="font-size:.7rem;color:#8b949e">#{row_start+ci+1} 추천</div>
-                      <div style="font-size:1rem;font-weight:700;margin:4px 0">{r['dong_name']}</div>
-                      <span style="background:{color}25;color:{color};padding:2px 8px;
-                            border-radius:10px;font-size:.75rem;font-weight:600">{r['brand']}</span>
-                      <span style="font-size:.72rem;color:#8b949e;margin-left:6px">미진출 지역</span>
-                      <div style="display:grid;grid-template-columns:1fr 1fr;gap:6px;margin-top:12px">
-                        <div style="background:#21262d;border-radius:6px;padding:8px">
-                          <div style="font-size:.65rem;color:#8b949e">매력도</div>
-                          <div style="font-size:1.1rem;font-weight:700;color:{score_color}">
-                            {f"{score:.1f}" if score else "-"}
-                          </div>
-                        </div>
-                        <div style="background:#21262d;border-radius:6px;padding:8px">
-                          <div style="font-size:.65rem;color:#8b949e">수요</div>
-                          <div style="font-size:1.1rem;font-weight:700;color:#4ECDC4">
-                            {f"{r['demand_score']:.1f}" if r.get('demand_score') else "-"}
-                          </div>
-                        </div>
-                        <div style="background:#21262d;border-radius:6px;padding:8px">
-                          <div style="font-size:.65rem;color:#8b949e">경쟁</div>
-                          <div style="font-size:1.1rem;font-weight:700;color:#FFE66D">
-                            {f"{r['competition_score']:.1f}" if r.get('competition_score') else "-"}
-                          </div>
-                        </div>
-                        <div style="background:#21262d;border-radius:6px;padding:8px">
-                          <div style="font-size:.65rem;color:#8b949e">비용</div>
-                          <div style="font-size:1.1rem;font-weight:700;color:#A8E6CF">
-                            {f"{r['cost_score']:.1f}" if r.get('cost_score') else "-"}
-                          </div>
-                        </div>
-                      </div>
-                      <div style="font-size:.72rem;color:#8b949e;margin-top:8px">
-                        근로자 {int(r.get('total_workers',0)):,}명 · 
-                        카페 {int(r.get('cafe_count',0))}개 · 
-                        월매출 {r.get('monthly_sales',0)/1e8:.1f}억
-                      </div>
-                    </div>
-                    """, unsafe_allow_html=True)
+        # 현재 페이지 카드만 압축 배열로 보내 한 컴포넌트에서 그림
+        html, height = cards_html(df_r, BRAND_COLORS, THEME, start_rank=(rec_page - 1) * rec_page_size + 1)
+        components.html(html, height=height, scrolling=False)
+
+
+# ══════════════════════════════════════════════
+# 탭 5: 지역 드릴다운 (서울 → 구 → 행정동, 모든 값은 큐브에서 조회)
+# ══════════════════════════════════════════════
+elif selected_tab == "🧭 지역 드릴다운":
+
+    if drill_gu == "서울 전체":
+        level, key, path = "city", None, ["서울"]
+    elif drill_dong == "구 전체":
+        level, key, path = "gu", drill_gu, ["서울", gu_name(drill_gu)]
+    else:
+        level, key, path = "dong", drill_dong, ["서울", gu_name(drill_gu), cube.dong_name(drill_dong)]
+    with perf_log.timer("drill:slice", level=level):
+        cell = cube.cell(level, key)
+        stores = cube.brand_counts(level, key)
+        dongs = cube.brand_counts(level, key, kind="dongs")
+        children = cube.children(level, key)
+
+    st.markdown(f"##### 🧭 {' › '.join(path)}")
+    k1, k2, k3, k4 = st.columns(4)
+    k1.metric("행정동", f"{int(cell['dongs']):,}개")
+    k2.metric("저가 브랜드 매장", f"{int(stores.sum()):,}개")
+    k3.metric("월 매출", f"{cell['monthly_sales'] / 1e8:,.1f}억")
+    k4.metric("근로자", f"{int(cell['total_workers']):,}명",
+              f"여성 {cell['female_workers'] / cell['total_workers'] * 100:.0f}%" if cell["total_workers"] else None,
+              delta_color="off")
+
+    c1, c2 = st.columns(2)
+    with c1:
+        st.markdown("##### 브랜드별 매장 수")
+        fig = go.Figure(go.Bar(
+            x=BRANDS, y=stores.tolist(),
+            marker_color=[ADJUSTED_BRAND_COLORS[b] for b in BRANDS],
+            text=[f"{int(v)}" if level == "dong" else f"{int(v)} ({int(dongs[b])}개 동)"
+                  for b, v in stores.items()],
+            textposition="outside",
+        ))
+        fig.update_layout(**PLOT_LAYOUT, height=300)
+        fig.update_xaxes(**GRID_STYLE)
+        fig.update_yaxes(**GRID_STYLE)
+        st.plotly_chart(fig, use_container_width=True)
+    with c2:
+        st.markdown("##### 연령대 · 성별 매출")
+        fig = go.Figure(go.Bar(
+            x=["10대", "20대", "30대", "40대", "50대", "60대+", "남성", "여성"],
+            y=[cell[m] / 1e8 for m in AGE_MEASURES + ["male_sales", "female_sales"]],
+            marker_color=["#FF6B6B", "#FFE66D", "#4ECDC4", "#58a6ff", "#bc8cff", "#A8E6CF", "#8b949e", "#f778ba"],
+        ))
+        fig.update_layout(**PLOT_LAYOUT, height=300)
+        fig.update_xaxes(**GRID_STYLE)
+        fig.update_yaxes(title="매출(억원)", **GRID_STYLE)
+        st.plotly_chart(fig, use_container_width=True)
+
+    if not children.empty:
+        st.markdown(f"##### {'구별' if level == 'city' else '행정동별'} 현황")
+        table = pd.DataFrame({"이름": children["name"], "행정동": children["dongs"].astype(int)})
+        for b in BRANDS:
+            table[b] = children[f"stores:{b}"].astype(int)
+        table["합계"] = table[BRANDS].sum(axis=1)
+        table["월매출(억)"] = (children["monthly_sales"] / 1e8).round(1)
+        table["근로자"] = children["total_workers"].astype(int)
+        if level == "gu":
+            table = table.drop(columns="행정동")
+        st.dataframe(table.sort_values("합계", ascending=False), hide_index=True, use_container_width=True)
+
+# ══════════════════════════════════════════════
+# 탭 6: 기간 추이 (월별 이력)
+# ══════════════════════════════════════════════
+elif selected_tab == "📈 기간 추이":
+
+    hist_start, hist_end = hist_range
+    n_months = len(HISTORY.months_between(hist_start, hist_end))
+    # 선택 기간의 월별 변동분과 시작·끝 월 행정동 배열만 읽음
+    with perf_log.timer("history:flows", months=n_months):
+        flows = HISTORY.store_flows(hist_start, hist_end)
+        flows = flows[flows["brand"].isin(hist_brands)]
+        growth = HISTORY.growth(hist_start, hist_end, "monthly_sales")
+
+    st.markdown(f"##### 📈 기간 추이 — {month_label(hist_start)} ~ {month_label(hist_end)} ({n_months}개월)")
+
+    first = flows[flows["month"] == hist_start]["stores"].sum()
+    last = flows[flows["month"] == hist_end]["stores"].sum()
+    in_range = flows[flows["month"] != hist_start]
+    k1, k2, k3, k4 = st.columns(4)
+    k1.metric("매장 수", f"{last:,}", f"{last - first:+,}")
+    k2.metric("개점", f"{in_range['opened'].sum():,}")
+    k3.metric("폐점", f"{in_range['closed'].sum():,}")
+    k4.metric("월 매출 합계", f"{growth['end'].sum() / 1e8:,.0f}억",
+              f"{(growth['end'].sum() / growth['start'].sum() - 1) * 100:+.1f}%" if growth["start"].sum() else None)
+
+    flows = flows.assign(month_label=flows["month"].map(month_label), net=flows["opened"] - flows["closed"])
+    c1, c2 = st.columns(2)
+    with c1:
+        st.markdown("##### 브랜드별 매장 수")
+        fig = px.line(flows, x="month_label", y="stores", color="brand", markers=True,
+                      color_discrete_map=ADJUSTED_BRAND_COLORS)
+        fig.update_layout(**PLOT_LAYOUT, height=320, legend_title_text="")
+        fig.update_xaxes(title="", **GRID_STYLE)
+        fig.update_yaxes(title="매장 수", **GRID_STYLE)
+        st.plotly_chart(fig, use_container_width=True)
+    with c2:
+        st.markdown("##### 월별 순증 (개점 − 폐점)")
+        fig = px.bar(flows[flows["month"] != hist_start], x="month_label", y="net", color="brand",
+                     color_discrete_map=ADJUSTED_BRAND_COLORS)
+        fig.update_layout(**PLOT_LAYOUT, height=320, legend_title_text="", barmode="relative")
+        fig.update_xaxes(title="", **GRID_STYLE)
+        fig.update_yaxes(title="순증 매장 수", **GRID_STYLE)
+        st.plotly_chart(fig, use_container_width=True)
+
+    st.markdown("##### 월 매출 증가율 상위 20개 동")
+    top = growth.dropna(subset=["growth_pct"]).nlargest(20, "growth_pct")
+    st.dataframe(
+        pd.DataFrame({
+            "행정동": top["dong_name"],
+            f"{month_label(hist_start)} 매출(억)": (top["start"] / 1e8).round(1),
+            f"{month_label(hist_end)} 매출(억)": (top["end"] / 1e8).round(1),
+            "증가율(%)": top["growth_pct"].round(1),
+        }),
+        hide_index=True, use_container_width=True,
+    )
+
+tab_span.stop()
+
+# ──────────────────────────────────────────────
+# 성능 패널 (숨김: URL에 ?perf=1 을 붙이면 사이드바에 표시)
+# ──────────────────────────────────────────────
+if st.query_params.get("perf") == "1":
+    with st.sidebar:
+        st.divider()
+        with st.expander("⏱️ 성능 (현재 서버 프로세스)", expanded=True):
+            st.caption(f"로그: {perf_log.log_path() or '파일 기록 꺼짐'}")
+            columns = {"name": "구간", "n": "횟수", "p50_ms": "p50(ms)", "p95_ms": "p95(ms)", "max_ms": "최대(ms)"}
+            tab_rows = perf_log.summary(source="app", prefix="tab:")
+            if tab_rows:
+                st.markdown("**탭 렌더링**")
+                st.dataframe(pd.DataFrame(tab_rows).rename(columns=columns), hide_index=True, use_container_width=True)
+            section_rows = [r for r in perf_log.summary(source="app") if not r["name"].startswith("tab:")]
+            if section_rows:
+                st.markdown("**세부 구간**")
+                st.dataframe(pd.DataFrame(section_rows).rename(columns=columns), hide_index=True, use_container_width=True)
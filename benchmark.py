@@ -0,0 +1,291 @@
+"""
+성능 벤치마크 (합성 데이터 1× / 10× / 100×)
+
+synthetic_data.py로 규모별 입력 CSV를 만든 뒤 다음을 측정합니다.
+  - preprocess      preprocess.py 전체 실행 (별도 프로세스, --force --format all)
+  - payload         dashboard_data.json / 컬럼형 / gzip / 섹션 분할 첫 화면 크기
+  - load_data       app.py load_store()와 같은 DataStore 생성 (JSON, 컬럼형, 섹션 분할 첫 화면)
+  - tab.*           탭별 계산 경로 (캐시 생성 비용과 rerun마다 드는 질의 비용을 나눠 측정)
+
+결과는 .cache/bench/latest.json 에 저장하고, 기준 파일(benchmark_baseline.json)이
+있으면 지표별로 비교해 허용 범위(기본 +50%)를 넘으면 회귀로 표시하고 종료 코드 1을 돌려줍니다.
+시간 값은 같은 머신에서 만든 기준 파일과 비교해야 의미가 있습니다.
+
+사용법:
+    python benchmark.py                      # 1×, 10× 측정 후 기준과 비교
+    python benchmark.py --scales 1 10 100    # 100× 포함 (카페 240만 행)
+    python benchmark.py --save-baseline      # 현재 결과를 기준 파일로 저장
+"""
+
+import argparse
+import gzip
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows에는 resource 모듈이 없음
+    resource = None
+
+import synthetic_data
+from dashboard_payload import COLUMNAR_FILENAME, MANIFEST_PATH, load_payload
+from data_store import DataStore
+from density_grid import DensityGrid
+from dong_search import DongSearchIndex
+from map_lod import MapLOD
+from overview_charts import build_overview_figures
+from recommend import RecommendEngine
+from spatial_index import StoreIndex
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+WORK_DIR = os.path.join(BASE_DIR, '.cache', 'bench')
+RESULT_PATH = os.path.join(WORK_DIR, 'latest.json')
+BASELINE_PATH = os.path.join(BASE_DIR, 'benchmark_baseline.json')
+DEFAULT_SCALES = [1, 10]
+TOLERANCE = 0.5             # 기준 대비 허용 증가율 (같은 머신에서도 ±30% 정도 흔들림)
+MIN_DELTA = {'ms': 10.0, 's': 0.25, 'mb': 0.05}   # 이보다 작은 차이는 측정 잡음으로 보고 무시
+
+# 탭 계산 경로에 쓰는 고정 질의 (서울 시청 부근)
+CENTER = (37.5665, 126.9780)
+PLOT_LAYOUT = dict(paper_bgcolor='#161b22', plot_bgcolor='#161b22',
+                   font=dict(color='#e6edf3', family='Noto Sans KR'), margin=dict(l=10, r=10, t=30, b=10))
+GRID_STYLE = dict(gridcolor='#30363d', zerolinecolor='#30363d')
+
+
+def _median_ms(fn, repeat):
+    """fn을 repeat번 실행한 시간의 중앙값(ms)과 마지막 결과"""
+    times, result = [], None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return round(float(np.median(times)), 3), result
+
+
+def _mb(n_bytes):
+    return round(n_bytes / 1024 / 1024, 3)
+
+
+def _children_peak_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return round(peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024, 1)
+
+
+# ─────────────────────────────────────────────
+# 시나리오
+# ─────────────────────────────────────────────
+def prepare_data(scale, work_dir):
+    """규모별 입력 CSV (이미 있으면 재사용 — seed가 고정이라 내용이 같음)"""
+    data_dir = os.path.join(work_dir, f'{scale}x', 'data')
+    if not os.path.exists(os.path.join(data_dir, 'seoul_caffee_data_with_brand.csv')):
+        t0 = time.perf_counter()
+        stats = synthetic_data.generate(data_dir, scale)
+        print(f"  합성 데이터 생성: 카페 {stats['cafes']:,}개, {time.perf_counter() - t0:.1f}s")
+    return data_dir
+
+
+def bench_preprocess(data_dir, out_dir, jobs):
+    """preprocess.py 전체 실행 (캐시 무시) → 소요 시간(s)"""
+    cmd = [sys.executable, os.path.join(BASE_DIR, 'preprocess.py'), '--force', '--format', 'all',
+           '--data-dir', data_dir, '--output-dir', out_dir, '--jobs', str(jobs)]
+    t0 = time.perf_counter()
+    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL,
+                   env={**os.environ, 'PERF_LOG': os.path.join(out_dir, 'perf.jsonl')})
+    return {
+        'preprocess_s': round(time.perf_counter() - t0, 3),
+        'preprocess_peak_rss_mb': _children_peak_mb(),
+    }
+
+
+def bench_payload(out_dir):
+    json_path = os.path.join(out_dir, 'dashboard_data.json')
+    with open(json_path, 'rb') as f:
+        raw = f.read()
+    manifest_path = os.path.join(out_dir, MANIFEST_PATH)
+    sections = load_payload(manifest_path)['sections']
+    return {
+        'payload_json_mb': _mb(len(raw)),
+        'payload_json_gzip_mb': _mb(len(gzip.compress(raw, 6))),
+        'payload_columnar_mb': _mb(os.path.getsize(os.path.join(out_dir, COLUMNAR_FILENAME))),
+        # index.html 브랜드 개요 탭이 받는 양 (manifest + overview 섹션)
+        'payload_sections_first_mb': _mb(os.path.getsize(manifest_path) + sections['overview']['bytes']),
+        'payload_sections_map_mb': _mb(sections['map_points']['bytes']),
+    }
+
+
+def bench_load_data(out_dir, repeat):
+    json_ms, store = _median_ms(lambda: DataStore(os.path.join(out_dir, 'dashboard_data.json')), repeat)
+    columnar_ms, _ = _median_ms(lambda: DataStore(os.path.join(out_dir, COLUMNAR_FILENAME)), repeat)
+    # 섹션 분할: 브랜드 개요 탭까지 (manifest + dong_data), 지도 탭을 처음 열 때 (map_points)
+    manifest_path = os.path.join(out_dir, MANIFEST_PATH)
+    sections_ms, _ = _median_ms(lambda: DataStore(manifest_path).df_dong, repeat)
+    sections_map_ms, _ = _median_ms(lambda: DataStore(manifest_path).df_map, repeat)
+    return {'load_data_json_ms': json_ms, 'load_data_columnar_ms': columnar_ms,
+            'load_data_sections_first_ms': sections_ms, 'load_data_sections_map_ms': sections_map_ms}, store
+
+
+def bench_tabs(store, repeat):
+    """탭별 계산 경로: *_build_ms는 캐시 생성(데이터 버전당 1회), 나머지는 rerun마다 드는 비용"""
+    r = {}
+    df_dong, df_map, brands = store.df_dong, store.df_map, store.brands
+
+    # 📊 브랜드 개요
+    r['tab.overview.figures_build_ms'], _ = _median_ms(
+        lambda: build_overview_figures(df_dong, brands, store.brand_stats, store.brand_colors,
+                                       PLOT_LAYOUT, GRID_STYLE), repeat)
+
+    # 🗺️ 지도
+    r['tab.map.index_build_ms'], index = _median_ms(lambda: StoreIndex.from_frame(df_map, brands), repeat)
+    r['tab.map.lod_build_ms'], lod = _median_ms(lambda: MapLOD(df_map, index), repeat)
+    r['tab.map.filter_ms'], _ = _median_ms(lambda: df_map[df_map['brand'].isin(brands[:3])], repeat)
+    r['tab.map.view_z11_ms'], _ = _median_ms(lambda: lod.view(*CENTER, 11, brands), repeat)
+    r['tab.map.view_z15_ms'], _ = _median_ms(lambda: lod.view(*CENTER, 15, brands), repeat)
+    grid = DensityGrid(store.density_grid)
+    r['tab.map.density_frame_ms'], _ = _median_ms(lambda: grid.frame(brands), repeat)
+    r['tab.map.radius_ms'], _ = _median_ms(
+        lambda: [index.radius_count(*CENTER, 300, b) for b in brands], repeat)
+
+    # 🏙️ 행정동 분석
+    r['tab.dong.search_build_ms'], search = _median_ms(lambda: DongSearchIndex(df_dong['dong_name']), repeat)
+
+    def dong_filter():
+        mask = pd.Series(search.mask('동'), index=df_dong.index) & (df_dong[f'cnt_{brands[0]}'] > 0)
+        return df_dong[mask].sort_values('attractiveness_score', ascending=False, na_position='last')
+    r['tab.dong.filter_ms'], _ = _median_ms(dong_filter, repeat)
+
+    # ⭐ 입지 추천
+    r['tab.recommend.engine_build_ms'], engine = _median_ms(
+        lambda: RecommendEngine(df_dong, brands, search_index=search), repeat)
+    r['tab.recommend.page_ms'], _ = _median_ms(lambda: engine.page(page=0, page_size=24), repeat)
+    r['tab.recommend.search_page_ms'], _ = _median_ms(
+        lambda: engine.page(brands[0], 'demand_score', page=1, page_size=24, search='동'), repeat)
+    return r
+
+
+def run_scale(scale, work_dir, repeat, jobs):
+    print(f"\n▶ {scale}×")
+    data_dir = prepare_data(scale, work_dir)
+    out_dir = os.path.join(work_dir, f'{scale}x', 'out')
+    os.makedirs(out_dir, exist_ok=True)
+
+    result = bench_preprocess(data_dir, out_dir, jobs)
+    print(f"  preprocess: {result['preprocess_s']:.2f}s")
+    result.update(bench_payload(out_dir))
+    load, store = bench_load_data(out_dir, repeat)
+    result.update(load)
+    print(f"  load_data: JSON {load['load_data_json_ms']:.0f} ms, 컬럼형 {load['load_data_columnar_ms']:.0f} ms, "
+          f"섹션 분할 첫 화면 {load['load_data_sections_first_ms']:.0f} ms")
+    result.update(bench_tabs(store, repeat))
+    result['stores'] = len(store.df_map)
+    result['dongs'] = len(store.df_dong)
+    return result
+
+
+# ─────────────────────────────────────────────
+# 기준 비교
+# ─────────────────────────────────────────────
+def _unit(metric):
+    for unit in ('ms', 's', 'mb'):
+        if metric.endswith('_' + unit):
+            return unit
+    return None
+
+
+def compare(current, baseline, tolerance=TOLERANCE):
+    """
+    규모·지표별 비교
+    반환: [(규모, 지표, 기준값, 현재값, 비율, 회귀 여부), ...]
+    """
+    rows = []
+    for scale, metrics in current['scales'].items():
+        base = baseline.get('scales', {}).get(scale)
+        if not base:
+            continue
+        for metric, value in metrics.items():
+            unit = _unit(metric)
+            old = base.get(metric)
+            if unit is None or old is None or value is None:
+                continue
+            ratio = value / old if old else float('inf')
+            regressed = ratio > 1 + tolerance and value - old > MIN_DELTA[unit]
+            rows.append((scale, metric, old, value, ratio, regressed))
+    return rows
+
+
+def print_comparison(rows):
+    print(f"\n{'규모':>5}  {'지표':<34} {'기준':>10} {'현재':>10} {'비율':>7}")
+    for scale, metric, old, value, ratio, regressed in rows:
+        mark = '  ⚠️ 회귀' if regressed else ''
+        print(f"{scale + '×':>5}  {metric:<34} {old:>10.2f} {value:>10.2f} {ratio:>6.2f}x{mark}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='합성 데이터 규모별 성능 벤치마크')
+    parser.add_argument('--scales', type=int, nargs='+', default=DEFAULT_SCALES,
+                        help='측정할 규모 배수 (기본: 1 10)')
+    parser.add_argument('--repeat', type=int, default=5, help='질의 시나리오 반복 횟수 (중앙값 사용)')
+    parser.add_argument('--jobs', type=int, default=1, help='preprocess.py --jobs 값')
+    parser.add_argument('--work-dir', default=WORK_DIR, help='합성 데이터·산출물 폴더')
+    parser.add_argument('--output', default=RESULT_PATH, help='결과 JSON 경로')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='비교할 기준 파일')
+    parser.add_argument('--save-baseline', action='store_true', help='결과를 기준 파일로 저장')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help=f'회귀로 볼 증가율 (기본 {TOLERANCE:.0%})')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    current = {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'machine': f"{platform.system()} {platform.machine()} ({os.cpu_count()} CPU)",
+            'repeat': args.repeat,
+            'jobs': args.jobs,
+        },
+        'scales': {},
+    }
+    # 자식 프로세스 peak RSS는 누적 최대값이라 작은 규모부터 측정
+    for scale in sorted(set(args.scales)):
+        current['scales'][str(scale)] = run_scale(scale, args.work_dir, args.repeat, args.jobs)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(current, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 결과 저장: {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+        print(f"📌 기준 파일 저장: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"기준 파일이 없습니다 ({args.baseline}). --save-baseline으로 먼저 만드세요.")
+        return 0
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    rows = compare(current, baseline, args.tolerance)
+    print_comparison(rows)
+    n_regressed = sum(r[-1] for r in rows)
+    if n_regressed:
+        print(f"\n⚠️ 회귀 {n_regressed}건 (허용 +{args.tolerance:.0%})")
+        return 1
+    print("\n✅ 회귀 없음")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,197 @@
+"""
+카페 브랜드 레지스트리 + 사업장명 브랜드 분류
+
+대시보드가 추적할 브랜드(BRANDS)와 색상(BRAND_COLORS)은 이 레지스트리에서 나옵니다.
+브랜드마다 사업장명에 나타나는 표기(한글/영문, 띄어쓰기 변형)를 별칭으로 두고,
+인허가 원본처럼 브랜드 라벨이 없는 CSV는 사업장명을 정규화한 뒤
+모든 별칭을 한 번에 찾는 Aho-Corasick 오토마톤으로 분류합니다.
+
+  - 정규화: NFKC → 소문자 → 괄호 안 지점명 · 끝 토큰 'OO점' 제거 → 한글/영숫자 외 문자 제거
+      'Mega MGC Coffee (강남역점)' → 'megamgccoffee'
+      '메가커피 강남역점'          → '메가커피'
+  - 여러 별칭이 맞으면 가장 긴 별칭의 브랜드 (길이가 같으면 먼저 나온 것)
+  - exclude 별칭이 가장 길게 맞으면 브랜드 없음 ('오메가커피'는 메가커피가 아님)
+  - 같은 정규화 이름은 한 번만 분류 (체인 매장은 지점명을 떼면 대부분 같은 이름)
+
+레지스트리는 기본값(DEFAULT_REGISTRY) 대신 JSON 파일로 바꿀 수 있습니다.
+  BRAND_REGISTRY=brands.json python preprocess.py --classify-brands
+  {"brands": [{"name": "메가커피", "color": "#FFE66D", "track": true,
+               "aliases": ["메가커피", "megacoffee"], "exclude": ["오메가커피"]}, ...]}
+track=true인 브랜드만 대시보드에 표시하고, 나머지는 분류만 합니다 (개인 카페와 구분).
+"""
+
+import collections
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+REGISTRY_ENV = 'BRAND_REGISTRY'
+
+DEFAULT_REGISTRY = [
+    # 저가 브랜드 (대시보드 추적 대상)
+    {'name': '더벤티', 'color': '#FF6B6B', 'track': True,
+     'aliases': ['더벤티', 'theventi']},
+    {'name': '매머드커피', 'color': '#4ECDC4', 'track': True,
+     'aliases': ['매머드커피', '매머드익스프레스', 'mammothcoffee', 'mammothexpress']},
+    {'name': '메가커피', 'color': '#FFE66D', 'track': True,
+     'aliases': ['메가커피', '메가엠지씨커피', '메가mgc커피', 'megacoffee', 'megamgccoffee', 'mgc커피'],
+     'exclude': ['오메가커피', 'omegacoffee']},
+    {'name': '빽다방', 'color': '#A8E6CF', 'track': True,
+     'aliases': ['빽다방', 'paiksdabang', 'paikscoffee']},
+    {'name': '컴포즈커피', 'color': '#C3A6FF', 'track': True,
+     'aliases': ['컴포즈커피', 'composecoffee']},
+    # 그 외 체인 (분류만, 대시보드에 넣으려면 track을 true로)
+    {'name': '스타벅스', 'color': '#00704A', 'aliases': ['스타벅스', 'starbucks']},
+    {'name': '이디야', 'color': '#1C3F94', 'aliases': ['이디야', 'ediya']},
+    {'name': '투썸플레이스', 'color': '#D71920', 'aliases': ['투썸플레이스', '투썸', 'twosomeplace', 'atwosomeplace']},
+    {'name': '할리스', 'color': '#C8102E', 'aliases': ['할리스', 'hollys']},
+    {'name': '커피빈', 'color': '#5B2C83', 'aliases': ['커피빈', 'coffeebean']},
+    {'name': '폴바셋', 'color': '#1A1A1A', 'aliases': ['폴바셋', 'paulbassett']},
+    {'name': '파스쿠찌', 'color': '#8C1D40', 'aliases': ['파스쿠찌', 'pascucci']},
+    {'name': '탐앤탐스', 'color': '#7A4B2A', 'aliases': ['탐앤탐스', 'tomntoms']},
+    {'name': '엔제리너스', 'color': '#9E7E5A', 'aliases': ['엔제리너스', 'angelinus']},
+    {'name': '더리터', 'color': '#F2A900', 'aliases': ['더리터', 'theliter']},
+    {'name': '하삼동커피', 'color': '#3E7CB1', 'aliases': ['하삼동커피', 'hasamdongcoffee']},
+]
+
+
+# ─────────────────────────────────────────────
+# 사업장명 정규화
+# ─────────────────────────────────────────────
+def normalize_names(names):
+    """사업장명 배열 → 정규화된 문자열 Series (결측은 '')"""
+    s = pd.Series(np.asarray(names, dtype=object)).fillna('').astype(str)
+    s = s.str.normalize('NFKC').str.lower()
+    s = s.str.replace(r'\([^)]*\)|\[[^\]]*\]', ' ', regex=True)      # 괄호 안 지점명
+    s = s.str.replace(r'(\S)\s+\S*점\s*$', r'\1', regex=True)        # 끝 토큰 'OO점' / 'N호점'
+    return s.str.replace(r'[^0-9a-z가-힣]', '', regex=True)
+
+
+def normalize_name(name):
+    """별칭 하나 정규화 (normalize_names와 같은 규칙)"""
+    return normalize_names([name]).iloc[0]
+
+
+# ─────────────────────────────────────────────
+# Aho-Corasick 오토마톤
+# ─────────────────────────────────────────────
+class BrandAutomaton:
+    """
+    여러 패턴을 문자열 한 번 훑기로 모두 찾는 오토마톤
+    patterns: {정규화된 패턴: 라벨} — 라벨 ''은 제외 패턴
+    """
+
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [None]       # 이 상태에서 끝나는 가장 긴 패턴 (길이, 라벨)
+        for pattern, label in patterns.items():
+            state = 0
+            for ch in pattern:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(None)
+                state = nxt
+            self.out[state] = (len(pattern), label)
+
+        # 실패 링크 (BFS): 자기 패턴이 없으면 실패 링크 쪽의 가장 긴 패턴을 물려받음
+        queue = collections.deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                link = self.goto[f].get(ch, 0)
+                self.fail[nxt] = link if link != nxt else 0
+                if self.out[nxt] is None:
+                    self.out[nxt] = self.out[self.fail[nxt]]
+
+    @property
+    def n_states(self):
+        return len(self.goto)
+
+    def longest(self, text):
+        """text에서 가장 긴 패턴의 라벨 (길이가 같으면 먼저 끝나는 것, 없으면 None)"""
+        goto, fail, out = self.goto, self.fail, self.out
+        best = None
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            hit = out[state]
+            if hit is not None and (best is None or hit[0] > best[0]):
+                best = hit
+        return None if best is None else best[1]
+
+
+# ─────────────────────────────────────────────
+# 레지스트리
+# ─────────────────────────────────────────────
+class BrandRegistry:
+    def __init__(self, entries):
+        self.entries = [dict(e) for e in entries]
+        names = [e['name'] for e in self.entries]
+        if len(set(names)) != len(names):
+            raise ValueError('브랜드 레지스트리에 같은 이름이 두 번 있습니다')
+
+        patterns = {}
+        for e in self.entries:
+            for alias in [e['name']] + list(e.get('aliases', [])):
+                key = normalize_name(alias)
+                if key and patterns.get(key, e['name']) != e['name']:
+                    raise ValueError(f"별칭 '{alias}'이(가) 여러 브랜드에 있습니다")
+                if key:
+                    patterns[key] = e['name']
+            for alias in e.get('exclude', []):
+                key = normalize_name(alias)
+                if key:
+                    patterns[key] = ''
+        self.automaton = BrandAutomaton(patterns)
+
+    @classmethod
+    def load(cls, path=None):
+        """path(없으면 BRAND_REGISTRY 환경 변수)의 JSON, 둘 다 없으면 기본 레지스트리"""
+        path = path or os.environ.get(REGISTRY_ENV)
+        if not path:
+            return cls(DEFAULT_REGISTRY)
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f)['brands'])
+
+    @property
+    def fingerprint(self):
+        """레지스트리 내용 해시 (preprocess.py 단계 캐시 키용)"""
+        text = json.dumps(self.entries, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+    @property
+    def brands(self):
+        """대시보드 추적 브랜드 (레지스트리 순서)"""
+        return [e['name'] for e in self.entries if e.get('track')]
+
+    @property
+    def colors(self):
+        return {e['name']: e['color'] for e in self.entries if e.get('track')}
+
+    @property
+    def all_brands(self):
+        return [e['name'] for e in self.entries]
+
+    def classify(self, names):
+        """
+        사업장명 배열 → 브랜드 이름 배열 (레지스트리 전체 기준, 해당 없으면 '')
+        정규화 후 고유 이름만 오토마톤에 넣고 결과를 펼칩니다.
+        """
+        codes, uniques = pd.factorize(normalize_names(names))
+        longest = self.automaton.longest
+        labels = np.array([longest(u) or '' for u in uniques] + [''], dtype=object)
+        return labels[codes]
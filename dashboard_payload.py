@@ -0,0 +1,235 @@
+"""
+대시보드 데이터 컬럼형(columnar) 직렬화
+
+dashboard_data.json은 레코드마다 키 이름을 반복하고 indent=2로 저장되어
+크기가 크고 파싱이 느립니다. 컬럼형 포맷(dashboard_data.columnar.json)은
+같은 내용을 "컬럼 이름 → 값 배열"로 저장하고, 반복되는 문자열(브랜드,
+행정동코드)은 사전(dict) + 정수 코드로 인코딩합니다.
+
+컬럼 표현:
+  - [v0, v1, ...]                      값 배열
+  - {"dict": [...], "codes": [...]}    사전 인코딩 (값 = dict[code])
+  - {"<키>": <컬럼>, ...}              중첩 객체 (dong_data의 brands)
+
+density_grid는 원래 컬럼 배열 구조이므로 그대로 저장합니다.
+
+섹션 분할 포맷(dashboard_sections/)은 같은 컬럼형 섹션을 파일 하나씩 나누고
+작은 manifest.json(브랜드 · brand_stats · 섹션별 행 수 · 파일 목록)만 먼저 읽게 합니다.
+  dashboard_sections/manifest.json      브랜드 개요 탭 카드·헤더에 필요한 값 전부
+  dashboard_sections/overview.json      개요 차트용 상위 행정동 · 연령대 매출 합계
+  dashboard_sections/<섹션>.json         dong_data · map_points · recommend_top · density_grid
+매장 수에 비례하는 map_points는 지도 탭을 처음 열 때만 읽으므로 첫 화면 시간은 매장 수와 무관합니다.
+"""
+
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+from dong_cube import AGE_MEASURES
+from saturation import SATURATION_LEVELS
+
+FORMAT = 'columnar-v1'
+SECTIONS_FORMAT = 'sections-v1'
+JSON_FILENAME = 'dashboard_data.json'
+COLUMNAR_FILENAME = 'dashboard_data.columnar.json'
+SECTIONS_DIRNAME = 'dashboard_sections'
+MANIFEST_FILENAME = 'manifest.json'
+MANIFEST_PATH = os.path.join(SECTIONS_DIRNAME, MANIFEST_FILENAME)
+
+# 섹션 분할 포맷에서 따로 저장하는 섹션 (manifest 순서 = 파일 목록 순서)
+SECTIONS = ['overview', 'dong_data', 'map_points', 'recommend_top', 'density_grid']
+OVERVIEW_TOP_DONGS = 30
+
+# 섹션별 사전 인코딩할 컬럼
+DICT_COLUMNS = {
+    'map_points': ['brand', 'dong_code', 'saturation'],
+    'recommend_top': ['brand'],
+}
+
+
+# ─────────────────────────────────────────────
+# 인코딩 (preprocess.py)
+# ─────────────────────────────────────────────
+def dict_encode(values, categories=None):
+    if categories is None:
+        categories = list(dict.fromkeys(values))
+    index = {v: i for i, v in enumerate(categories)}
+    return {'dict': list(categories), 'codes': [index[v] for v in values]}
+
+
+def records_to_columns(records, dict_columns=(), categories=None):
+    """레코드 리스트 → {키: 컬럼}. 중첩 dict 값은 중첩 컬럼으로 변환"""
+    if not records:
+        return {}
+    columns = {}
+    for key, sample in records[0].items():
+        values = [r[key] for r in records]
+        if isinstance(sample, dict):
+            columns[key] = records_to_columns(values)
+        elif key in dict_columns:
+            columns[key] = dict_encode(values, (categories or {}).get(key))
+        else:
+            columns[key] = values
+    return columns
+
+
+def to_columnar(output):
+    """preprocess.py의 output dict → 컬럼형 payload"""
+    categories = {'brand': output['brands'], 'saturation': SATURATION_LEVELS}
+    payload = {
+        'format': FORMAT,
+        'brands': output['brands'],
+        'brand_colors': output['brand_colors'],
+        'brand_stats': output['brand_stats'],
+    }
+    for section in ['dong_data', 'map_points', 'recommend_top']:
+        payload[section] = records_to_columns(
+            output[section], DICT_COLUMNS.get(section, ()), categories)
+    if 'density_grid' in output:
+        payload['density_grid'] = output['density_grid']
+    return payload
+
+
+def dump_columnar(output, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(to_columnar(output), f, ensure_ascii=False, separators=(',', ':'))
+
+
+def overview_section(dong_data):
+    """
+    개요 차트용 요약: 전체 브랜드 매장 수 상위 행정동(이름 · 브랜드별 수)과 연령대 매출 합계
+    (index.html이 dong_data 전체를 받지 않고 개요 차트를 그릴 수 있게)
+    """
+    top = sorted((d for d in dong_data if d['total_brand_count'] > 0),
+                 key=lambda d: -d['total_brand_count'])[:OVERVIEW_TOP_DONGS]
+    return {
+        'top_dongs': records_to_columns([{'dong_name': d['dong_name'], 'brands': d['brands']} for d in top]),
+        'age_totals': {k: sum(d.get(k) or 0 for d in dong_data) for k in AGE_MEASURES},
+    }
+
+
+def dump_sections(output, out_dir):
+    """
+    섹션 분할 저장 → manifest dict
+    섹션 파일을 모두 쓴 뒤 manifest를 마지막에 써서, manifest가 보이면 섹션도 모두 갖춰져 있습니다.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    payload = to_columnar(output)
+    payload['overview'] = overview_section(output['dong_data'])
+    manifest = {
+        'format': SECTIONS_FORMAT,
+        'brands': output['brands'],
+        'brand_colors': output['brand_colors'],
+        'brand_stats': output['brand_stats'],
+        'counts': {s: len(output[s]) for s in ['dong_data', 'map_points', 'recommend_top']},
+        'sections': {},
+    }
+    for section in SECTIONS:
+        if section not in payload:
+            continue
+        raw = json.dumps(payload[section], ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        file_name = f'{section}.json'
+        with open(os.path.join(out_dir, file_name), 'wb') as f:
+            f.write(raw)
+        # sha: 브라우저 캐시 무효화용 (index.html은 file?v=sha로 요청)
+        manifest['sections'][section] = {'file': file_name, 'bytes': len(raw),
+                                         'sha': hashlib.sha256(raw).hexdigest()[:12]}
+
+    path = os.path.join(out_dir, MANIFEST_FILENAME)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, separators=(',', ':'))
+    return manifest
+
+
+# ─────────────────────────────────────────────
+# 디코딩 (app.py)
+# ─────────────────────────────────────────────
+def decode_column(col):
+    """컬럼 → 값 리스트 (중첩 컬럼은 dict 리스트)"""
+    if isinstance(col, list):
+        return col
+    if 'codes' in col:
+        return [col['dict'][c] for c in col['codes']]
+    keys = list(col)
+    return [dict(zip(keys, vals)) for vals in zip(*(decode_column(col[k]) for k in keys))]
+
+
+def columns_to_records(columns):
+    keys = list(columns)
+    return [dict(zip(keys, vals)) for vals in zip(*(decode_column(columns[k]) for k in keys))]
+
+
+def from_columnar(payload):
+    """컬럼형 payload → dashboard_data.json과 같은 레코드 구조"""
+    data = {k: payload[k] for k in ['brands', 'brand_colors', 'brand_stats']}
+    for section in ['dong_data', 'map_points', 'recommend_top']:
+        data[section] = columns_to_records(payload[section])
+    if 'density_grid' in payload:
+        data['density_grid'] = payload['density_grid']
+    return data
+
+
+def column_frame(columns, nested_prefix=''):
+    """
+    컬럼 → DataFrame (레코드로 풀지 않고 바로 생성)
+    사전 인코딩 컬럼은 category로, 중첩 컬럼은 '<nested_prefix><하위키>' 컬럼으로 펼쳐 뒤에 붙입니다.
+    """
+    frame, nested = {}, {}
+    for key, col in columns.items():
+        if isinstance(col, list):
+            frame[key] = col
+        elif 'codes' in col:
+            frame[key] = pd.Categorical.from_codes(col['codes'], categories=col['dict'])
+        else:
+            for sub_key, sub_col in col.items():
+                nested[f'{nested_prefix}{sub_key}'] = decode_column(sub_col)
+    frame.update(nested)
+    return pd.DataFrame(frame)
+
+
+def payload_frames(data):
+    """payload(컬럼형 또는 JSON) → (df_dong, df_map, df_rec). df_dong의 브랜드 수는 cnt_<브랜드> 컬럼"""
+    if is_columnar(data):
+        # 컬럼형: 레코드로 풀지 않고 컬럼 배열에서 바로 DataFrame 생성
+        df_dong = column_frame(data['dong_data'], nested_prefix='cnt_')
+        df_map = column_frame(data['map_points'])
+        df_rec = column_frame(data['recommend_top'])
+        return df_dong, df_map, df_rec
+
+    df_dong = pd.DataFrame(data['dong_data'])
+    brands_df = pd.json_normalize(df_dong['brands'])
+    brands_df.columns = [f'cnt_{c}' for c in brands_df.columns]
+    df_dong = pd.concat([df_dong.drop(columns=['brands']), brands_df], axis=1)
+    return df_dong, pd.DataFrame(data['map_points']), pd.DataFrame(data['recommend_top'])
+
+
+def resolve_payload_path(base_dir):
+    """섹션 분할 manifest · 컬럼형 · JSON 중 가장 최근에 생성된 파일 경로 (없으면 None)"""
+    candidates = [os.path.join(base_dir, name) for name in [MANIFEST_PATH, COLUMNAR_FILENAME, JSON_FILENAME]]
+    candidates = [p for p in candidates if os.path.exists(p)]
+    if not candidates:
+        return None
+    return max(candidates, key=os.path.getmtime)
+
+
+def load_payload(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_section(manifest_path, manifest, section):
+    """manifest의 섹션 파일 하나 (없는 섹션이면 None)"""
+    entry = manifest['sections'].get(section)
+    if entry is None:
+        return None
+    return load_payload(os.path.join(os.path.dirname(manifest_path), entry['file']))
+
+
+def is_columnar(payload):
+    return payload.get('format') == FORMAT
+
+
+def is_sections(payload):
+    return payload.get('format') == SECTIONS_FORMAT
@@ -0,0 +1,107 @@
+"""
+app.py 세션 간 공유 데이터 저장소
+
+st.cache_data는 호출할 때마다 DataFrame을 역직렬화해 세션별 복사본을 돌려주므로
+동시 사용자가 많으면 메모리와 지연이 함께 늘어납니다. DataStore는 payload와
+DataFrame을 프로세스에 한 벌만 두고(st.cache_resource) 모든 세션이 같은 객체를
+읽습니다. pandas Copy-on-Write 덕분에 필터·정렬 결과를 수정해도 공유 원본은
+바뀌지 않으며, 원본 DataFrame 자체에 컬럼을 추가하는 등의 직접 변경은 하지 않습니다.
+(pandas 3부터는 항상 켜져 있고, 2.x에서는 기본값이 꺼져 있어 이 모듈을 불러올 때 켭니다)
+
+version = (payload 경로, 수정 시각 ns)이 캐시 키라서 preprocess.py가 파일을
+다시 쓰면 다음 rerun에서 서버 재시작 없이 새 데이터로 바뀝니다.
+
+섹션 분할 포맷(dashboard_sections/manifest.json)이면 처음에는 manifest만 읽고,
+df_dong · df_map · df_rec · density_grid는 처음 접근할 때 해당 섹션 파일만 읽습니다.
+그래서 브랜드 개요 탭만 여는 세션은 map_points를 파싱하지 않습니다.
+"""
+
+import os
+import threading
+
+import pandas as pd
+
+from dashboard_payload import (column_frame, is_sections, load_payload, load_section, payload_frames,
+                               resolve_payload_path)
+
+# pandas 2.x는 Copy-on-Write가 옵션 (3.0부터 항상 켜짐, 옵션은 deprecated)
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.options.mode.copy_on_write = True
+
+# DataFrame 속성 → payload 섹션
+FRAME_SECTIONS = {'df_dong': 'dong_data', 'df_map': 'map_points', 'df_rec': 'recommend_top'}
+
+
+def payload_version(base_dir):
+    """현재 읽을 payload의 (경로, 수정 시각 ns). payload가 없으면 FileNotFoundError"""
+    path = resolve_payload_path(base_dir)
+    if path is None:
+        raise FileNotFoundError(f"{base_dir}에 대시보드 데이터가 없습니다. preprocess.py를 먼저 실행하세요.")
+    return path, os.stat(path).st_mtime_ns
+
+
+class DataStore:
+    """읽기 전용 대시보드 데이터 (payload dict + 행정동/지도/추천 DataFrame)"""
+
+    def __init__(self, path, mtime_ns=None):
+        self.path = path
+        self.version = (path, mtime_ns if mtime_ns is not None else os.stat(path).st_mtime_ns)
+        self.data = load_payload(path)
+        self.sectioned = is_sections(self.data)
+        self._lock = threading.Lock()
+        self._sections = {}
+        if not self.sectioned:
+            # 단일 파일: 이미 전부 파싱했으므로 DataFrame도 바로 생성
+            frames = payload_frames(self.data)
+            self._sections = dict(zip(FRAME_SECTIONS.values(), frames))
+            self._sections['density_grid'] = self.data.get('density_grid')
+
+    def _section(self, section):
+        """섹션 하나 (분할 포맷은 처음 접근할 때 읽음, 여러 세션이 동시에 접근해도 한 번만)"""
+        with self._lock:
+            if section not in self._sections:
+                value = load_section(self.path, self.data, section)
+                if value is not None and section in FRAME_SECTIONS.values():
+                    value = column_frame(value, nested_prefix='cnt_' if section == 'dong_data' else '')
+                self._sections[section] = value
+            return self._sections[section]
+
+    @property
+    def df_dong(self):
+        return self._section('dong_data')
+
+    @property
+    def df_map(self):
+        return self._section('map_points')
+
+    @property
+    def df_rec(self):
+        return self._section('recommend_top')
+
+    @property
+    def density_grid(self):
+        """격자 셀별 브랜드 매장 수 (없으면 None)"""
+        return self._section('density_grid')
+
+    def has_section(self, section):
+        if self.sectioned:
+            return section in self.data['sections']
+        return section in self.data
+
+    def count(self, section):
+        """섹션 행 수 (분할 포맷은 manifest 값이라 섹션을 읽지 않음)"""
+        if self.sectioned:
+            return self.data['counts'][section]
+        return len(self._section(section))
+
+    @property
+    def brands(self):
+        return self.data['brands']
+
+    @property
+    def brand_colors(self):
+        return self.data['brand_colors']
+
+    @property
+    def brand_stats(self):
+        return self.data['brand_stats']
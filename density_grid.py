@@ -0,0 +1,139 @@
+"""
+매장 밀도 격자 집계 (행정동보다 세밀한 단위)
+
+저가 브랜드 매장 좌표를 고정된 정사각형 격자(기본 500m)에 모아
+매장이 있는 셀만 (gx, gy, 브랜드별 매장 수) 컬럼 배열로 저장합니다.
+원점과 기준 위도가 고정되어 있어 실행마다 같은 좌표는 같은 셀 번호를 받습니다.
+원점 남서쪽(서울 밖 추출본 등)의 매장은 음수 셀 번호를 그대로 받습니다.
+
+검증 (원점 남서쪽 매장 포함, 셀 복원 · 주변 밀도를 전수 집계와 비교):
+    python density_grid.py
+
+preprocess.py가 output['density_grid']로 저장하고,
+app.py는 원본 매장 좌표 대신 이 집계로 밀도 지도를 그립니다.
+"""
+
+import numpy as np
+import pandas as pd
+
+from spatial_index import M_PER_DEG_LAT
+
+DEFAULT_CELL_M = 500.0
+GRID_ORIGIN = (37.40, 126.70)   # 서울 남서쪽 바깥 (lat, lng)
+REF_LAT = 37.55                 # 경도 1도 길이 계산 기준 위도
+
+
+def cell_size_deg(cell_m=DEFAULT_CELL_M):
+    """격자 한 칸의 (위도, 경도) 크기(도)"""
+    return cell_m / M_PER_DEG_LAT, cell_m / (M_PER_DEG_LAT * np.cos(np.radians(REF_LAT)))
+
+
+def cell_of(lat, lng, cell_m=DEFAULT_CELL_M):
+    """좌표(배열 가능) → (gx, gy) 셀 번호"""
+    d_lat, d_lng = cell_size_deg(cell_m)
+    gx = np.floor((np.asarray(lng, dtype=np.float64) - GRID_ORIGIN[1]) / d_lng).astype(np.int64)
+    gy = np.floor((np.asarray(lat, dtype=np.float64) - GRID_ORIGIN[0]) / d_lat).astype(np.int64)
+    return gx, gy
+
+
+def build_density_grid(lat, lng, brand_codes, brands, cell_m=DEFAULT_CELL_M):
+    """
+    매장 좌표 → 셀별 브랜드 매장 수 (JSON 직렬화 가능한 dict)
+    {'cell_m', 'origin', 'ref_lat', 'gx': [...], 'gy': [...], 'counts': {브랜드: [...]}}
+    """
+    gx, gy = cell_of(lat, lng, cell_m)
+    # (gx, gy) 쌍 그대로 고유화 → 음수 셀 번호도 섞이지 않음, (gx, gy) 사전순 정렬
+    cells, inverse = np.unique(np.stack([gx, gy], axis=1).reshape(-1, 2), axis=0, return_inverse=True)
+    counts = np.zeros((len(cells), len(brands)), dtype=np.int64)
+    np.add.at(counts, (inverse.ravel(), np.asarray(brand_codes, dtype=np.int64)), 1)
+    return {
+        'cell_m': float(cell_m),
+        'origin': list(GRID_ORIGIN),
+        'ref_lat': REF_LAT,
+        'gx': cells[:, 0].tolist(),
+        'gy': cells[:, 1].tolist(),
+        'counts': {b: counts[:, i].tolist() for i, b in enumerate(brands)},
+    }
+
+
+class DensityGrid:
+    """output['density_grid'] 질의용 (셀 중심 좌표, 지점별 주변 밀도)"""
+
+    def __init__(self, grid):
+        self.cell_m = grid['cell_m']
+        self.brands = list(grid['counts'])
+        self.gx = np.asarray(grid['gx'], dtype=np.int64)
+        self.gy = np.asarray(grid['gy'], dtype=np.int64)
+        self.counts = np.array([grid['counts'][b] for b in self.brands], dtype=np.int64).reshape(
+            len(self.brands), len(self.gx)).T
+        # 조회 키 = 이 격자의 최소 셀 기준 오프셋 (항상 0 이상)
+        # build_density_grid가 (gx, gy) 순으로 저장하므로 키도 이미 정렬되어 있음
+        self.gx0 = int(self.gx.min()) if len(self.gx) else 0
+        self.gy0 = int(self.gy.min()) if len(self.gy) else 0
+        self.nx = int(self.gx.max()) - self.gx0 + 1 if len(self.gx) else 0
+        self.ny = int(self.gy.max()) - self.gy0 + 1 if len(self.gy) else 0
+        self.keys = (self.gx - self.gx0) * self.ny + (self.gy - self.gy0)
+
+    def frame(self, brands=None):
+        """셀 중심 좌표 + 선택 브랜드 매장 수 합계(count) DataFrame (매장 없는 셀 제외)"""
+        d_lat, d_lng = cell_size_deg(self.cell_m)
+        cols = [self.brands.index(b) for b in (brands if brands is not None else self.brands)]
+        count = self.counts[:, cols].sum(axis=1)
+        df = pd.DataFrame({
+            'lat': GRID_ORIGIN[0] + (self.gy + 0.5) * d_lat,
+            'lng': GRID_ORIGIN[1] + (self.gx + 0.5) * d_lng,
+            'count': count,
+        })
+        return df[df['count'] > 0].reset_index(drop=True)
+
+    def density_at(self, lats, lngs, ring=1):
+        """
+        지점별 주변 (2*ring+1)² 셀 안의 브랜드별 매장 수
+        반환: (지점 수, 브랜드 수) 배열
+        """
+        gx, gy = cell_of(np.atleast_1d(lats), np.atleast_1d(lngs), self.cell_m)
+        if not len(self.keys):
+            return np.zeros((len(gx), len(self.brands)), dtype=np.int64)
+        offsets = np.arange(-ring, ring + 1)
+        qx = np.broadcast_to(gx[:, None, None] + offsets[None, :, None] - self.gx0, (len(gx), len(offsets), len(offsets)))
+        qy = np.broadcast_to(gy[:, None, None] + offsets[None, None, :] - self.gy0, qx.shape)
+        inside = ((qx >= 0) & (qx < self.nx) & (qy >= 0) & (qy < self.ny)).reshape(len(gx), -1)
+        keys = (qx * self.ny + qy).reshape(len(gx), -1)
+
+        pos = np.searchsorted(self.keys, keys).clip(max=len(self.keys) - 1)
+        found = inside & (self.keys[pos] == keys)
+        return np.where(found[..., None], self.counts[pos], 0).sum(axis=1)
+
+
+# ─────────────────────────────────────────────
+# 검증: 원점 남서쪽 매장 포함
+# ─────────────────────────────────────────────
+def _check(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    # 서울 주변 + 원점 남서쪽(부산 · 제주 부근) 매장
+    lat = np.r_[rng.uniform(37.40, 37.70, n), 35.1, 35.1001, 33.5]
+    lng = np.r_[rng.uniform(126.70, 127.20, n), 129.0, 129.0001, 126.5]
+    brands = ['a', 'b', 'c']
+    codes = rng.integers(0, len(brands), len(lat))
+    grid = DensityGrid(build_density_grid(lat, lng, codes, brands))
+
+    # 셀 중심이 매장 좌표에서 반 칸 이내
+    d_lat, d_lng = cell_size_deg(grid.cell_m)
+    df = grid.frame()
+    gx, gy = cell_of(lat, lng)
+    centers = pd.DataFrame({'gx': grid.gx, 'gy': grid.gy, 'lat': df['lat'], 'lng': df['lng']})
+    merged = pd.DataFrame({'gx': gx, 'gy': gy, 'lat': lat, 'lng': lng}).merge(
+        centers, on=['gx', 'gy'], suffixes=('', '_c'))
+    ok_cells = (len(merged) == len(lat) and (np.abs(merged['lat'] - merged['lat_c']) <= d_lat / 2).all()
+                and (np.abs(merged['lng'] - merged['lng_c']) <= d_lng / 2).all())
+
+    # 주변 밀도 = 전수 집계
+    got = grid.density_at(lat, lng)
+    near = (np.abs(gx[:, None] - gx[None, :]) <= 1) & (np.abs(gy[:, None] - gy[None, :]) <= 1)
+    want = np.stack([(near & (codes[None, :] == b)).sum(axis=1) for b in range(len(brands))], axis=1)
+    print(f"셀 좌표 복원: {ok_cells}   주변 밀도 일치: {np.array_equal(got, want)}   "
+          f"부산 매장 주변: {got[-3].tolist()}")
+
+
+if __name__ == '__main__':
+    _check()
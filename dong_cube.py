@@ -0,0 +1,190 @@
+"""
+행정동 × 브랜드 × 인구통계 집계 큐브 (dashboard_cube.npz)
+
+행정동마다 측정값 벡터 하나(브랜드별 매장 수 · 브랜드 진출 여부 · 성별/연령대 매출 ·
+종사자 수)를 두고, 구(행정동코드 앞 5자리)와 서울 전체 합계를 미리 더해 둡니다.
+
+  values      (행정동 수 × 측정값 수)   행정동코드 순 정렬 → 같은 구의 동은 연속 구간
+  gu_values   (구 수 × 측정값 수)       gu_start[i]:gu_end[i] 가 i번째 구의 행정동 구간
+  city_values (측정값 수,)
+
+그래서 app.py 드릴다운(서울 → 구 → 행정동)의 모든 조회는 해당 셀 한 행을 읽거나
+하위 셀 구간을 자르는 것으로 끝나고, 행 단위 원본(dong_data · map_points)은 다시 보지 않습니다.
+'dongs:<브랜드>'는 진출 여부(0/1)라 구·서울 합계가 곧 진출 행정동 수입니다.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from stage_cache import array_digest
+
+CUBE_FILENAME = 'dashboard_cube.npz'
+
+# 서울 자치구 코드(행정동코드 앞 5자리) → 이름
+GU_NAMES = {
+    '11110': '종로구', '11140': '중구', '11170': '용산구', '11200': '성동구', '11215': '광진구',
+    '11230': '동대문구', '11260': '중랑구', '11290': '성북구', '11305': '강북구', '11320': '도봉구',
+    '11350': '노원구', '11380': '은평구', '11410': '서대문구', '11440': '마포구', '11470': '양천구',
+    '11500': '강서구', '11530': '구로구', '11545': '금천구', '11560': '영등포구', '11590': '동작구',
+    '11620': '관악구', '11650': '서초구', '11680': '강남구', '11710': '송파구', '11740': '강동구',
+}
+AGE_MEASURES = ['age_10', 'age_20', 'age_30', 'age_40', 'age_50', 'age_60']
+DEMO_MEASURES = ['monthly_sales', 'male_sales', 'female_sales'] + AGE_MEASURES + \
+                ['total_workers', 'female_workers']
+
+
+def cube_measures(brands):
+    """측정값 이름 목록: 브랜드 매장 수 · 브랜드 진출 여부 · 행정동 수 · 인구통계"""
+    return [f'stores:{b}' for b in brands] + [f'dongs:{b}' for b in brands] + ['dongs'] + DEMO_MEASURES
+
+
+def gu_name(code):
+    return GU_NAMES.get(code, code)
+
+
+def frame_inputs(df_dong, brands, count_prefix='cnt_'):
+    """
+    df_dong(브랜드 수는 <count_prefix><브랜드> 컬럼) → (행정동코드, 행정동명, 측정값 행렬) — 입력 행 순서 그대로, 결측은 0
+    """
+    def column(col):
+        if col not in df_dong.columns:
+            return np.zeros(len(df_dong))
+        return np.nan_to_num(pd.to_numeric(df_dong[col], errors='coerce').to_numpy(dtype=np.float64))
+
+    counts = np.array([column(f'{count_prefix}{b}') for b in brands]).reshape(len(brands), len(df_dong)).T
+    demo = np.array([column(m) for m in DEMO_MEASURES]).T
+    values = np.hstack([counts, (counts > 0).astype(np.float64), np.ones((len(df_dong), 1)), demo])
+    codes = df_dong['dong_code'].astype(str).to_numpy().astype(str)
+    names = df_dong['dong_name'].astype(str).to_numpy().astype(str)
+    return codes, names, values
+
+
+def source_digest(codes, names, brands, values):
+    """큐브 입력(행정동코드 · 이름 · 브랜드 목록 · 측정값)의 내용 해시 — 저장된 큐브가 지금 데이터로 만든 것인지 확인"""
+    return array_digest(np.asarray(codes).astype(str), np.asarray(names).astype(str),
+                        np.array(list(brands), dtype=str), np.asarray(values, dtype=np.float64))
+
+
+class DongCube:
+    def __init__(self, dong_codes, dong_names, brands, values, gu_values=None, city_values=None, source=None):
+        """source: 입력 내용 해시 (source_digest, npz에 함께 저장)"""
+        self.source = source
+        dong_codes = np.asarray(dong_codes).astype(str)
+        order = np.argsort(dong_codes, kind='stable')
+        self.dong_codes = dong_codes[order]
+        self.dong_names = np.asarray(dong_names).astype(str)[order]
+        self.brands = list(brands)
+        self.measures = cube_measures(self.brands)
+        self.values = np.asarray(values, dtype=np.float64)[order]
+        self._col = {m: j for j, m in enumerate(self.measures)}
+        self._dong_pos = {c: i for i, c in enumerate(self.dong_codes)}
+
+        # 구 = 행정동코드 앞 5자리 (정렬돼 있으므로 구마다 연속 구간)
+        gu = np.array([c[:5] for c in self.dong_codes], dtype=str)
+        self.gu_codes, self.gu_start, counts = np.unique(gu, return_index=True, return_counts=True)
+        self.gu_end = self.gu_start + counts
+        self._gu_pos = {c: i for i, c in enumerate(self.gu_codes)}
+
+        # 합계는 저장된 값을 쓰고, 없을 때만 계산
+        if gu_values is None:
+            gu_values = (np.add.reduceat(self.values, self.gu_start, axis=0) if len(self.values)
+                         else np.zeros((0, len(self.measures))))
+        if city_values is None:
+            city_values = self.values.sum(axis=0)
+        self.gu_values = np.asarray(gu_values, dtype=np.float64)
+        self.city_values = np.asarray(city_values, dtype=np.float64)
+
+    @classmethod
+    def from_frame(cls, df_dong, brands, count_prefix='cnt_'):
+        """app.py df_dong(브랜드 수는 cnt_<브랜드> 컬럼) → 큐브 (결측은 0)"""
+        codes, names, values = frame_inputs(df_dong, brands, count_prefix)
+        return cls(codes, names, brands, values, source=source_digest(codes, names, brands, values))
+
+    @classmethod
+    def from_records(cls, dong_data, brands):
+        """preprocess.py output['dong_data'] 레코드(브랜드 수는 'brands' dict) → 큐브"""
+        df = pd.DataFrame.from_records(dong_data, exclude=['brands'])
+        counts = pd.DataFrame.from_records([d['brands'] for d in dong_data], columns=brands)
+        return cls.from_frame(pd.concat([df, counts.add_prefix('cnt_')], axis=1), brands)
+
+    def save(self, path):
+        np.savez_compressed(
+            path,
+            dong_codes=self.dong_codes, dong_names=self.dong_names, brands=np.array(self.brands, dtype=str),
+            values=self.values, gu_values=self.gu_values, city_values=self.city_values,
+            source=np.array(self.source or ''),
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as z:
+            # source가 없는 이전 파일은 None → load_or_build가 다시 생성
+            source = str(z['source']) or None if 'source' in z.files else None
+            return cls(z['dong_codes'], z['dong_names'], z['brands'].tolist(), z['values'],
+                       z['gu_values'], z['city_values'], source)
+
+    # ─────────────────────────────────────────
+    # 조회 (level: 'city' | 'gu' | 'dong')
+    # ─────────────────────────────────────────
+    def _row(self, level, key=None):
+        if level == 'city':
+            return self.city_values
+        if level == 'gu':
+            return self.gu_values[self._gu_pos[key]]
+        if level == 'dong':
+            return self.values[self._dong_pos[key]]
+        raise ValueError(f'알 수 없는 level: {level}')
+
+    def cell(self, level, key=None):
+        """셀 하나의 측정값 Series"""
+        return pd.Series(self._row(level, key), index=self.measures)
+
+    def brand_counts(self, level, key=None, kind='stores'):
+        """브랜드별 매장 수(kind='stores') 또는 진출 행정동 수(kind='dongs')"""
+        row = self._row(level, key)
+        return pd.Series([row[self._col[f'{kind}:{b}']] for b in self.brands], index=self.brands)
+
+    def dongs_in(self, gu_code):
+        """구에 속한 행정동코드 (코드 순)"""
+        i = self._gu_pos[gu_code]
+        return self.dong_codes[self.gu_start[i]:self.gu_end[i]]
+
+    def dong_name(self, dong_code):
+        return self.dong_names[self._dong_pos[dong_code]]
+
+    def children(self, level, key=None):
+        """
+        하위 셀 표: 서울 → 구 목록, 구 → 소속 행정동 목록, 행정동 → 빈 표
+        컬럼: code, name, <측정값>...
+        """
+        if level == 'city':
+            codes = self.gu_codes
+            names = [gu_name(c) for c in codes]
+            values = self.gu_values
+        elif level == 'gu':
+            i = self._gu_pos[key]
+            sl = slice(self.gu_start[i], self.gu_end[i])
+            codes, names, values = self.dong_codes[sl], self.dong_names[sl], self.values[sl]
+        else:
+            codes, names, values = [], [], np.zeros((0, len(self.measures)))
+        df = pd.DataFrame(values, columns=self.measures)
+        df.insert(0, 'name', list(names))
+        df.insert(0, 'code', list(codes))
+        return df
+
+
+def load_or_build(base_dir, df_dong, brands):
+    """
+    preprocess.py가 만든 dashboard_cube.npz가 있으면 불러오고, 없거나 맞지 않으면 df_dong으로 생성
+    저장된 입력 내용 해시가 지금 df_dong · 브랜드 목록과 다르면(이전 payload로 만든 파일) 새로 만듭니다.
+    """
+    codes, names, values = frame_inputs(df_dong, brands)
+    source = source_digest(codes, names, brands, values)
+    path = os.path.join(base_dir, CUBE_FILENAME)
+    if os.path.exists(path):
+        cube = DongCube.load(path)
+        if cube.source == source:
+            return cube
+    return DongCube(codes, names, brands, values, source=source)
@@ -0,0 +1,235 @@
+"""
+행정동 경계 폴리곤 기반 매장 행정동 배정·검증
+
+카페 CSV의 행정동코드를 그대로 믿는 대신, 로컬 행정동 경계 파일(GeoJSON, WGS84
+경위도)로 매장 좌표가 실제로 속한 행정동을 계산해 비교합니다.
+
+대량 처리를 위해 점마다 루프를 돌지 않고 두 단계로 후보를 줄인 뒤 한 번에 판정합니다.
+  1) 바운딩 박스 격자: 격자 셀 → 바운딩 박스가 겹치는 폴리곤 목록
+  2) 가로 띠(strip) 간선 인덱스: (띠, 폴리곤) → 그 띠를 지나는 간선 목록
+점마다 후보 폴리곤의 "같은 띠" 간선만 펼쳐 교차 횟수(ray casting)를 세므로
+전체 간선 수와 무관하게 점당 비교 횟수가 작게 유지됩니다.
+
+사용법 (검증 리포트만):
+    python dong_polygons.py boundaries.geojson [payload 경로]
+"""
+
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from spatial_index import _expand_ranges
+
+# GeoJSON 속성에서 행정동코드를 찾을 키 (앞에서부터)
+CODE_KEYS = ['adm_cd2', 'ADM_CD2', '행정동코드', 'adm_cd', 'ADM_CD', 'code']
+NAME_KEYS = ['adm_nm', 'ADM_NM', '행정동명', 'name']
+BBOX_GRID = 64        # 바운딩 박스 격자 한 변의 셀 수
+N_STRIPS = 512        # 가로 띠 개수
+
+
+def _rings(geometry):
+    """Polygon / MultiPolygon → 고리(외곽선·구멍) 좌표 배열 목록 (짝홀 규칙이라 구분 불필요)"""
+    if geometry is None:
+        return []
+    if geometry['type'] == 'Polygon':
+        polygons = [geometry['coordinates']]
+    elif geometry['type'] == 'MultiPolygon':
+        polygons = geometry['coordinates']
+    else:
+        return []
+    return [np.asarray(ring, dtype=np.float64)[:, :2] for poly in polygons for ring in poly if len(ring) >= 3]
+
+
+def _first_key(props, keys):
+    for key in keys:
+        if props.get(key) not in (None, ''):
+            return str(props[key]).strip()
+    return ''
+
+
+def load_boundaries(path):
+    """GeoJSON → (행정동코드 목록, 행정동명 목록, 폴리곤별 고리 목록)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        features = json.load(f)['features']
+    codes, names, rings = [], [], []
+    for feat in features:
+        feat_rings = _rings(feat.get('geometry'))
+        if not feat_rings:
+            continue
+        props = feat.get('properties') or {}
+        codes.append(_first_key(props, CODE_KEYS))
+        names.append(_first_key(props, NAME_KEYS))
+        rings.append(feat_rings)
+    return codes, names, rings
+
+
+def _csr(keys, values, n_keys):
+    """(키, 값) 쌍 → 키 순 정렬 값 배열 + 키별 [start, end)"""
+    order = np.argsort(keys, kind='stable')
+    starts = np.searchsorted(keys[order], np.arange(n_keys))
+    ends = np.searchsorted(keys[order], np.arange(n_keys), side='right')
+    return values[order], starts, ends
+
+
+class PolygonIndex:
+    def __init__(self, codes, rings, names=None, bbox_grid=BBOX_GRID, n_strips=N_STRIPS):
+        self.codes = list(codes)
+        self.names = list(names) if names is not None else [''] * len(self.codes)
+        n_poly = len(self.codes)
+
+        # 간선 평탄 배열 (고리마다 마지막 → 첫 점으로 닫음)
+        x0, y0, x1, y1, pid = [], [], [], [], []
+        bbox = np.empty((n_poly, 4))
+        for i, poly_rings in enumerate(rings):
+            for ring in poly_rings:
+                closed = ring if np.array_equal(ring[0], ring[-1]) else np.vstack([ring, ring[:1]])
+                x0.append(closed[:-1, 0]); y0.append(closed[:-1, 1])
+                x1.append(closed[1:, 0]); y1.append(closed[1:, 1])
+                pid.append(np.full(len(closed) - 1, i))
+            pts = np.vstack(poly_rings)
+            bbox[i] = pts[:, 0].min(), pts[:, 1].min(), pts[:, 0].max(), pts[:, 1].max()
+        self.x0, self.y0 = np.concatenate(x0), np.concatenate(y0)
+        self.x1, self.y1 = np.concatenate(x1), np.concatenate(y1)
+        edge_pid = np.concatenate(pid)
+        self.bbox = bbox
+        self.n_poly = n_poly
+        self.n_edges = len(edge_pid)
+
+        # 전체 범위
+        self.xmin, self.ymin = bbox[:, 0].min(), bbox[:, 1].min()
+        self.xmax, self.ymax = bbox[:, 2].max(), bbox[:, 3].max()
+
+        # 1) 바운딩 박스 격자: 셀 → 폴리곤
+        self.grid = bbox_grid
+        self.cell_w = (self.xmax - self.xmin) / bbox_grid or 1.0
+        self.cell_h = (self.ymax - self.ymin) / bbox_grid or 1.0
+        gx0, gy0 = self._grid_xy(bbox[:, 0], bbox[:, 1])
+        gx1, gy1 = self._grid_xy(bbox[:, 2], bbox[:, 3])
+        span_x, span_y = gx1 - gx0 + 1, gy1 - gy0 + 1
+        poly_rep = np.repeat(np.arange(n_poly), span_x * span_y)
+        local = _expand_ranges(np.zeros(n_poly, dtype=np.int64), span_x * span_y)
+        cx = gx0[poly_rep] + local // span_y[poly_rep]
+        cy = gy0[poly_rep] + local % span_y[poly_rep]
+        self.cell_poly, self.cell_start, self.cell_end = _csr(cx * bbox_grid + cy, poly_rep, bbox_grid ** 2)
+
+        # 2) 가로 띠 간선 인덱스: (띠, 폴리곤) → 간선
+        self.n_strips = n_strips
+        self.strip_h = (self.ymax - self.ymin) / n_strips or 1.0
+        s0 = self._strip(np.minimum(self.y0, self.y1))
+        s1 = self._strip(np.maximum(self.y0, self.y1))
+        edge_rep = np.repeat(np.arange(self.n_edges), s1 - s0 + 1)
+        strip = s0[edge_rep] + _expand_ranges(np.zeros(self.n_edges, dtype=np.int64), s1 - s0 + 1)
+        self.strip_edge, self.strip_start, self.strip_end = _csr(
+            strip * n_poly + edge_pid[edge_rep], edge_rep, n_strips * n_poly)
+
+    @classmethod
+    def from_geojson(cls, path, **kwargs):
+        codes, names, rings = load_boundaries(path)
+        return cls(codes, rings, names, **kwargs)
+
+    def _grid_xy(self, x, y):
+        gx = np.clip(((x - self.xmin) / self.cell_w).astype(np.int64), 0, self.grid - 1)
+        gy = np.clip(((y - self.ymin) / self.cell_h).astype(np.int64), 0, self.grid - 1)
+        return gx, gy
+
+    def _strip(self, y):
+        return np.clip(((y - self.ymin) / self.strip_h).astype(np.int64), 0, self.n_strips - 1)
+
+    def locate(self, lats, lngs):
+        """
+        좌표 배열 → 속한 폴리곤 번호 배열 (어느 폴리곤에도 없으면 -1)
+        """
+        x = np.asarray(lngs, dtype=np.float64)
+        y = np.asarray(lats, dtype=np.float64)
+        result = np.full(len(x), -1, dtype=np.int64)
+        inside_extent = np.flatnonzero((x >= self.xmin) & (x <= self.xmax)
+                                       & (y >= self.ymin) & (y <= self.ymax))
+        if not len(inside_extent):
+            return result
+
+        # 1) 점 → 격자 셀 → 바운딩 박스 후보 폴리곤
+        gx, gy = self._grid_xy(x[inside_extent], y[inside_extent])
+        cell = gx * self.grid + gy
+        lengths = self.cell_end[cell] - self.cell_start[cell]
+        pt = np.repeat(inside_extent, lengths)
+        poly = self.cell_poly[_expand_ranges(self.cell_start[cell], lengths)]
+        b = self.bbox[poly]
+        keep = (x[pt] >= b[:, 0]) & (x[pt] <= b[:, 2]) & (y[pt] >= b[:, 1]) & (y[pt] <= b[:, 3])
+        pt, poly = pt[keep], poly[keep]
+
+        # 2) (점, 후보 폴리곤) → 같은 띠의 간선만 펼쳐 오른쪽 반직선 교차 수 계산
+        key = self._strip(y[pt]) * self.n_poly + poly
+        lengths = self.strip_end[key] - self.strip_start[key]
+        pair = np.repeat(np.arange(len(pt)), lengths)
+        edge = self.strip_edge[_expand_ranges(self.strip_start[key], lengths)]
+        px, py = x[pt[pair]], y[pt[pair]]
+        ex0, ey0, ex1, ey1 = self.x0[edge], self.y0[edge], self.x1[edge], self.y1[edge]
+        straddle = (ey0 > py) != (ey1 > py)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x_cross = ex0 + (py - ey0) * (ex1 - ex0) / (ey1 - ey0)
+        crossings = np.bincount(pair[straddle & (px < x_cross)], minlength=len(pt))
+
+        inside = crossings % 2 == 1
+        # 경계가 겹치는 드문 경우에는 먼저 나온 폴리곤 하나만 배정
+        hit_pt, first = np.unique(pt[inside], return_index=True)
+        result[hit_pt] = poly[inside][first]
+        return result
+
+    def assign_codes(self, lats, lngs):
+        """좌표 배열 → 행정동코드 배열 (폴리곤 밖이면 '')"""
+        idx = self.locate(lats, lngs)
+        codes = np.array(self.codes + [''], dtype=object)
+        return codes[idx]
+
+
+def validate_codes(index, lats, lngs, codes):
+    """
+    기존 행정동코드와 경계 기반 행정동코드 비교
+    반환: (경계 기반 코드 배열, 요약 dict)
+    """
+    codes = np.asarray(codes, dtype=object).astype(str)
+    assigned = index.assign_codes(lats, lngs)
+    outside = assigned == ''
+    mismatch = ~outside & (assigned != codes)
+    pairs = {}
+    for old, new in zip(codes[mismatch], assigned[mismatch]):
+        pairs[old, new] = pairs.get((old, new), 0) + 1
+    summary = {
+        'total': len(codes),
+        'matched': int((~outside & ~mismatch).sum()),
+        'mismatched': int(mismatch.sum()),
+        'outside': int(outside.sum()),
+        'top_pairs': sorted(pairs.items(), key=lambda kv: -kv[1])[:10],
+    }
+    return assigned, summary
+
+
+def print_summary(summary):
+    total = summary['total'] or 1
+    print(f"     → 일치 {summary['matched']:,}개 ({summary['matched'] / total:.1%}), "
+          f"불일치 {summary['mismatched']:,}개 ({summary['mismatched'] / total:.1%}), "
+          f"경계 밖 {summary['outside']:,}개")
+    for (old, new), n in summary['top_pairs']:
+        print(f"        {old} → {new}: {n:,}개")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        sys.exit('사용법: python dong_polygons.py boundaries.geojson [payload 경로]')
+    from data_store import DataStore, payload_version
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    # 경로를 주지 않으면 app.py와 같은 최신 payload (JSON · 컬럼형 · 섹션 분할 manifest 모두 가능)
+    store = DataStore(sys.argv[2]) if len(sys.argv) > 2 else DataStore(*payload_version(base_dir))
+    df_map = store.df_map
+
+    t0 = time.perf_counter()
+    index = PolygonIndex.from_geojson(sys.argv[1])
+    print(f"경계 인덱스: 폴리곤 {index.n_poly:,}개, 간선 {index.n_edges:,}개, {time.perf_counter() - t0:.2f}s")
+    t0 = time.perf_counter()
+    _, summary = validate_codes(index, df_map['lat'].to_numpy(), df_map['lng'].to_numpy(),
+                                df_map['dong_code'].astype(str).to_numpy())
+    print(f"매장 {summary['total']:,}개 판정: {time.perf_counter() - t0:.3f}s")
+    print_summary(summary)
@@ -0,0 +1,103 @@
+"""
+행정동 이름 검색 인덱스 (자모 n-gram)
+
+str.contains(query)는 입력마다 전체 이름을 정규식으로 훑고, "(" 같은 입력에서
+오류가 납니다. 이 인덱스는 로드 시 한 번 이름을 자모로 풀어 bigram → 행 번호
+역색인을 만들고, 질의 bigram 목록의 교집합을 구한 뒤 자모 문자열 포함 여부로
+최종 확인합니다.
+  - 자모 단위라 입력 중인 글자도 매칭: "강나" → 강남동, "간" → 가나…
+  - 초성만 입력하면 초성 문자열에서 검색: "ㄱㄴ" → 강남…
+  - 정규식을 쓰지 않으므로 특수문자 입력도 그대로 문자로 검색
+
+index.html의 updateDongTable()/updateRecommend()도 같은 규칙(buildDongSearch)을 씁니다.
+"""
+
+import numpy as np
+
+CHO = 'ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ'
+JUNG = 'ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ'
+# 겹받침은 두 자모로 풀어서 입력 중인 글자("달" → "닭")도 앞부분이 맞게 함
+JONG = ['', 'ㄱ', 'ㄲ', 'ㄱㅅ', 'ㄴ', 'ㄴㅈ', 'ㄴㅎ', 'ㄷ', 'ㄹ', 'ㄹㄱ', 'ㄹㅁ', 'ㄹㅂ', 'ㄹㅅ',
+        'ㄹㅌ', 'ㄹㅍ', 'ㄹㅎ', 'ㅁ', 'ㅂ', 'ㅂㅅ', 'ㅅ', 'ㅆ', 'ㅇ', 'ㅈ', 'ㅊ', 'ㅋ', 'ㅌ', 'ㅍ', 'ㅎ']
+# 입력기에서 단독으로 들어오는 겹받침 자모
+COMPOUND = {'ㄳ': 'ㄱㅅ', 'ㄵ': 'ㄴㅈ', 'ㄶ': 'ㄴㅎ', 'ㄺ': 'ㄹㄱ', 'ㄻ': 'ㄹㅁ', 'ㄼ': 'ㄹㅂ',
+            'ㄽ': 'ㄹㅅ', 'ㄾ': 'ㄹㅌ', 'ㄿ': 'ㄹㅍ', 'ㅀ': 'ㄹㅎ', 'ㅄ': 'ㅂㅅ'}
+HANGUL_BASE, HANGUL_LAST = 0xAC00, 0xD7A3
+
+
+def normalize(text):
+    return ''.join(str(text).split()).lower()
+
+
+def to_jamo(text):
+    """공백 제거·소문자 → 한글 음절은 초성·중성·종성 자모로 풀어 씀"""
+    out = []
+    for ch in normalize(text):
+        code = ord(ch)
+        if HANGUL_BASE <= code <= HANGUL_LAST:
+            idx = code - HANGUL_BASE
+            out.append(CHO[idx // 588] + JUNG[idx % 588 // 28] + JONG[idx % 28])
+        else:
+            out.append(COMPOUND.get(ch, ch))
+    return ''.join(out)
+
+
+def to_choseong(text):
+    """한글 음절 → 초성만 (나머지 문자는 그대로)"""
+    out = []
+    for ch in normalize(text):
+        code = ord(ch)
+        out.append(CHO[(code - HANGUL_BASE) // 588] if HANGUL_BASE <= code <= HANGUL_LAST else ch)
+    return ''.join(out)
+
+
+def _bigrams(text):
+    return {text[i:i + 2] for i in range(len(text) - 1)} if len(text) > 1 else {text}
+
+
+class DongSearchIndex:
+    def __init__(self, names):
+        self.names = [str(n) for n in names]
+        self.size = len(self.names)
+        self.jamo = [to_jamo(n) for n in self.names]
+        self.choseong = [to_choseong(n) for n in self.names]
+        self._postings = self._build(self.jamo)
+        self._cho_postings = self._build(self.choseong)
+
+    @staticmethod
+    def _build(strings):
+        """n-gram(1글자·2글자) → 정렬된 행 번호 배열"""
+        postings = {}
+        for pos, s in enumerate(strings):
+            for gram in set(s) | _bigrams(s):
+                postings.setdefault(gram, []).append(pos)
+        return {gram: np.asarray(p, dtype=np.int64) for gram, p in postings.items()}
+
+    @staticmethod
+    def _lookup(postings, strings, query):
+        grams = sorted((postings.get(g) for g in _bigrams(query)),
+                       key=lambda p: -1 if p is None else len(p))
+        if not grams or grams[0] is None:
+            return np.empty(0, dtype=np.int64)
+        cand = grams[0]
+        for p in grams[1:]:
+            cand = np.intersect1d(cand, p, assume_unique=True)
+            if not len(cand):
+                break
+        # bigram이 모두 있어도 순서·연속이 맞는지 최종 확인
+        return np.asarray([i for i in cand if query in strings[i]], dtype=np.int64)
+
+    def search(self, query):
+        """질의 → 매칭되는 행 번호 (오름차순). 빈 질의는 전체"""
+        if not normalize(query):
+            return np.arange(self.size)
+        q = normalize(query)
+        if all(ch in CHO for ch in q):
+            return self._lookup(self._cho_postings, self.choseong, q)
+        return self._lookup(self._postings, self.jamo, to_jamo(q))
+
+    def mask(self, query):
+        """질의 → 행별 매칭 여부 (bool 배열)"""
+        out = np.zeros(self.size, dtype=bool)
+        out[self.search(query)] = True
+        return out
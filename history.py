@@ -0,0 +1,221 @@
+"""
+월별 스냅샷 이력 저장소 (dashboard_history.npz)
+
+preprocess.py --history DIR 은 DIR/YYYYMM/ 폴더마다 들어 있는 월별 입력 CSV를
+한 파일로 합칩니다.
+  - 행정동 지표  : 월마다 (행정동 × 지표) float64 배열 하나 (dong_YYYYMM)
+                  (월매출이 수천억 원대라 float32로는 만 원 단위 이하가 잘림)
+  - 매장(map_points): 전체 기간에 한 번이라도 나온 매장 테이블 + 월별 변동분
+                    (open_YYYYMM = 새로 생긴 매장 번호, close_YYYYMM = 사라진 매장 번호)
+                    첫 달은 기준 시점이라 변동분이 비어 있음 (매장 목록은 key_YYYYMM)
+                    KEYFRAME_EVERY개월마다 전체 매장 번호(key_YYYYMM)를 같이 저장
+
+npz 멤버는 접근할 때 압축을 풀기 때문에, History는 요청한 기간의 월 배열과
+가장 가까운 keyframe 이후의 변동분만 읽습니다. 이력이 1년 늘어나도 app.py 시작 시
+읽는 양은 월 목록 · 행정동 목록 · 매장별 브랜드 코드뿐입니다.
+
+매장은 (브랜드, 사업장명, 좌표 1e-5도 반올림)이 같으면 같은 매장으로 봅니다.
+"""
+
+import os
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+HISTORY_FILENAME = 'dashboard_history.npz'
+KEYFRAME_EVERY = 12
+MONTH_DIR = re.compile(r'^(\d{4})-?(\d{2})$')
+# 행정동 지표 (brand 매장 수는 count_<브랜드>로 앞에 붙음)
+DONG_METRICS = ['monthly_sales', 'total_workers', 'female_workers', 'attractiveness_score']
+
+
+def month_dirs(root):
+    """root 아래 YYYYMM 또는 YYYY-MM 폴더 → [(‘YYYYMM’, 경로), ...] (월 순)"""
+    found = []
+    for name in os.listdir(root):
+        m = MONTH_DIR.match(name)
+        if m and os.path.isdir(os.path.join(root, name)):
+            found.append((m.group(1) + m.group(2), os.path.join(root, name)))
+    return sorted(found)
+
+
+def store_keys(brand, name, lat, lng):
+    """매장 식별 키 ('브랜드|사업장명|위도e5|경도e5') 배열"""
+    def e5(v):
+        return pd.Series(np.round(np.asarray(v, dtype=np.float64) * 1e5).astype(np.int64)).astype(str)
+    keys = (pd.Series(np.asarray(brand)).astype(str) + '|' + pd.Series(np.asarray(name)).astype(str)
+            + '|' + e5(lat) + '|' + e5(lng))
+    return keys.to_numpy()
+
+
+# ─────────────────────────────────────────────
+# 쓰기 (preprocess.py)
+# ─────────────────────────────────────────────
+def build_history(snapshots, brands):
+    """
+    snapshots : [(월 'YYYYMM', 행정동 DataFrame, 매장 DataFrame), ...] (월 순)
+        행정동 DataFrame: dong_code, dong_name, count_<브랜드>..., DONG_METRICS
+        매장 DataFrame  : brand, name, lat, lng, dong_code
+    반환: np.savez_compressed에 넘길 {이름: 배열}
+    """
+    metrics = [f'count_{b}' for b in brands] + DONG_METRICS
+    months = [m for m, _, _ in snapshots]
+
+    # 행정동 축: 전체 기간 합집합 (이름은 가장 최근 월 기준)
+    names = {}
+    for _, dong, _ in snapshots:
+        names.update(zip(dong['dong_code'].astype(str), dong['dong_name'].astype(str)))
+    dong_codes = np.array(sorted(names), dtype=str)
+    dong_pos = {c: i for i, c in enumerate(dong_codes)}
+
+    arrays = {
+        'months': np.array(months, dtype=str),
+        'metrics': np.array(metrics, dtype=str),
+        'brands': np.array(brands, dtype=str),
+        'dong_codes': dong_codes,
+        'dong_names': np.array([names[c] for c in dong_codes], dtype=str),
+        'keyframe_every': np.int64(KEYFRAME_EVERY),
+    }
+
+    # 매장 테이블: 처음 나온 순서대로 번호 부여 (새 매장 행만 월별로 모아 이어붙임)
+    ids_by_key, parts = {}, []
+    prev = np.empty(0, dtype=np.int32)
+    for i, (month, dong, stores) in enumerate(snapshots):
+        values = np.full((len(dong_codes), len(metrics)), np.nan, dtype=np.float64)
+        rows = np.array([dong_pos[c] for c in dong['dong_code'].astype(str)], dtype=np.int64)
+        for j, metric in enumerate(metrics):
+            if metric in dong.columns:
+                values[rows, j] = pd.to_numeric(dong[metric], errors='coerce').to_numpy(dtype=np.float64)
+        arrays[f'dong_{month}'] = values
+
+        keys = pd.Series(store_keys(stores['brand'], stores['name'], stores['lat'], stores['lng']))
+        is_new = keys.map(ids_by_key).isna() & ~keys.duplicated()
+        ids_by_key.update(zip(keys[is_new], range(len(ids_by_key), len(ids_by_key) + int(is_new.sum()))))
+        ids = keys.map(ids_by_key).to_numpy(dtype=np.int32)
+        parts.append(stores[is_new.to_numpy()])
+
+        cur = np.unique(ids)
+        # 첫 달은 이전 스냅샷이 없으므로 개점·폐점으로 세지 않음
+        if i == 0:
+            prev = cur
+        arrays[f'open_{month}'] = np.setdiff1d(cur, prev, assume_unique=True).astype(np.int32)
+        arrays[f'close_{month}'] = np.setdiff1d(prev, cur, assume_unique=True).astype(np.int32)
+        if i % KEYFRAME_EVERY == 0:
+            arrays[f'key_{month}'] = cur.astype(np.int32)
+        prev = cur
+
+    store_table = pd.concat(parts, ignore_index=True)
+    brand_code = {b: i for i, b in enumerate(brands)}
+    arrays['store_brand'] = np.array([brand_code.get(b, -1) for b in store_table['brand'].astype(str)],
+                                     dtype=np.int8)
+    arrays['store_name'] = store_table['name'].astype(str).to_numpy().astype(str)
+    arrays['store_lat'] = store_table['lat'].to_numpy(dtype=np.float64)
+    arrays['store_lng'] = store_table['lng'].to_numpy(dtype=np.float64)
+    arrays['store_dong'] = np.array([dong_pos.get(c, -1) for c in store_table['dong_code'].astype(str)],
+                                    dtype=np.int32)
+    return arrays
+
+
+def save_history(arrays, path):
+    np.savez_compressed(path, **arrays)
+
+
+# ─────────────────────────────────────────────
+# 읽기 (app.py) — 요청한 기간의 멤버만 압축 해제
+# ─────────────────────────────────────────────
+class History:
+    def __init__(self, path):
+        self.path = path
+        self._npz = np.load(path, allow_pickle=False)
+        self._lock = threading.Lock()
+        self._cache = {}
+        self.months = self._npz['months'].tolist()
+        self.metrics = self._npz['metrics'].tolist()
+        self.brands = self._npz['brands'].tolist()
+        self.dong_codes = self._npz['dong_codes']
+        self.dong_names = self._npz['dong_names']
+        self.keyframe_every = int(self._npz['keyframe_every'])
+        self.store_brand = self._npz['store_brand']
+
+    def close(self):
+        self._npz.close()
+
+    def _member(self, key):
+        """npz 멤버 하나 (한 번 읽은 배열은 보관, 여러 세션이 동시에 읽어도 안전)"""
+        with self._lock:
+            if key not in self._cache:
+                self._cache[key] = self._npz[key]
+            return self._cache[key]
+
+    def months_between(self, start, end):
+        return [m for m in self.months if start <= m <= end]
+
+    # ── 행정동 지표 ──
+    def dong_values(self, month):
+        """(행정동 × 지표) 배열"""
+        return self._member(f'dong_{month}')
+
+    def dong_panel(self, start, end, metric):
+        """행정동 × 월 DataFrame (기간 안의 월만 읽음)"""
+        j = self.metrics.index(metric)
+        months = self.months_between(start, end)
+        return pd.DataFrame({m: self.dong_values(m)[:, j] for m in months},
+                            index=pd.Index(self.dong_codes, name='dong_code'))
+
+    def growth(self, start, end, metric='monthly_sales'):
+        """시작·끝 월 두 개만 읽어 행정동별 증감 (시작 값이 0/NaN인 동은 증가율 NaN)"""
+        j = self.metrics.index(metric)
+        first, last = self.dong_values(start)[:, j], self.dong_values(end)[:, j]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rate = np.where(first > 0, (last - first) / first * 100, np.nan)
+        return pd.DataFrame({
+            'dong_code': self.dong_codes, 'dong_name': self.dong_names,
+            'start': first, 'end': last, 'change': last - first, 'growth_pct': rate,
+        })
+
+    # ── 매장 (keyframe + 변동분) ──
+    def _keyframe_month(self, month):
+        i = self.months.index(month)
+        return self.months[i - i % self.keyframe_every]
+
+    def active_stores(self, month):
+        """해당 월에 영업 중인 매장 번호 (가장 가까운 keyframe부터 변동분 적용)"""
+        key = self._keyframe_month(month)
+        active = set(self._member(f'key_{key}').tolist())
+        for m in self.months_between(key, month)[1:]:
+            active.difference_update(self._member(f'close_{m}').tolist())
+            active.update(self._member(f'open_{m}').tolist())
+        return np.array(sorted(active), dtype=np.int64)
+
+    def map_points(self, month):
+        """해당 월 매장 DataFrame (brand, name, lat, lng, dong_code)"""
+        ids = self.active_stores(month)
+        brands = np.array(self.brands + [''], dtype=object)     # -1(목록 밖 브랜드) → ''
+        dong = self._member('store_dong')[ids]
+        return pd.DataFrame({
+            'brand': brands[self.store_brand[ids]],
+            'name': self._member('store_name')[ids],
+            'lat': self._member('store_lat')[ids],
+            'lng': self._member('store_lng')[ids],
+            'dong_code': np.where(dong >= 0, self.dong_codes[np.maximum(dong, 0)], ''),
+        })
+
+    def store_flows(self, start, end):
+        """
+        월 × 브랜드 개점·폐점·매장 수 (start 이전 변동분은 keyframe부터만 읽음)
+        반환 컬럼: month, brand, opened, closed, stores
+        """
+        n_brand = len(self.brands)
+        months = self.months_between(start, end)
+        count = np.bincount(self.store_brand[self.active_stores(start)], minlength=n_brand)[:n_brand]
+        rows = []
+        for i, m in enumerate(months):
+            opened = np.bincount(self.store_brand[self._member(f'open_{m}')], minlength=n_brand)[:n_brand]
+            closed = np.bincount(self.store_brand[self._member(f'close_{m}')], minlength=n_brand)[:n_brand]
+            if i:
+                count = count + opened - closed
+            for b, brand in enumerate(self.brands):
+                rows.append((m, brand, int(opened[b]), int(closed[b]), int(count[b])))
+        return pd.DataFrame(rows, columns=['month', 'brand', 'opened', 'closed', 'stores'])
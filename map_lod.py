@@ -0,0 +1,93 @@
+"""
+지도 탭 LOD(Level of Detail) 처리
+
+매장 수가 많아지면 모든 점을 그릴 수 없으므로
+  - 줌 레벨별로 미리 계산한 브랜드별 격자 클러스터 (축소 화면)
+  - 뷰포트(bbox) 안의 개별 매장만 (확대 화면)
+중 하나를 골라 화면에 그리는 도형 수를 MAX_PRIMITIVES 이하로 유지합니다.
+index.html의 initMap()도 같은 규칙(CLUSTER_PX, DETAIL_ZOOM)을 사용합니다.
+"""
+
+import numpy as np
+import pandas as pd
+
+LOD_ZOOMS = range(6, 15)
+DETAIL_ZOOM = 14          # 이 줌 이상이면 항상 개별 매장 표시
+CLUSTER_PX = 64           # 클러스터 격자 한 칸의 화면 크기(px)
+TILE_PX = 256
+MAX_PRIMITIVES = 3000     # 개별 매장을 그릴 최대 개수 (넘으면 클러스터로 표시)
+
+
+def cell_deg(zoom):
+    """줌 레벨별 클러스터 격자 크기(경도 기준 도)"""
+    return 360.0 / (2 ** zoom) * CLUSTER_PX / TILE_PX
+
+
+def viewport_bbox(lat, lng, zoom, width_px=1200, height_px=600):
+    """화면 중심·줌·크기 → (min_lat, min_lng, max_lat, max_lng)"""
+    deg_per_px = 360.0 / (TILE_PX * 2 ** zoom)
+    half_w = width_px / 2 * deg_per_px
+    half_h = height_px / 2 * deg_per_px * np.cos(np.radians(lat))
+    return lat - half_h, lng - half_w, lat + half_h, lng + half_w
+
+
+def build_clusters(df_map, zoom):
+    """브랜드별 격자 클러스터: (brand, lat, lng, count) — 좌표는 셀 내 매장 평균"""
+    size = cell_deg(zoom)
+    cells = pd.DataFrame({
+        'brand': df_map['brand'].astype(str).to_numpy(),
+        'gx': np.floor(df_map['lng'].to_numpy() / size).astype(np.int64),
+        'gy': np.floor(df_map['lat'].to_numpy() / size).astype(np.int64),
+        'lat': df_map['lat'].to_numpy(),
+        'lng': df_map['lng'].to_numpy(),
+    })
+    out = (cells.groupby(['brand', 'gx', 'gy'], sort=False)
+           .agg(lat=('lat', 'mean'), lng=('lng', 'mean'), count=('lat', 'size'))
+           .reset_index()
+           .drop(columns=['gx', 'gy']))
+    return out
+
+
+class MapLOD:
+    def __init__(self, df_map, store_index):
+        self.df_map = df_map
+        self.index = store_index
+        self.extent = (df_map['lat'].min(), df_map['lng'].min(), df_map['lat'].max(), df_map['lng'].max())
+        # 줌별 클러스터는 생성 시 한 번만 계산
+        self.clusters = {z: build_clusters(df_map, z) for z in LOD_ZOOMS}
+
+    def view(self, lat, lng, zoom, brands, width_px=1200, height_px=600, levels=None):
+        """
+        현재 뷰포트에 그릴 데이터
+        levels: 표시할 포화 단계 (map_points saturation 컬럼, None이면 전체)
+        반환: ('points' | 'clusters', DataFrame) — DataFrame에는 툴팁용 label 컬럼 포함
+        """
+        return self.view_bbox(*viewport_bbox(lat, lng, zoom, width_px, height_px), zoom, brands, levels)
+
+    def view_bbox(self, min_lat, min_lng, max_lat, max_lng, zoom, brands, levels=None):
+        """위경도 사각형에 그릴 데이터 (view와 같은 규칙, api_server.py 지도 질의용)"""
+        # 매장이 있는 범위로 잘라 격자 인덱스가 빈 셀을 훑지 않게 함
+        min_lat, min_lng = max(min_lat, self.extent[0]), max(min_lng, self.extent[1])
+        max_lat, max_lng = min(max_lat, self.extent[2]), min(max_lng, self.extent[3])
+        brands = list(brands)
+        if min_lat > max_lat or min_lng > max_lng:
+            brands = []
+
+        idx = self.index.bbox(min_lat, min_lng, max_lat, max_lng, brands) if brands else []
+        filtered = levels is not None and 'saturation' in self.df_map.columns
+        if filtered:
+            idx = np.asarray(idx, dtype=np.int64)
+            idx = idx[self.df_map['saturation'].isin(levels).to_numpy()[idx]]
+        if zoom >= DETAIL_ZOOM or len(idx) <= MAX_PRIMITIVES:
+            points = self.df_map.iloc[idx[:MAX_PRIMITIVES]].copy()
+            points['label'] = points['name']
+            return 'points', points
+
+        z = min(max(int(zoom), LOD_ZOOMS.start), LOD_ZOOMS.stop - 1)
+        # 포화 단계로 거른 경우 미리 만든 클러스터를 쓸 수 없으므로 뷰포트 안 매장만 다시 묶음
+        c = build_clusters(self.df_map.iloc[idx], z) if filtered else self.clusters[z]
+        in_view = (c['brand'].isin(brands)
+                   & c['lat'].between(min_lat, max_lat) & c['lng'].between(min_lng, max_lng))
+        clusters = c[in_view].copy()
+        clusters['label'] = clusters['count'].map(lambda n: f"{n:,}개 매장")
+        return 'clusters', clusters
@@ -0,0 +1,111 @@
+"""
+브랜드 개요 탭 Plotly 차트
+
+차트 4개(브랜드별 매장 수 막대, 진출 행정동 파이, 상위 30개 동 누적 막대,
+연령대별 매출 막대)는 데이터 버전과 테마에만 의존합니다. app.py는
+build_overview_figures() 결과를 (데이터 버전, 테마) 키로 st.cache_resource에 두고
+모든 세션이 같은 Figure를 씁니다.
+
+JSON 문자열 대신 검증이 끝난 Figure를 공유하는 이유: st.plotly_chart는 dict를 받으면
+go.Figure로 다시 검증(차트당 수십 ms)하지만, Figure는 to_dict() 복사 후 바로 직렬화합니다.
+공유 Figure는 읽기 전용으로만 사용합니다.
+"""
+
+import plotly.graph_objects as go
+
+import perf_log
+
+OVERVIEW_CHARTS = ['brand_stores', 'brand_dongs', 'top30_dongs', 'age_sales']
+AGE_COLS = ["age_10", "age_20", "age_30", "age_40", "age_50", "age_60"]
+AGE_LABELS = ["10대", "20대", "30대", "40대", "50대", "60대+"]
+AGE_COLORS = ["#FF6B6B", "#FFE66D", "#4ECDC4", "#58a6ff", "#bc8cff", "#A8E6CF"]
+
+
+def brand_stores_bar(brands, brand_stats, brand_colors, layout, grid_style):
+    """브랜드별 총 매장 수"""
+    fig = go.Figure(go.Bar(
+        x=brands,
+        y=[brand_stats[b]["total_stores"] for b in brands],
+        marker_color=[brand_colors[b] for b in brands],
+        text=[brand_stats[b]["total_stores"] for b in brands],
+        textposition="outside",
+    ))
+    fig.update_layout(**layout, height=300)
+    fig.update_xaxes(**grid_style)
+    fig.update_yaxes(**grid_style)
+    return fig
+
+
+def brand_dongs_pie(brands, brand_stats, brand_colors, layout):
+    """브랜드별 진출 행정동 수"""
+    fig = go.Figure(go.Pie(
+        labels=brands,
+        values=[brand_stats[b]["dong_count"] for b in brands],
+        marker_colors=[brand_colors[b] for b in brands],
+        hole=0.45,
+        textinfo="label+percent",
+    ))
+    fig.update_layout(**layout, height=300,
+        legend=dict(orientation="h", y=-0.1),
+    )
+    return fig
+
+
+def top30_stacked_bar(df_dong, brands, brand_colors, layout, grid_style):
+    """총 브랜드 수 상위 30개 동의 브랜드별 매장 수 누적 막대"""
+    top30 = df_dong[df_dong["total_brand_count"] > 0].nlargest(30, "total_brand_count")
+    fig = go.Figure()
+    for brand in brands:
+        col = f"cnt_{brand}"
+        if col in top30.columns:
+            fig.add_trace(go.Bar(
+                name=brand,
+                x=top30["dong_name"],
+                y=top30[col],
+                marker_color=brand_colors[brand],
+            ))
+    fig.update_layout(
+        **layout, barmode="stack", height=350,
+        legend=dict(orientation="h", y=1.05),
+    )
+    fig.update_xaxes(tickangle=-40, **grid_style)
+    fig.update_yaxes(**grid_style)
+    return fig
+
+
+def age_sales_bar(age_totals, layout, grid_style):
+    """연령대별 총 매출 합계 (억원). age_totals: AGE_COLS 순서의 합계(원)"""
+    age_totals = [v / 1e8 for v in age_totals]
+    fig = go.Figure(go.Bar(
+        x=AGE_LABELS, y=age_totals,
+        marker_color=AGE_COLORS,
+        text=[f"{v:.0f}억" for v in age_totals],
+        textposition="outside",
+    ))
+    fig.update_layout(**layout, height=300)
+    fig.update_xaxes(**grid_style)
+    fig.update_yaxes(title="매출(억원)", **grid_style)
+    return fig
+
+
+def build_overview_figures(df_dong, brands, brand_stats, brand_colors, layout, grid_style, cube=None):
+    """
+    브랜드 개요 차트 전체 생성 (cube가 있으면 연령대 합계는 큐브의 서울 합계를 그대로 사용)
+    반환: ({차트 이름: Figure}, {차트 이름: 생성 시간 ms})
+    """
+    if cube is not None:
+        age_totals = cube.cell('city')[AGE_COLS].tolist()
+    else:
+        age_totals = [df_dong[c].sum() for c in AGE_COLS]
+    builders = {
+        'brand_stores': lambda: brand_stores_bar(brands, brand_stats, brand_colors, layout, grid_style),
+        'brand_dongs': lambda: brand_dongs_pie(brands, brand_stats, brand_colors, layout),
+        'top30_dongs': lambda: top30_stacked_bar(df_dong, brands, brand_colors, layout, grid_style),
+        'age_sales': lambda: age_sales_bar(age_totals, layout, grid_style),
+    }
+    figures, timings = {}, {}
+    for name in OVERVIEW_CHARTS:
+        with perf_log.timer(f'figure:{name}') as span:
+            figures[name] = builders[name]()
+        timings[name] = span.ms
+    return figures, timings
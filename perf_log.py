@@ -0,0 +1,195 @@
+"""
+실행 시간·메모리 계측 (JSON-lines)
+
+preprocess.py 단계와 app.py 탭 렌더링 구간을 timer()/timed()로 감싸면
+구간마다 한 줄씩 로그 파일에 기록합니다.
+  {"ts": 1718000000.1, "source": "app", "name": "tab:📊 브랜드 개요",
+   "ms": 84.2, "rss_mb": 412.5, "peak_rss_mb": 530.1, ...추가 필드}
+
+기본 경로는 .cache/perf/timings.jsonl 이며 환경 변수로 바꿀 수 있습니다.
+  PERF_LOG=/tmp/perf.jsonl   다른 파일에 기록
+  PERF_LOG=0                 파일 기록 끔 (프로세스 내 요약은 유지)
+로그 파일은 프로세스마다 한 번 열어 두고 이어 쓰며, MAX_LOG_BYTES를 넘으면
+timings.jsonl.1로 돌리고 새 파일을 시작합니다 (이전 파일은 한 벌만 보관).
+
+같은 프로세스에서 기록한 최근 구간은 메모리에도 보관해 summary()로
+p50/p95를 계산합니다 (app.py 사이드바 성능 패널: ?perf=1).
+"""
+
+import collections
+import contextlib
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows에는 resource 모듈이 없음
+    resource = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_LOG_PATH = os.path.join(BASE_DIR, '.cache', 'perf', 'timings.jsonl')
+RECENT_LIMIT = 5000         # 프로세스 내 요약용으로 보관할 최근 구간 수
+MAX_LOG_BYTES = 20 * 1024 * 1024
+
+_lock = threading.Lock()
+_recent = collections.deque(maxlen=RECENT_LIMIT)
+_log = {'path': None, 'file': None, 'bytes': 0}   # 열어 둔 로그 파일 (_lock 안에서만 사용)
+
+
+def log_path():
+    """기록할 파일 경로 (PERF_LOG=0 이면 None)"""
+    path = os.environ.get('PERF_LOG', DEFAULT_LOG_PATH)
+    return None if path in ('', '0', 'off') else path
+
+
+def peak_rss_mb():
+    """
+    프로세스 시작 이후 최대 메모리 사용량(MB, ru_maxrss). 측정할 수 없으면 None
+    줄어들지 않는 누적 최대값이라 구간별 사용량은 구간 전후 rss_mb() 차이로 봐야 합니다.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux는 KB, macOS는 byte 단위로 반환
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+
+def rss_mb():
+    """현재 상주 메모리(MB). /proc이 없는 환경에서는 None"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+
+
+def _round(value):
+    return None if value is None else round(value, 1)
+
+
+def _write_line(path, line):
+    """로그 파일에 한 줄 추가 — 경로가 바뀌면 다시 열고, MAX_LOG_BYTES를 넘으면 .1로 돌림"""
+    data = line.encode('utf-8')
+    if _log['file'] is not None and (_log['path'] != path or _log['bytes'] + len(data) > MAX_LOG_BYTES):
+        _log['file'].close()
+        _log['file'] = None
+    if _log['file'] is None:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if size + len(data) > MAX_LOG_BYTES and size:
+            os.replace(path, path + '.1')
+            size = 0
+        _log.update(path=path, file=open(path, 'ab', buffering=0), bytes=size)
+    _log['file'].write(data)
+    _log['bytes'] += len(data)
+
+
+def record(name, ms, source='app', **fields):
+    """구간 하나 기록 (파일 + 프로세스 내 버퍼)"""
+    entry = {
+        'ts': round(time.time(), 3),
+        'source': source,
+        'name': name,
+        'ms': round(ms, 3),
+        'rss_mb': _round(rss_mb()),
+        'peak_rss_mb': _round(peak_rss_mb()),
+        **fields,
+    }
+    path = log_path()
+    with _lock:
+        _recent.append(entry)
+        if path is not None:
+            try:
+                _write_line(path, json.dumps(entry, ensure_ascii=False, default=str) + '\n')
+            except OSError:
+                # 읽기 전용 배포 환경 등에서는 파일 기록만 건너뜀
+                pass
+    return entry
+
+
+class Span:
+    """진행 중인 계측 구간. stop()을 부르면 기록하고 ms를 채움"""
+
+    def __init__(self, name, source='app', **fields):
+        self.name = name
+        self.source = source
+        self.fields = fields
+        self.ms = None
+        self._t0 = time.perf_counter()
+
+    def stop(self, **fields):
+        if self.ms is None:
+            self.ms = (time.perf_counter() - self._t0) * 1000
+            record(self.name, self.ms, self.source, **{**self.fields, **fields})
+        return self.ms
+
+
+def start(name, source='app', **fields):
+    """with 블록으로 감싸기 어려운 긴 구간용 (끝에서 span.stop())"""
+    return Span(name, source, **fields)
+
+
+@contextlib.contextmanager
+def timer(name, source='app', **fields):
+    """
+    with timer('map:layers', rows=len(df)) as span:
+        ...
+    블록이 예외로 끝나도 기록하며 error 필드에 예외 이름을 남깁니다.
+    """
+    span = Span(name, source, **fields)
+    try:
+        yield span
+    except BaseException as err:
+        span.stop(error=type(err).__name__)
+        raise
+    span.stop()
+
+
+def timed(name=None, source='app', **fields):
+    """함수 전체를 계측하는 데코레이터 (이름 생략 시 함수 이름)"""
+    def decorator(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timer(label, source, **fields):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def recent(source=None, prefix=None):
+    """프로세스 내 버퍼의 구간 목록 (source·이름 접두어로 필터)"""
+    with _lock:
+        entries = list(_recent)
+    return [e for e in entries
+            if (source is None or e['source'] == source)
+            and (prefix is None or e['name'].startswith(prefix))]
+
+
+def summary(source=None, prefix=None):
+    """
+    이름별 횟수·p50·p95·최대 (ms)
+    반환: [{'name', 'n', 'p50_ms', 'p95_ms', 'max_ms'}, ...] (이름 순)
+    """
+    by_name = collections.defaultdict(list)
+    for e in recent(source, prefix):
+        by_name[e['name']].append(e['ms'])
+    rows = []
+    for name in sorted(by_name):
+        ms = np.asarray(by_name[name])
+        rows.append({
+            'name': name,
+            'n': len(ms),
+            'p50_ms': round(float(np.percentile(ms, 50)), 1),
+            'p95_ms': round(float(np.percentile(ms, 95)), 1),
+            'max_ms': round(float(ms.max()), 1),
+        })
+    return rows
@@ -1,129 +1,526 @@
 """
 카페 입지 분석 대시보드용 데이터 전처리 스크립트
 4개 CSV 파일을 읽어 대시보드에서 사용할 JSON 데이터를 생성합니다.
+
+사용법:
+    python preprocess.py                 # 기본 (CSV 전체를 한 번에 로딩)
+    python preprocess.py --stream        # 대용량 카페 CSV를 청크 단위로 스트리밍 로딩
+    python preprocess.py --stream --chunksize 100000
+    python preprocess.py --explain       # 단계별 캐시 적중/미적중만 확인
+    python preprocess.py --force         # 캐시 무시하고 전체 재계산
+    python preprocess.py --jobs 4        # 4개 CSV를 프로세스 풀에서 동시에 로딩
+    python preprocess.py --jobs 8 --shards 4   # 대용량 카페 CSV를 바이트 구간 4개로 나눠 병렬 파싱
+    python preprocess.py --format both   # dashboard_data.columnar.json(컬럼형)도 함께 저장
+    python preprocess.py --format sections   # dashboard_sections/ 섹션별 파일 + manifest (탭별 지연 로딩)
+    python preprocess.py --data-dir bench/1x --output-dir bench/1x/out   # 다른 입력·출력 폴더
+    python preprocess.py --history snapshots/   # snapshots/YYYYMM/ 월별 CSV → dashboard_history.npz
+    python preprocess.py --classify-brands      # 브랜드 컬럼 대신 사업장명으로 브랜드 분류 (brand_registry.py)
+    python preprocess.py --brand-registry brands.json   # 추적 브랜드·색상·별칭을 JSON 레지스트리로 지정
+
+입력 파일이 바뀌지 않은 단계는 .cache/preprocess/ 의 Parquet 캐시를 재사용합니다.
+단계별 소요 시간·메모리는 .cache/perf/timings.jsonl 에 JSON-lines로 기록됩니다 (perf_log.py).
 """
 
 import pandas as pd
+import numpy as np
+import argparse
+import contextlib
+import io
 import json
 import os
+import time
 import warnings
+from concurrent.futures import ProcessPoolExecutor
 warnings.filterwarnings('ignore')
 
+import pyarrow as pa
+
+import brand_registry
+import dashboard_payload
+import perf_log
+import stage_cache
+from brand_registry import REGISTRY_ENV, BrandRegistry
+from stage_cache import StageCache
+from dashboard_payload import COLUMNAR_FILENAME, MANIFEST_PATH, dump_columnar, dump_sections
+import density_grid
+import dong_cube
+import dong_polygons
+from density_grid import build_density_grid
+from dong_cube import CUBE_FILENAME, DongCube
+from dong_polygons import PolygonIndex, print_summary, validate_codes
+import saturation
+import spatial_index
+from saturation import DONG_COLUMNS, NEAREST_COLUMNS, WITHIN_COLUMNS, dong_summary, store_metrics
+from spatial_index import INDEX_FILENAME, StoreIndex
+import history
+from history import HISTORY_FILENAME, build_history, month_dirs, save_history
+
 # 데이터 경로 설정
-DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
-OUTPUT_DIR = os.path.dirname(__file__)
-
-BRANDS = ['더벤티', '매머드커피', '메가커피', '빽다방', '컴포즈커피']
-BRAND_COLS = [f'count_{b}' for b in BRANDS]
-
-# 브랜드별 색상
-BRAND_COLORS = {
-    '더벤티':    '#FF6B6B',
-    '매머드커피': '#4ECDC4',
-    '메가커피':  '#FFE66D',
-    '빽다방':    '#A8E6CF',
-    '컴포즈커피': '#C3A6FF',
+# (--data-dir / --output-dir 또는 PREPROCESS_DATA_DIR / PREPROCESS_OUTPUT_DIR 환경 변수로 변경)
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+DEFAULT_OUTPUT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def set_paths(data_dir=None, output_dir=None):
+    """
+    입력 CSV 폴더와 출력 폴더 지정 (None이면 기본 경로)
+    환경 변수에도 남겨 spawn 방식 작업 프로세스가 다시 import해도 같은 경로를 씁니다.
+    """
+    global DATA_DIR, OUTPUT_DIR, CACHE_DIR, BRAND_MASTER_CSV, ATTR_CSV, COORDS_CSV, BRAND_RAW_CSV
+    global OUTPUT_JSON, OUTPUT_COLUMNAR, OUTPUT_SECTIONS, OUTPUT_SPATIAL, OUTPUT_CUBE, OUTPUT_FORMATS
+    DATA_DIR = os.path.abspath(data_dir) if data_dir else DEFAULT_DATA_DIR
+    OUTPUT_DIR = os.path.abspath(output_dir) if output_dir else DEFAULT_OUTPUT_DIR
+    if data_dir:
+        os.environ['PREPROCESS_DATA_DIR'] = DATA_DIR
+    if output_dir:
+        os.environ['PREPROCESS_OUTPUT_DIR'] = OUTPUT_DIR
+    CACHE_DIR = os.path.join(OUTPUT_DIR, '.cache', 'preprocess')
+
+    BRAND_MASTER_CSV = os.path.join(DATA_DIR, 'brand_analysis_master.csv')
+    ATTR_CSV = os.path.join(DATA_DIR, 'seoul_dong_attractiveness.csv')
+    COORDS_CSV = os.path.join(DATA_DIR, 'seoul_caffee_data_with_coords.csv')
+    BRAND_RAW_CSV = os.path.join(DATA_DIR, 'seoul_caffee_data_with_brand.csv')
+    OUTPUT_JSON = os.path.join(OUTPUT_DIR, 'dashboard_data.json')
+    OUTPUT_COLUMNAR = os.path.join(OUTPUT_DIR, COLUMNAR_FILENAME)
+    OUTPUT_SECTIONS = os.path.join(OUTPUT_DIR, MANIFEST_PATH)
+    OUTPUT_SPATIAL = os.path.join(OUTPUT_DIR, INDEX_FILENAME)
+    OUTPUT_CUBE = os.path.join(OUTPUT_DIR, CUBE_FILENAME)
+    # --format별 저장 파일
+    OUTPUT_FORMATS = {
+        'json': [OUTPUT_JSON],
+        'columnar': [OUTPUT_COLUMNAR],
+        'both': [OUTPUT_JSON, OUTPUT_COLUMNAR],
+        'sections': [OUTPUT_SECTIONS],
+        'all': [OUTPUT_JSON, OUTPUT_COLUMNAR, OUTPUT_SECTIONS],
+    }
+
+
+set_paths(os.environ.get('PREPROCESS_DATA_DIR'), os.environ.get('PREPROCESS_OUTPUT_DIR'))
+
+CLASSIFY_ENV = 'PREPROCESS_CLASSIFY_BRANDS'
+
+
+def set_registry(path=None, classify=None):
+    """
+    브랜드 레지스트리 지정 → BRANDS(추적 브랜드) · BRAND_COLORS · 사업장명 분류기
+    classify=True면 CSV의 브랜드 컬럼 대신 사업장명으로 브랜드를 분류합니다.
+    (set_paths와 같이 환경 변수에도 남겨 spawn 작업 프로세스가 같은 설정을 씀)
+    """
+    global REGISTRY, BRANDS, BRAND_COLS, BRAND_COLORS, CLASSIFY_BRANDS
+    if path:
+        path = os.path.abspath(path)
+        os.environ[REGISTRY_ENV] = path
+    if classify is not None:
+        os.environ[CLASSIFY_ENV] = '1' if classify else '0'
+    REGISTRY = BrandRegistry.load(path)
+    BRANDS = REGISTRY.brands
+    BRAND_COLS = [f'count_{b}' for b in BRANDS]
+    BRAND_COLORS = REGISTRY.colors
+    CLASSIFY_BRANDS = os.environ.get(CLASSIFY_ENV) == '1'
+
+
+set_registry()
+
+# 스트리밍 로딩 설정 (대용량 카페 CSV)
+CHUNK_SIZE = 200_000
+# 청크마다 고정할 dtype (위경도는 필터링 후 float64로 변환 — 남는 행이 적어 줄여도 이득이 없고,
+# float32는 출력 좌표 · 포화 지표 거리를 비스트리밍 결과와 달라지게 함)
+CAFE_DTYPES = {
+    '행정동코드': str,
+    '사업장명': str,
+    '브랜드': 'category',
+    'latitude': str,
+    'longitude': str,
 }
 
-print("📂 데이터 로딩 중...")
+
+def stage_start():
+    """단계 시작 시각과 현재 RSS (print_stage_stats에 넘김)"""
+    return time.perf_counter(), perf_log.rss_mb()
+
+
+def print_stage_stats(start, name):
+    """
+    단계 소요 시간과 단계 전후 RSS 변화 출력 (perf_log에도 rss_delta_mb로 기록)
+    ru_maxrss는 프로세스 시작 이후 최대값이라 첫 대용량 단계 뒤로는 모든 단계에 같은 값이 찍히므로
+    단계별 값으로 쓰지 않고 '프로세스 최대'로만 표시합니다.
+    """
+    t0, rss0 = start
+    elapsed = time.perf_counter() - t0
+    rss1 = perf_log.rss_mb()
+    delta = None if rss0 is None or rss1 is None else round(rss1 - rss0, 1)
+    peak = perf_log.record(name, elapsed * 1000, source='preprocess', rss_delta_mb=delta)['peak_rss_mb']
+    stats = [f"⏱ {elapsed:.2f}s"]
+    if delta is not None:
+        stats.append(f"RSS {rss1:,.0f} MB ({delta:+,.0f} MB)")
+    if peak is not None:
+        stats.append(f"프로세스 최대 RSS {peak:,.0f} MB")
+    print(f"     ({', '.join(stats)})")
+
+
+def cafe_read_dtypes(usecols, compact):
+    """카페 CSV 읽기용 dtype (compact=False면 기본 로딩과 같은 결과가 되도록 문자열로 읽음)"""
+    if compact:
+        return {c: t for c, t in CAFE_DTYPES.items() if c in usecols}
+    return {c: str for c in usecols}
+
+
+def label_brands(df):
+    """--classify-brands이거나 CSV에 브랜드 컬럼이 없으면 사업장명으로 브랜드 분류"""
+    if CLASSIFY_BRANDS or '브랜드' not in df.columns:
+        df['브랜드'] = REGISTRY.classify(df['사업장명'])
+    return df
+
+
+def clean_cafe_chunk(chunk, compact):
+    """
+    청크에서 저가 브랜드 행만 남기고 형 변환
+    compact=True면 브랜드를 category로 줄입니다 (위경도는 어느 쪽이든 float64).
+    """
+    chunk = label_brands(chunk)
+    chunk = chunk[chunk['브랜드'].isin(BRANDS)]
+    # 필터링된 소량의 행에만 형 변환 적용
+    chunk['행정동코드'] = chunk['행정동코드'].astype(str).str.strip()
+    for col in ['latitude', 'longitude']:
+        if col in chunk.columns:
+            chunk[col] = pd.to_numeric(chunk[col], errors='coerce').astype('float64')
+    if compact:
+        chunk['브랜드'] = chunk['브랜드'].astype(pd.CategoricalDtype(BRANDS))
+    return chunk
+
+
+def read_cafe_csv_chunked(path, usecols, chunksize=CHUNK_SIZE):
+    """
+    대용량 카페 CSV를 청크 단위로 읽으면서 저가 브랜드(BRANDS) 행만 남깁니다.
+    최대 메모리는 파일 크기가 아니라 청크 크기 + 필터링 결과에 비례합니다.
+    반환: (필터링된 DataFrame, 전체 행 수)
+    """
+    dtypes = cafe_read_dtypes(usecols, compact=True)
+    try:
+        reader = pd.read_csv(
+            path,
+            encoding='utf-8-sig',
+            usecols=lambda c: c in usecols,
+            dtype=dtypes,
+            chunksize=chunksize,
+        )
+    except pd.errors.EmptyDataError:
+        # 0바이트 파일 (헤더도 없음)
+        reader = []
+    total_rows = 0
+    parts = []
+    for chunk in reader:
+        total_rows += len(chunk)
+        parts.append(clean_cafe_chunk(chunk, compact=True))
+    if not parts:
+        # 헤더만 있는 파일 등 청크가 하나도 없으면 같은 컬럼·dtype의 빈 결과
+        empty = pd.DataFrame({c: pd.Series(dtype=dtypes.get(c, str)) for c in CAFE_DTYPES if c in usecols})
+        parts.append(clean_cafe_chunk(empty, compact=True))
+
+    df = pd.concat(parts, ignore_index=True)
+    df['행정동코드'] = df['행정동코드'].astype('category')
+    return df, total_rows
+
+
+# ─────────────────────────────────────────────
+# 병렬 로딩 (프로세스 풀)
+# ─────────────────────────────────────────────
+def pack_frame(df):
+    """DataFrame → Arrow IPC 바이트 (프로세스 간에는 DataFrame 대신 컬럼 버퍼만 전달)"""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def unpack_frame(data):
+    return pa.ipc.open_stream(data).read_all().to_pandas()
+
+
+def shard_ranges(path, n_shards):
+    """
+    CSV 본문을 줄 경계에 맞춘 바이트 구간 n_shards개로 분할
+    (따옴표 안에 줄바꿈이 있는 CSV에는 사용할 수 없음)
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        f.readline()  # 헤더
+        bounds = [f.tell()]
+        for i in range(1, n_shards):
+            f.seek(max(size * i // n_shards, bounds[-1]))
+            f.readline()  # 다음 줄 시작으로 정렬
+            bounds.append(min(f.tell(), size))
+    bounds.append(size)
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+def _parse_shard(path, start, end, usecols, compact):
+    """프로세스 풀 작업: 바이트 구간 하나를 파싱·필터링해 (Arrow 바이트, 전체 행 수, 소요 시간) 반환"""
+    t0 = time.perf_counter()
+    with open(path, 'rb') as f:
+        header = f.readline()
+        f.seek(start)
+        body = f.read(end - start)
+    chunk = pd.read_csv(
+        io.BytesIO(header + body),
+        encoding='utf-8-sig',
+        usecols=lambda c: c in usecols,
+        dtype=cafe_read_dtypes(usecols, compact),
+    )
+    data = pack_frame(clean_cafe_chunk(chunk, compact))
+    return data, len(chunk), time.perf_counter() - t0
+
+
+def submit_shards(pool, path, usecols, n_shards, compact):
+    return [pool.submit(_parse_shard, path, start, end, usecols, compact)
+            for start, end in shard_ranges(path, n_shards)]
+
+
+def collect_shards(futures, compact):
+    """샤드 결과를 원래 순서대로 합침. 반환: (필터링된 DataFrame, 전체 행 수)"""
+    parts, total_rows, slowest = [], 0, 0.0
+    for fut in futures:
+        data, n_rows, elapsed = fut.result()
+        parts.append(unpack_frame(data))
+        total_rows += n_rows
+        slowest = max(slowest, elapsed)
+    print(f"     ({len(futures)}개 샤드 병렬 파싱, 가장 느린 샤드 {slowest:.2f}s)")
+    df = pd.concat(parts, ignore_index=True)
+    if compact:
+        df['브랜드'] = df['브랜드'].astype(pd.CategoricalDtype(BRANDS))
+        df['행정동코드'] = df['행정동코드'].astype('category')
+    return df, total_rows
+
+
+def _run_loader(loader, args, keep_result=True):
+    """
+    프로세스 풀 작업: 로더를 실행하고 (Arrow 바이트, 출력 로그) 반환
+    출력은 모아 두었다가 메인 프로세스에서 순서대로 찍습니다.
+    """
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        df = loader(*args)
+    return (pack_frame(df) if keep_result else None), log.getvalue()
+
+
+def collect_loader(future):
+    data, log = future.result()
+    print(log, end='')
+    return unpack_frame(data) if data is not None else None
+
 
 # ─────────────────────────────────────────────
 # 1. brand_analysis_master.csv 로드
 # ─────────────────────────────────────────────
-print("  [1/4] brand_analysis_master.csv 로딩...")
-df_brand = pd.read_csv(
-    os.path.join(DATA_DIR, 'brand_analysis_master.csv'),
-    encoding='utf-8-sig'
-)
-
-# 행정동코드를 문자열로 통일
-df_brand['행정동코드'] = df_brand['행정동코드'].astype(str).str.strip()
-
-# 숫자형 변환
-brand_cols_numeric = BRAND_COLS + ['total_workers', 'female_workers',
-    '당월_매출_금액', '남성_매출_금액', '여성_매출_금액',
-    '연령대_10_매출_금액', '연령대_20_매출_금액', '연령대_30_매출_금액',
-    '연령대_40_매출_금액', '연령대_50_매출_금액', '연령대_60_이상_매출_금액']
-for col in brand_cols_numeric:
-    if col in df_brand.columns:
-        df_brand[col] = pd.to_numeric(df_brand[col], errors='coerce')
-
-# 행정동코드별 집계 (브랜드 카운트는 max, 매출은 sum)
-agg_dict = {}
-for col in BRAND_COLS:
-    if col in df_brand.columns:
-        agg_dict[col] = 'max'
-for col in ['total_workers', 'female_workers']:
-    if col in df_brand.columns:
-        agg_dict[col] = 'max'
-for col in ['당월_매출_금액', '남성_매출_금액', '여성_매출_금액',
-            '연령대_10_매출_금액', '연령대_20_매출_금액', '연령대_30_매출_금액',
-            '연령대_40_매출_금액', '연령대_50_매출_금액', '연령대_60_이상_매출_금액']:
-    if col in df_brand.columns:
-        agg_dict[col] = 'sum'
-
-df_brand_agg = df_brand.groupby(['행정동코드', '행정동_코드_명'], as_index=False).agg(agg_dict)
-print(f"     → {len(df_brand_agg)}개 행정동")
+def load_brand_master():
+    start = stage_start()
+    print("  [1/4] brand_analysis_master.csv 로딩...")
+    df_brand = pd.read_csv(
+        BRAND_MASTER_CSV,
+        encoding='utf-8-sig'
+    )
+
+    # 행정동코드를 문자열로 통일
+    df_brand['행정동코드'] = df_brand['행정동코드'].astype(str).str.strip()
+
+    # 숫자형 변환
+    brand_cols_numeric = BRAND_COLS + ['total_workers', 'female_workers',
+        '당월_매출_금액', '남성_매출_금액', '여성_매출_금액',
+        '연령대_10_매출_금액', '연령대_20_매출_금액', '연령대_30_매출_금액',
+        '연령대_40_매출_금액', '연령대_50_매출_금액', '연령대_60_이상_매출_금액']
+    for col in brand_cols_numeric:
+        if col in df_brand.columns:
+            df_brand[col] = pd.to_numeric(df_brand[col], errors='coerce')
+
+    # 행정동코드별 집계 (브랜드 카운트는 max, 매출은 sum)
+    agg_dict = {}
+    for col in BRAND_COLS:
+        if col in df_brand.columns:
+            agg_dict[col] = 'max'
+    for col in ['total_workers', 'female_workers']:
+        if col in df_brand.columns:
+            agg_dict[col] = 'max'
+    for col in ['당월_매출_금액', '남성_매출_금액', '여성_매출_금액',
+                '연령대_10_매출_금액', '연령대_20_매출_금액', '연령대_30_매출_금액',
+                '연령대_40_매출_금액', '연령대_50_매출_금액', '연령대_60_이상_매출_금액']:
+        if col in df_brand.columns:
+            agg_dict[col] = 'sum'
+
+    df_brand_agg = df_brand.groupby(['행정동코드', '행정동_코드_명'], as_index=False).agg(agg_dict)
+    print(f"     → {len(df_brand_agg)}개 행정동")
+    print_stage_stats(start, 'load_brand_master')
+    return df_brand_agg
+
 
 # ─────────────────────────────────────────────
 # 2. seoul_dong_attractiveness.csv 로드 (업데이트된 컬럼명)
 # ─────────────────────────────────────────────
-print("  [2/4] seoul_dong_attractiveness.csv 로딩...")
-df_attr = pd.read_csv(
-    os.path.join(DATA_DIR, 'seoul_dong_attractiveness.csv'),
-    encoding='utf-8-sig'
-)
-# 컬럼명 확인 후 행정동_코드 컬럼 사용 (10자리)
-print(f"     컬럼: {list(df_attr.columns)}")
-df_attr['행정동_코드'] = df_attr['행정동_코드'].astype(str).str.strip()
-print(f"     → {len(df_attr)}개 행정동")
+def load_attractiveness():
+    start = stage_start()
+    print("  [2/4] seoul_dong_attractiveness.csv 로딩...")
+    df_attr = pd.read_csv(
+        ATTR_CSV,
+        encoding='utf-8-sig'
+    )
+    # 컬럼명 확인 후 행정동_코드 컬럼 사용 (10자리)
+    print(f"     컬럼: {list(df_attr.columns)}")
+    df_attr['행정동_코드'] = df_attr['행정동_코드'].astype(str).str.strip()
+    print(f"     → {len(df_attr)}개 행정동")
+    print_stage_stats(start, 'load_attractiveness')
+    return df_attr
+
 
 # ─────────────────────────────────────────────
 # 3. seoul_caffee_data_with_coords.csv 로드 (좌표 데이터)
 # ─────────────────────────────────────────────
-print("  [3/4] seoul_caffee_data_with_coords.csv 로딩 (대용량)...")
-df_coords = pd.read_csv(
-    os.path.join(DATA_DIR, 'seoul_caffee_data_with_coords.csv'),
-    encoding='utf-8-sig',
-    usecols=lambda c: c in ['행정동코드', '사업장명', '브랜드', 'latitude', 'longitude']
-)
-df_coords['행정동코드'] = df_coords['행정동코드'].astype(str).str.strip()
-df_coords['latitude'] = pd.to_numeric(df_coords['latitude'], errors='coerce')
-df_coords['longitude'] = pd.to_numeric(df_coords['longitude'], errors='coerce')
-
-# 저가 브랜드만 필터링
-df_target = df_coords[df_coords['브랜드'].isin(BRANDS)].dropna(subset=['latitude', 'longitude'])
-print(f"     → 전체 카페: {len(df_coords):,}개, 저가 브랜드: {len(df_target):,}개")
+COORDS_USECOLS = ['행정동코드', '사업장명', '브랜드', 'latitude', 'longitude']
+
+def load_coords(stream=False, chunksize=CHUNK_SIZE, shards=None):
+    """
+    저가 브랜드 매장 좌표(df_target) 반환
+    shards: submit_shards()로 미리 제출한 바이트 구간 파싱 작업 목록
+    """
+    start = stage_start()
+    print("  [3/4] seoul_caffee_data_with_coords.csv 로딩 (대용량)...")
+    path = COORDS_CSV
+    usecols = COORDS_USECOLS
+
+    if shards:
+        df_target, total_rows = collect_shards(shards, compact=stream)
+        df_target = df_target.dropna(subset=['latitude', 'longitude'])
+    elif stream:
+        df_target, total_rows = read_cafe_csv_chunked(path, usecols, chunksize)
+        df_target = df_target.dropna(subset=['latitude', 'longitude'])
+    else:
+        df_coords = pd.read_csv(
+            path,
+            encoding='utf-8-sig',
+            usecols=lambda c: c in usecols
+        )
+        df_coords = label_brands(df_coords)
+        df_coords['행정동코드'] = df_coords['행정동코드'].astype(str).str.strip()
+        df_coords['latitude'] = pd.to_numeric(df_coords['latitude'], errors='coerce')
+        df_coords['longitude'] = pd.to_numeric(df_coords['longitude'], errors='coerce')
+        total_rows = len(df_coords)
+
+        # 저가 브랜드만 필터링
+        df_target = df_coords[df_coords['브랜드'].isin(BRANDS)].dropna(subset=['latitude', 'longitude'])
+
+    print(f"     → 전체 카페: {total_rows:,}개, 저가 브랜드: {len(df_target):,}개"
+          + (" (사업장명으로 분류)" if CLASSIFY_BRANDS else ""))
+    print_stage_stats(start, 'load_coords')
+    return df_target
+
+
+def load_dong_centers(chunksize=CHUNK_SIZE):
+    """
+    행정동별 중심 좌표 (전체 카페 좌표 평균) — site_scoring.py가 경계 파일 없이 후보 좌표의 행정동을 정할 때 사용
+    저가 브랜드 매장이 없는 행정동도 포함되도록 브랜드 필터 전의 모든 카페를 씁니다 (좌표 3개 컬럼만 청크 단위로 읽음).
+    반환: 행정동코드, center_lat, center_lng
+    """
+    start = stage_start()
+    print("  🧭 행정동 중심 좌표 집계 (전체 카페 좌표 평균)...")
+    sums = []
+    for chunk in pd.read_csv(COORDS_CSV, encoding='utf-8-sig', usecols=['행정동코드', 'latitude', 'longitude'],
+                             dtype=str, chunksize=chunksize):
+        chunk = pd.DataFrame({
+            '행정동코드': chunk['행정동코드'].str.strip(),
+            'latitude': pd.to_numeric(chunk['latitude'], errors='coerce'),
+            'longitude': pd.to_numeric(chunk['longitude'], errors='coerce'),
+        }).dropna()
+        sums.append(chunk.groupby('행정동코드').agg(lat=('latitude', 'sum'), lng=('longitude', 'sum'),
+                                                  n=('latitude', 'size')))
+    total = pd.concat(sums).groupby(level=0).sum() if sums else pd.DataFrame(columns=['lat', 'lng', 'n'])
+    centers = pd.DataFrame({
+        '행정동코드': total.index.astype(str),
+        'center_lat': (total['lat'] / total['n']).round(6).to_numpy(dtype=np.float64),
+        'center_lng': (total['lng'] / total['n']).round(6).to_numpy(dtype=np.float64),
+    })
+    print(f"     → 행정동 {len(centers):,}개")
+    print_stage_stats(start, 'load_dong_centers')
+    return centers
+
 
 # ─────────────────────────────────────────────
 # 4. seoul_caffee_data_with_brand.csv 로드
 # ─────────────────────────────────────────────
-print("  [4/4] seoul_caffee_data_with_brand.csv 로딩 (대용량)...")
-df_brand_raw = pd.read_csv(
-    os.path.join(DATA_DIR, 'seoul_caffee_data_with_brand.csv'),
-    encoding='utf-8-sig',
-    usecols=lambda c: c in ['행정동코드', '사업장명', '브랜드']
-)
-df_brand_raw['행정동코드'] = df_brand_raw['행정동코드'].astype(str).str.strip()
-print(f"     → {len(df_brand_raw):,}개 카페")
+BRAND_RAW_USECOLS = ['행정동코드', '사업장명', '브랜드']
+
+def load_brand_raw(stream=False, chunksize=CHUNK_SIZE, shards=None):
+    """
+    브랜드 라벨이 붙은 전체 카페 목록 로드
+    스트리밍/샤드 모드에서는 저가 브랜드 행만 메모리에 남깁니다.
+    """
+    start = stage_start()
+    print("  [4/4] seoul_caffee_data_with_brand.csv 로딩 (대용량)...")
+    path = BRAND_RAW_CSV
+    usecols = BRAND_RAW_USECOLS
+
+    if shards:
+        df_brand_raw, total_rows = collect_shards(shards, compact=stream)
+    elif stream:
+        df_brand_raw, total_rows = read_cafe_csv_chunked(path, usecols, chunksize)
+    else:
+        df_brand_raw = pd.read_csv(
+            path,
+            encoding='utf-8-sig',
+            usecols=lambda c: c in usecols
+        )
+        df_brand_raw = label_brands(df_brand_raw)
+        df_brand_raw['행정동코드'] = df_brand_raw['행정동코드'].astype(str).str.strip()
+        total_rows = len(df_brand_raw)
+
+    print(f"     → {total_rows:,}개 카페")
+    print_stage_stats(start, 'load_brand_raw')
+    return df_brand_raw
+
+
+# ─────────────────────────────────────────────
+# (선택) 행정동 경계 폴리곤으로 매장 행정동코드 검증
+# ─────────────────────────────────────────────
+def check_dong_codes(df_target, boundaries_path, reassign=False):
+    """
+    매장 좌표가 실제로 속한 행정동(경계 폴리곤 기준)과 CSV의 행정동코드 비교
+    reassign=True면 경계 안에 있는 매장의 행정동코드를 경계 기준으로 교체
+    """
+    start = stage_start()
+    print(f"\n🧭 행정동 경계 검증 ({os.path.basename(boundaries_path)})...")
+    index = PolygonIndex.from_geojson(boundaries_path)
+    print(f"     경계 폴리곤 {index.n_poly:,}개, 간선 {index.n_edges:,}개")
+
+    codes = df_target['행정동코드'].astype(str).to_numpy()
+    assigned, summary = validate_codes(
+        index, df_target['latitude'].to_numpy(), df_target['longitude'].to_numpy(), codes)
+    print_summary(summary)
+
+    if reassign:
+        df_target = df_target.copy()
+        df_target['행정동코드'] = np.where(assigned != '', assigned, codes)
+        print(f"     → 경계 기준으로 {summary['mismatched']:,}개 매장의 행정동코드 교체")
+    print_stage_stats(start, 'check_dong_codes')
+    return df_target
+
 
 # ─────────────────────────────────────────────
 # 데이터 병합 (행정동코드 직접 매칭)
 # ─────────────────────────────────────────────
-print("\n🔗 데이터 병합 중...")
+def merge_data(df_brand_agg, df_attr):
+    print("\n🔗 데이터 병합 중...")
+
+    df_merged = df_brand_agg.merge(
+        df_attr.rename(columns={'행정동_코드': '행정동코드'}),
+        on='행정동코드',
+        how='left'
+    )
+    matched = df_merged['매력도점수'].notna().sum()
+    print(f"  병합 결과: {len(df_merged)}개 행정동, 매력도 매칭: {matched}개")
+    return df_merged
 
-df_merged = df_brand_agg.merge(
-    df_attr.rename(columns={'행정동_코드': '행정동코드'}),
-    on='행정동코드',
-    how='left'
-)
-matched = df_merged['매력도점수'].notna().sum()
-print(f"  병합 결과: {len(df_merged)}개 행정동, 매력도 매칭: {matched}개")
 
 # ─────────────────────────────────────────────
 # JSON 데이터 생성
 # ─────────────────────────────────────────────
-print("\n📊 JSON 데이터 생성 중...")
 
 # 컬럼명 매핑 (한국어 → 영어 키)
 COL_MAP = {
@@ -151,113 +548,473 @@ def safe_int(val):
     except:
         return 0
 
-# 1) 행정동별 브랜드 현황 + 매력도 점수
-dong_data = []
-for _, row in df_merged.iterrows():
-    brand_counts = {}
-    total_brand = 0
-    for brand, col in zip(BRANDS, BRAND_COLS):
-        cnt = safe_int(row.get(col, 0))
-        brand_counts[brand] = cnt
-        total_brand += cnt
-
-    dong_data.append({
-        'dong_code': str(row['행정동코드']),
-        'dong_name': str(row['행정동_코드_명']),
-        'brands': brand_counts,
-        'total_brand_count': total_brand,
-        'total_workers': safe_int(row.get('total_workers')),
-        'female_workers': safe_int(row.get('female_workers')),
-        'monthly_sales': safe_float(row.get('당월_매출_금액')) or 0,
-        'male_sales': safe_float(row.get('남성_매출_금액')) or 0,
-        'female_sales': safe_float(row.get('여성_매출_금액')) or 0,
-        'age_10': safe_float(row.get('연령대_10_매출_금액')) or 0,
-        'age_20': safe_float(row.get('연령대_20_매출_금액')) or 0,
-        'age_30': safe_float(row.get('연령대_30_매출_금액')) or 0,
-        'age_40': safe_float(row.get('연령대_40_매출_금액')) or 0,
-        'age_50': safe_float(row.get('연령대_50_매출_금액')) or 0,
-        'age_60': safe_float(row.get('연령대_60_이상_매출_금액')) or 0,
-        'attractiveness_score': safe_float(row.get('매력도점수')),
-        'demand_score': safe_float(row.get('수요점수')),
-        'competition_score': safe_float(row.get('경쟁점수')),
-        'cost_score': safe_float(row.get('비용점수')),
-        'cafe_count': safe_int(row.get('카페_수')),
-        'avg_price_per_m2': safe_float(row.get('m²당_평균_가격')) or 0,
+
+# 컬럼 단위 변환 (safe_float / safe_int와 동일한 결과를 전체 컬럼에 한 번에 적용)
+def _numeric(df, col):
+    """컬럼을 float64 Series로 변환 (컬럼이 없으면 전부 NaN)"""
+    if col in df.columns:
+        return pd.to_numeric(df[col], errors='coerce').astype('float64')
+    return pd.Series(np.nan, index=df.index)
+
+def col_float(df, col):
+    """safe_float: NaN → None"""
+    s = _numeric(df, col)
+    out = s.to_numpy(dtype=object)
+    out[s.isna().to_numpy()] = None
+    return out.tolist()
+
+def col_float_or_zero(df, col):
+    """safe_float(...) or 0: NaN/0.0 → 0 (int)"""
+    s = _numeric(df, col)
+    out = s.to_numpy(dtype=object)
+    out[(s.isna() | (s == 0)).to_numpy()] = 0
+    return out.tolist()
+
+def col_int_array(df, col):
+    """safe_int: NaN/inf → 0, 나머지는 0 방향으로 절사"""
+    v = _numeric(df, col).to_numpy(copy=True)
+    v[~np.isfinite(v)] = 0
+    return np.trunc(v).astype(np.int64)
+
+def col_str(df, col):
+    return list(map(str, df[col].tolist()))
+
+def build_records(columns):
+    """{키: 값 리스트} → 레코드(dict) 리스트"""
+    keys = list(columns)
+    return [dict(zip(keys, vals)) for vals in zip(*columns.values())]
+
+
+def build_output(df_merged, df_target, df_centers=None):
+    """
+    대시보드 JSON 구조 생성. 반환: (output dict, 전체 입지 추천 후보 수)
+    df_centers: load_dong_centers() 결과 (없으면 dong_data에 중심 좌표를 넣지 않음)
+    """
+    print("\n📊 JSON 데이터 생성 중...")
+
+    # 레지스트리에 새로 추적하는 브랜드는 마스터 CSV에 count 컬럼이 없으므로 매장 좌표로 집계
+    missing = [b for b in BRANDS if f'count_{b}' not in df_merged.columns]
+    if missing:
+        counts = pd.crosstab(df_target['행정동코드'].astype(str), df_target['브랜드'].astype(str))
+        codes = df_merged['행정동코드'].astype(str)
+        df_merged = df_merged.assign(**{
+            f'count_{b}': codes.map(counts[b]).fillna(0) if b in counts.columns else 0 for b in missing})
+        print(f"  매장 좌표로 행정동별 매장 수 집계: {', '.join(missing)}")
+
+    # 매장별 경쟁·포화 지표 (격자 인덱스 전체 질의, map_points 컬럼 + 행정동 요약)
+    brand_codes = pd.Categorical(col_str(df_target, '브랜드'), categories=BRANDS).codes
+    t0 = time.perf_counter()
+    metrics = store_metrics(df_target['latitude'].to_numpy(), df_target['longitude'].to_numpy(),
+                            brand_codes, BRANDS)
+    dong_sat = dong_summary(metrics, col_str(df_target, '행정동코드')).reindex(col_str(df_merged, '행정동코드'))
+    centers = {}
+    if df_centers is not None:
+        by_code = df_centers.assign(행정동코드=col_str(df_centers, '행정동코드')).set_index('행정동코드')
+        by_code = by_code.reindex(col_str(df_merged, '행정동코드'))
+        centers = {col: col_float(by_code, col) for col in ['center_lat', 'center_lng']}
+    print(f"  매장별 경쟁·포화 지표: {len(metrics):,}개 매장, {time.perf_counter() - t0:.2f}s")
+
+    # 1) 행정동별 브랜드 현황 + 매력도 점수
+    brand_counts = np.column_stack([col_int_array(df_merged, col) for col in BRAND_COLS])
+    brand_dicts = [dict(zip(BRANDS, row)) for row in brand_counts.tolist()]
+
+    dong_data = build_records({
+        'dong_code': col_str(df_merged, '행정동코드'),
+        'dong_name': col_str(df_merged, '행정동_코드_명'),
+        'brands': brand_dicts,
+        'total_brand_count': brand_counts.sum(axis=1).tolist(),
+        'total_workers': col_int_array(df_merged, 'total_workers').tolist(),
+        'female_workers': col_int_array(df_merged, 'female_workers').tolist(),
+        'monthly_sales': col_float_or_zero(df_merged, '당월_매출_금액'),
+        'male_sales': col_float_or_zero(df_merged, '남성_매출_금액'),
+        'female_sales': col_float_or_zero(df_merged, '여성_매출_금액'),
+        'age_10': col_float_or_zero(df_merged, '연령대_10_매출_금액'),
+        'age_20': col_float_or_zero(df_merged, '연령대_20_매출_금액'),
+        'age_30': col_float_or_zero(df_merged, '연령대_30_매출_금액'),
+        'age_40': col_float_or_zero(df_merged, '연령대_40_매출_금액'),
+        'age_50': col_float_or_zero(df_merged, '연령대_50_매출_금액'),
+        'age_60': col_float_or_zero(df_merged, '연령대_60_이상_매출_금액'),
+        'attractiveness_score': col_float(df_merged, '매력도점수'),
+        'demand_score': col_float(df_merged, '수요점수'),
+        'competition_score': col_float(df_merged, '경쟁점수'),
+        'cost_score': col_float(df_merged, '비용점수'),
+        'cafe_count': col_int_array(df_merged, '카페_수').tolist(),
+        'avg_price_per_m2': col_float_or_zero(df_merged, 'm²당_평균_가격'),
+        **{col: col_float(dong_sat, col) for col in DONG_COLUMNS},
+        **centers,
     })
 
-# 2) 저가 브랜드 카페 좌표 데이터 (지도용)
-map_points = []
-for _, row in df_target.iterrows():
-    map_points.append({
-        'brand': str(row['브랜드']),
-        'name': str(row['사업장명']),
-        'lat': float(row['latitude']),
-        'lng': float(row['longitude']),
-        'dong_code': str(row['행정동코드']),
+    # 2) 저가 브랜드 카페 좌표 데이터 (지도용) + 매장별 경쟁·포화 지표
+    map_points = build_records({
+        'brand': col_str(df_target, '브랜드'),
+        'name': col_str(df_target, '사업장명'),
+        'lat': df_target['latitude'].astype('float64').tolist(),
+        'lng': df_target['longitude'].astype('float64').tolist(),
+        'dong_code': col_str(df_target, '행정동코드'),
+        **{col: col_float(metrics, col) for col in NEAREST_COLUMNS},
+        **{col: metrics[col].tolist() for col in WITHIN_COLUMNS},
+        'saturation': metrics['saturation'].tolist(),
     })
 
-# 3) 브랜드별 통계
-brand_stats = {}
-for brand in BRANDS:
-    col = f'count_{brand}'
-    total_stores = safe_int(df_merged[col].sum()) if col in df_merged.columns else 0
-
-    # 해당 브랜드가 있는 행정동의 매출 합계 / 총 매장 수 → 점포당 평균 월매출
-    brand_dongs = df_merged[df_merged[col] > 0] if col in df_merged.columns else pd.DataFrame()
-    total_sales_for_brand = brand_dongs['당월_매출_금액'].sum() if '당월_매출_금액' in brand_dongs.columns else 0
-    avg_monthly_sales = int(total_sales_for_brand / total_stores / 1e4) if total_stores > 0 else 0  # 만원 단위
-
-    brand_stats[brand] = {
-        'color': BRAND_COLORS[brand],
-        'total_stores': total_stores,
-        'dong_count': int((df_merged[col] > 0).sum()) if col in df_merged.columns else 0,
-        'map_count': int((df_target['브랜드'] == brand).sum()),
-        'avg_monthly_sales': avg_monthly_sales,  # 점포당 평균 월매출 (만원)
+    # 3) 브랜드별 통계
+    brand_stats = {}
+    for brand in BRANDS:
+        col = f'count_{brand}'
+        total_stores = safe_int(df_merged[col].sum()) if col in df_merged.columns else 0
+
+        # 해당 브랜드가 있는 행정동의 매출 합계 / 총 매장 수 → 점포당 평균 월매출
+        brand_dongs = df_merged[df_merged[col] > 0] if col in df_merged.columns else pd.DataFrame()
+        total_sales_for_brand = brand_dongs['당월_매출_금액'].sum() if '당월_매출_금액' in brand_dongs.columns else 0
+        avg_monthly_sales = int(total_sales_for_brand / total_stores / 1e4) if total_stores > 0 else 0  # 만원 단위
+
+        brand_stats[brand] = {
+            'color': BRAND_COLORS[brand],
+            'total_stores': total_stores,
+            'dong_count': int((df_merged[col] > 0).sum()) if col in df_merged.columns else 0,
+            'map_count': int((df_target['브랜드'] == brand).sum()),
+            'avg_monthly_sales': avg_monthly_sales,  # 점포당 평균 월매출 (만원)
+        }
+
+
+    # 4) 입지 추천: 매력도 점수 있는 동 중 해당 브랜드 없는 곳
+    #    (동 순서 → 브랜드 순서로 후보를 만들고 매력도 내림차순 안정 정렬)
+    scores = _numeric(df_merged, '매력도점수').to_numpy()
+    dong_idx, brand_idx = np.nonzero(~np.isnan(scores)[:, None] & (brand_counts == 0))
+    order = np.argsort(-scores[dong_idx], kind='stable')
+
+    recommend_data = []
+    for i, b in zip(dong_idx[order[:200]].tolist(), brand_idx[order[:200]].tolist()):
+        d = dong_data[i]
+        recommend_data.append({
+            'dong_name': d['dong_name'],
+            'dong_code': d['dong_code'],
+            'brand': BRANDS[b],
+            'attractiveness_score': d['attractiveness_score'],
+            'demand_score': d['demand_score'],
+            'competition_score': d['competition_score'],
+            'cost_score': d['cost_score'],
+            'total_workers': d['total_workers'],
+            'monthly_sales': d['monthly_sales'],
+            'cafe_count': d['cafe_count'],
+        })
+
+    output = {
+        'brands': BRANDS,
+        'brand_colors': BRAND_COLORS,
+        'brand_stats': brand_stats,
+        'dong_data': dong_data,
+        'map_points': map_points,
+        'recommend_top': recommend_data,
+        # 5) 격자 셀별 브랜드 매장 수 (행정동보다 세밀한 밀도, 원본 좌표 없이 지도 표시)
+        'density_grid': build_density_grid(
+            df_target['latitude'].to_numpy(), df_target['longitude'].to_numpy(),
+            brand_codes, BRANDS),
     }
+    return output, len(dong_idx)
 
 
-# 4) 입지 추천: 매력도 점수 있는 동 중 해당 브랜드 없는 곳
-recommend_data = []
-for d in dong_data:
-    if d['attractiveness_score'] is not None:
-        for brand in BRANDS:
-            if d['brands'].get(brand, 0) == 0:
-                recommend_data.append({
-                    'dong_name': d['dong_name'],
-                    'dong_code': d['dong_code'],
-                    'brand': brand,
-                    'attractiveness_score': d['attractiveness_score'],
-                    'demand_score': d['demand_score'],
-                    'competition_score': d['competition_score'],
-                    'cost_score': d['cost_score'],
-                    'total_workers': d['total_workers'],
-                    'monthly_sales': d['monthly_sales'],
-                    'cafe_count': d['cafe_count'],
-                })
-
-recommend_data.sort(key=lambda x: x['attractiveness_score'], reverse=True)
-
 # ─────────────────────────────────────────────
 # JSON 저장
 # ─────────────────────────────────────────────
-print("\n💾 JSON 파일 저장 중...")
-
-output = {
-    'brands': BRANDS,
-    'brand_colors': BRAND_COLORS,
-    'brand_stats': brand_stats,
-    'dong_data': dong_data,
-    'map_points': map_points,
-    'recommend_top': recommend_data[:200],
-}
+def save_output(output, n_recommend, fmt='json'):
+    print("\n💾 JSON 파일 저장 중...")
+
+    for out_path in OUTPUT_FORMATS[fmt]:
+        if out_path == OUTPUT_COLUMNAR:
+            # 컬럼형: 키 반복 없이 컬럼 배열 + 브랜드/행정동코드 사전 인코딩
+            dump_columnar(output, out_path)
+        elif out_path == OUTPUT_SECTIONS:
+            # 섹션 분할: 섹션별 파일을 먼저 쓰고 manifest를 마지막에 저장
+            manifest = dump_sections(output, os.path.dirname(out_path))
+            sizes = ', '.join(f"{name} {entry['bytes'] / 1024 / 1024:.1f}"
+                              for name, entry in manifest['sections'].items())
+            print(f"  ✅ {MANIFEST_PATH} 저장 완료 (섹션 MB: {sizes})")
+            continue
+        else:
+            with open(out_path, 'w', encoding='utf-8') as f:
+                json.dump(output, f, ensure_ascii=False, indent=2)
+
+        file_size = os.path.getsize(out_path) / 1024 / 1024
+        print(f"  ✅ {os.path.basename(out_path)} 저장 완료 ({file_size:.1f} MB)")
+    print(f"     - 행정동 수: {len(output['dong_data'])}")
+    print(f"     - 지도 포인트 수: {len(output['map_points']):,}")
+    print(f"     - 밀도 격자 셀 수: {len(output['density_grid']['gx']):,}")
+    print(f"     - 입지 추천 후보: {n_recommend:,}")
+
+
+def save_spatial_index(df_target):
+    """저가 브랜드 매장 공간 인덱스 저장 (반경·kNN·bbox 질의용, app.py에서 사용)"""
+    index = StoreIndex.from_frame(df_target, BRANDS, lat='latitude', lng='longitude', brand='브랜드')
+    index.save(OUTPUT_SPATIAL)
+    print(f"  ✅ {INDEX_FILENAME} 저장 완료 ({len(index.keys):,}개 (브랜드,셀) 버킷)")
+
+
+# ─────────────────────────────────────────────
+# 월별 스냅샷 이력 (--history)
+# ─────────────────────────────────────────────
+def history_dong_frame(df_merged):
+    """병합 결과 → 이력용 행정동 지표 (history.DONG_METRICS 컬럼명)"""
+    frame = pd.DataFrame({
+        'dong_code': df_merged['행정동코드'].astype(str),
+        'dong_name': df_merged['행정동_코드_명'].astype(str),
+    })
+    for col in BRAND_COLS:
+        frame[col] = _numeric(df_merged, col)
+    frame['monthly_sales'] = _numeric(df_merged, '당월_매출_금액')
+    frame['total_workers'] = _numeric(df_merged, 'total_workers')
+    frame['female_workers'] = _numeric(df_merged, 'female_workers')
+    frame['attractiveness_score'] = _numeric(df_merged, '매력도점수')
+    return frame
+
+
+def history_store_frame(df_target):
+    """저가 브랜드 매장 좌표 → 이력용 매장 목록 (map_points와 같은 컬럼)"""
+    return pd.DataFrame({
+        'brand': df_target['브랜드'].astype(str).to_numpy(),
+        'name': df_target['사업장명'].astype(str).to_numpy(),
+        'lat': df_target['latitude'].astype('float64').to_numpy(),
+        'lng': df_target['longitude'].astype('float64').to_numpy(),
+        'dong_code': df_target['행정동코드'].astype(str).to_numpy(),
+    })
+
+
+def load_history_month():
+    """현재 DATA_DIR(한 달 스냅샷)의 행정동 지표 (매력도 CSV가 없는 달은 점수 NaN)"""
+    df_attr = load_attractiveness() if os.path.exists(ATTR_CSV) else \
+        pd.DataFrame(columns=['행정동_코드', '매력도점수'])
+    return history_dong_frame(merge_data(load_brand_master(), df_attr))
 
-out_path = os.path.join(OUTPUT_DIR, 'dashboard_data.json')
-with open(out_path, 'w', encoding='utf-8') as f:
-    json.dump(output, f, ensure_ascii=False, indent=2)
 
-file_size = os.path.getsize(out_path) / 1024 / 1024
-print(f"  ✅ dashboard_data.json 저장 완료 ({file_size:.1f} MB)")
-print(f"     - 행정동 수: {len(dong_data)}")
-print(f"     - 지도 포인트 수: {len(map_points):,}")
-print(f"     - 입지 추천 후보: {len(recommend_data):,}")
-print("\n✅ 전처리 완료!")
+def run_history(root, cache, stream=False, chunksize=CHUNK_SIZE, explain=False):
+    """
+    root/YYYYMM/ 폴더마다 행정동 지표·매장 목록을 만들어 dashboard_history.npz로 저장
+    월마다 별도 캐시 단계라 새 달을 추가하면 그 달 CSV만 읽습니다.
+    """
+    months = month_dirs(root)
+    if not months:
+        raise SystemExit(f"❌ {root} 아래에 YYYYMM 형식의 월별 폴더가 없습니다")
+    out_path = os.path.join(OUTPUT_DIR, HISTORY_FILENAME)
+    print(f"🗓️  월별 스냅샷 {len(months)}개 ({months[0][0]} ~ {months[-1][0]})")
+
+    base_data, base_output = DATA_DIR, OUTPUT_DIR
+    stages = []
+    try:
+        for month, path in months:
+            set_paths(path, base_output)
+            stages.append((
+                month,
+                cache.stage(f'hist_dong_{month}', f'[{month}] 행정동 지표',
+                            files=[BRAND_MASTER_CSV, ATTR_CSV], params={'registry': REGISTRY.fingerprint}),
+                cache.stage(f'hist_store_{month}', f'[{month}] 매장 좌표', files=[COORDS_CSV],
+                            params={'stream': stream, 'classify': CLASSIFY_BRANDS,
+                                    'registry': REGISTRY.fingerprint}),
+                path,
+            ))
+        s_emit = cache.stage('hist_emit', upstream=[st for _, d, s, _ in stages for st in (d, s)],
+                             outputs=[out_path])
+        if explain:
+            return
+        if s_emit.hit:
+            print(f"\n💾 {HISTORY_FILENAME} → 입력 변경 없음, 저장 생략")
+            return
+
+        snapshots = []
+        for month, s_dong, s_store, path in stages:
+            print(f"\n📂 {month} 로딩 중...")
+            set_paths(path, base_output)
+            dong = s_dong.run(load_history_month)
+            stores = s_store.run(lambda: history_store_frame(load_coords(stream, chunksize)))
+            snapshots.append((month, dong, stores))
+    finally:
+        set_paths(base_data, base_output)
+
+    with perf_log.timer('save_history', source='preprocess', months=len(snapshots)):
+        arrays = build_history(snapshots, BRANDS)
+        save_history(arrays, out_path)
+    s_emit.commit()
+    n_store = len(arrays['store_name'])
+    n_delta = sum(len(arrays[f'{kind}_{m}']) for m, _, _ in snapshots for kind in ('open', 'close'))
+    size = os.path.getsize(out_path) / 1024 / 1024
+    print(f"\n  ✅ {HISTORY_FILENAME} 저장 완료 ({size:.1f} MB)")
+    print(f"     - 월: {len(snapshots)}개, 행정동: {len(arrays['dong_codes']):,}개")
+    print(f"     - 매장 테이블: {n_store:,}개, 월별 개점·폐점 변동분: {n_delta:,}건")
+
+
+def save_cube(output):
+    """행정동 × 브랜드 × 인구통계 큐브 + 구·서울 합계 저장 (app.py 지역 드릴다운용)"""
+    cube = DongCube.from_records(output['dong_data'], BRANDS)
+    cube.save(OUTPUT_CUBE)
+    print(f"  ✅ {CUBE_FILENAME} 저장 완료 (행정동 {len(cube.dong_codes):,} · 구 {len(cube.gu_codes)} × "
+          f"측정값 {len(cube.measures)})")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='카페 입지 분석 대시보드 데이터 전처리')
+    parser.add_argument('--stream', action='store_true',
+                        help='대용량 카페 CSV를 청크 단위로 읽으며 저가 브랜드만 남김 (메모리 절약)')
+    parser.add_argument('--chunksize', type=int, default=CHUNK_SIZE,
+                        help=f'스트리밍 모드 청크당 행 수 (기본 {CHUNK_SIZE:,})')
+    parser.add_argument('--force', action='store_true',
+                        help='캐시를 무시하고 모든 단계를 다시 계산')
+    parser.add_argument('--explain', action='store_true',
+                        help='실행하지 않고 단계별 캐시 적중/미적중 여부만 출력')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='CSV 로딩에 사용할 프로세스 수 (2 이상이면 4개 파일을 동시에 로딩)')
+    parser.add_argument('--shards', type=int, default=1,
+                        help='대용량 카페 CSV를 나눌 바이트 구간 수 (--jobs 2 이상 필요)')
+    parser.add_argument('--format', choices=list(OUTPUT_FORMATS), default='json',
+                        help='출력 포맷: json(기존), columnar(컬럼형 압축 JSON), both, '
+                             'sections(섹션별 파일 + manifest, 탭별 지연 로딩), all')
+    parser.add_argument('--data-dir', metavar='DIR',
+                        help='입력 CSV 4개가 있는 폴더 (기본: data/)')
+    parser.add_argument('--output-dir', metavar='DIR',
+                        help='대시보드 데이터·공간 인덱스·캐시를 저장할 폴더 (기본: 스크립트 폴더)')
+    parser.add_argument('--classify-brands', action='store_true',
+                        help='CSV의 브랜드 컬럼 대신 사업장명으로 브랜드 분류 (브랜드 컬럼이 없으면 자동)')
+    parser.add_argument('--brand-registry', metavar='JSON',
+                        help='추적 브랜드·색상·별칭 레지스트리 JSON (기본: brand_registry.py 내장 목록)')
+    parser.add_argument('--history', metavar='DIR',
+                        help='DIR/YYYYMM/ 월별 스냅샷 CSV로 기간 이력(dashboard_history.npz)만 생성')
+    parser.add_argument('--boundaries', metavar='GEOJSON',
+                        help='행정동 경계 GeoJSON(WGS84)으로 매장 행정동코드 검증 (불일치 수 보고)')
+    parser.add_argument('--reassign-dong', action='store_true',
+                        help='검증 후 매장 행정동코드를 경계 기준으로 교체 (--boundaries 필요)')
+    args = parser.parse_args(argv)
+    if args.reassign_dong and not args.boundaries:
+        parser.error('--reassign-dong은 --boundaries와 함께 사용해야 합니다')
+    if args.shards > 1 and args.jobs < 2:
+        parser.error('--shards는 --jobs 2 이상과 함께 사용해야 합니다')
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.data_dir or args.output_dir:
+        set_paths(args.data_dir or DATA_DIR, args.output_dir or OUTPUT_DIR)
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+    if args.brand_registry or args.classify_brands:
+        set_registry(args.brand_registry, classify=args.classify_brands or None)
+
+    # 단계 정의: 입력 파일 해시 + 상위 단계 키로 캐시 키 결정
+    cache = StageCache(CACHE_DIR, code_files=[__file__, stage_cache.__file__, density_grid.__file__,
+                                                dong_polygons.__file__, history.__file__,
+                                                brand_registry.__file__, dong_cube.__file__,
+                                                spatial_index.__file__, saturation.__file__,
+                                                dashboard_payload.__file__], force=args.force)
+    if args.history:
+        run_history(args.history, cache, args.stream, args.chunksize, args.explain)
+        cache.explain()
+        cache.save()
+        if not args.explain:
+            print("\n✅ 이력 생성 완료!")
+        return
+
+    # 레지스트리(추적 브랜드 · 별칭 · 색상)가 바뀌면 브랜드를 쓰는 단계 모두 재계산
+    registry_params = {'registry': REGISTRY.fingerprint}
+    load_params = {'stream': args.stream, 'classify': CLASSIFY_BRANDS, **registry_params}
+    s_brand = cache.stage('brand_agg', '[1/4] brand_analysis_master.csv', files=[BRAND_MASTER_CSV],
+                          params=registry_params)
+    s_attr = cache.stage('attractiveness', '[2/4] seoul_dong_attractiveness.csv', files=[ATTR_CSV])
+    s_coords = cache.stage('coords_filter', '[3/4] seoul_caffee_data_with_coords.csv',
+                           files=[COORDS_CSV], params=load_params)
+    s_raw = cache.stage('brand_raw', '[4/4] seoul_caffee_data_with_brand.csv',
+                        files=[BRAND_RAW_CSV], params=load_params)
+    s_merge = cache.stage('merge', '🔗 병합 결과', upstream=[s_brand, s_attr])
+    s_centers = cache.stage('dong_centers', '🧭 행정동 중심 좌표', files=[COORDS_CSV])
+    # 경계 파일이 있으면 좌표 단계 뒤에 행정동 검증 단계를 끼움
+    s_dong = None
+    if args.boundaries:
+        s_dong = cache.stage('dong_check', '🧭 행정동 경계 검증 결과', files=[args.boundaries],
+                             upstream=[s_coords], params={'reassign': args.reassign_dong})
+    s_emit = cache.stage('emit', upstream=[s_merge, s_dong or s_coords, s_centers],
+                         params={'format': args.format, **registry_params},
+                         outputs=OUTPUT_FORMATS[args.format] + [OUTPUT_SPATIAL, OUTPUT_CUBE])
+
+    if args.explain:
+        cache.explain()
+        cache.save()
+        return
+
+    # 단계별 로더 (순차 실행 기본값)
+    loaders = {
+        'brand_agg': load_brand_master,
+        'attractiveness': load_attractiveness,
+        'coords_filter': lambda: load_coords(args.stream, args.chunksize),
+        'brand_raw': lambda: load_brand_raw(args.stream, args.chunksize),
+    }
+
+    # 실제로 계산해야 하는 로딩 단계 (하위 단계가 캐시 적중이면 상위 단계는 읽지도 않음)
+    need_merge = not s_emit.hit and not s_merge.hit
+    required = [st.name for st, needed in [
+        (s_brand, need_merge), (s_attr, need_merge),
+        (s_coords, not s_emit.hit and not (s_dong and s_dong.hit)), (s_raw, True),
+    ] if needed and not st.hit]
+
+    pool = None
+    if args.jobs > 1 and required:
+        # 필요한 로딩을 모두 먼저 제출하고, 결과는 단계가 실행될 때 받아옴
+        pool = ProcessPoolExecutor(max_workers=args.jobs)
+        print(f"⚙️  병렬 로딩: {len(required)}개 단계, 프로세스 {args.jobs}개"
+              + (f", 대용량 CSV 샤드 {args.shards}개" if args.shards > 1 else ""))
+        for name in required:
+            if args.shards > 1 and name == 'coords_filter':
+                futs = submit_shards(pool, COORDS_CSV, COORDS_USECOLS, args.shards, args.stream)
+                loaders[name] = lambda futs=futs: load_coords(args.stream, shards=futs)
+            elif args.shards > 1 and name == 'brand_raw':
+                futs = submit_shards(pool, BRAND_RAW_CSV, BRAND_RAW_USECOLS, args.shards, args.stream)
+                loaders[name] = lambda futs=futs: load_brand_raw(args.stream, shards=futs)
+            else:
+                loader = {
+                    'brand_agg': (load_brand_master, ()),
+                    'attractiveness': (load_attractiveness, ()),
+                    'coords_filter': (load_coords, (args.stream, args.chunksize)),
+                    'brand_raw': (load_brand_raw, (args.stream, args.chunksize)),
+                }[name]
+                # 전체 카페 목록은 건수만 쓰므로 DataFrame을 돌려받지 않음
+                fut = pool.submit(_run_loader, *loader, keep_result=(name != 'brand_raw'))
+                loaders[name] = lambda fut=fut: collect_loader(fut)
+
+    print("📂 데이터 로딩 중...")
+    t_load = time.perf_counter()
+    # 전체 카페 목록은 건수 확인용이라 결과를 저장하지 않음
+    if s_raw.hit:
+        print(f"  {s_raw.label} → 입력 변경 없음")
+    else:
+        loaders['brand_raw']()
+        s_raw.commit()
+
+    if s_emit.hit:
+        print("\n💾 대시보드 데이터 → 입력 변경 없음, 저장 생략")
+    else:
+        df_merged = s_merge.run(lambda: merge_data(s_brand.run(loaders['brand_agg']),
+                                                   s_attr.run(loaders['attractiveness'])))
+        if s_dong:
+            df_target = s_dong.run(lambda: check_dong_codes(s_coords.run(loaders['coords_filter']),
+                                                            args.boundaries, args.reassign_dong))
+        else:
+            df_target = s_coords.run(loaders['coords_filter'])
+        load_s = time.perf_counter() - t_load
+        perf_log.record('load_merge_wall', load_s * 1000, source='preprocess', jobs=args.jobs)
+        print(f"\n⏱ 로딩·병합 wall time: {load_s:.2f}s")
+
+        start = stage_start()
+        df_centers = s_centers.run(lambda: load_dong_centers(args.chunksize))
+        output, n_recommend = build_output(df_merged, df_target, df_centers)
+        print_stage_stats(start, 'build_output')
+
+        with perf_log.timer('save_output', source='preprocess', format=args.format):
+            save_output(output, n_recommend, args.format)
+        with perf_log.timer('save_spatial_index', source='preprocess', stores=len(df_target)):
+            save_spatial_index(df_target)
+        with perf_log.timer('save_cube', source='preprocess'):
+            save_cube(output)
+        s_emit.commit()
+
+    if pool is not None:
+        pool.shutdown()
+    cache.explain()
+    print("\n✅ 전처리 완료!")
+
+
+if __name__ == '__main__':
+    main()
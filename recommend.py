@@ -0,0 +1,87 @@
+"""
+입지 추천 엔진
+
+preprocess.py의 recommend_top은 (행정동, 미진출 브랜드) 후보를 매력도 순으로
+200개만 남기므로, 브랜드나 정렬 기준을 바꾸면 더 좋은 후보가 빠져 있습니다.
+이 엔진은 dong_data에서 전체 후보를 만들고, 브랜드 × 점수마다 미리 정렬한
+행정동 번호 배열을 보관해 top-k 질의 시 재정렬 없이 앞에서부터 잘라 씁니다.
+"""
+
+import numpy as np
+import pandas as pd
+
+from dong_search import DongSearchIndex
+
+SCORES = ['attractiveness_score', 'demand_score', 'competition_score', 'cost_score']
+ALL = '전체'
+RESULT_COLUMNS = [
+    'dong_name', 'dong_code', 'brand',
+    'attractiveness_score', 'demand_score', 'competition_score', 'cost_score',
+    'total_workers', 'monthly_sales', 'cafe_count',
+]
+
+
+def _desc_order(values):
+    """내림차순 안정 정렬 (NaN은 맨 뒤)"""
+    return np.argsort(-values, kind='stable')
+
+
+class RecommendEngine:
+    def __init__(self, df_dong, brands, count_prefix='cnt_', search_index=None):
+        """
+        df_dong : 행정동 DataFrame (브랜드별 매장 수는 '<count_prefix><브랜드>' 컬럼)
+        search_index : df_dong 행 순서로 만든 DongSearchIndex (없으면 새로 생성)
+        후보 = 매력도 점수가 있고 해당 브랜드 매장이 없는 (행정동, 브랜드) 쌍
+        """
+        self.df_dong = df_dong.reset_index(drop=True)
+        self.brands = list(brands)
+        self.search_index = search_index or DongSearchIndex(self.df_dong['dong_name'])
+
+        counts = np.column_stack([self.df_dong[f'{count_prefix}{b}'].to_numpy() for b in self.brands])
+        has_score = self.df_dong['attractiveness_score'].notna().to_numpy()
+        # preprocess.py와 같은 순서: 행정동 순 → 브랜드 순
+        self.pair_dong, self.pair_brand = np.nonzero(has_score[:, None] & (counts == 0))
+
+        # {(브랜드 또는 '전체', 점수): 후보 번호 배열} — 브랜드별은 행정동 번호, 전체는 후보 쌍 번호
+        self.order = {}
+        for score in SCORES:
+            values = self.df_dong[score].to_numpy(dtype=np.float64)
+            pair_order = _desc_order(values[self.pair_dong])
+            self.order[ALL, score] = pair_order
+            for b, brand in enumerate(self.brands):
+                # 전체 순서에서 해당 브랜드만 고르면 이미 정렬되어 있음
+                self.order[brand, score] = pair_order[self.pair_brand[pair_order] == b]
+
+    def n_candidates(self, brand=ALL):
+        return len(self.order[brand, SCORES[0]])
+
+    def _select(self, brand, score, search):
+        """조건에 맞는 후보 쌍 번호 (정렬 순서 유지)"""
+        pairs = self.order[brand, score]
+        if search:
+            match = self.search_index.mask(search)
+            pairs = pairs[match[self.pair_dong[pairs]]]
+        return pairs
+
+    def _frame(self, pairs):
+        rows = self.df_dong.iloc[self.pair_dong[pairs]]
+        result = pd.DataFrame({col: rows[col].to_numpy() for col in RESULT_COLUMNS if col != 'brand'})
+        result.insert(2, 'brand', [self.brands[b] for b in self.pair_brand[pairs]])
+        return result
+
+    def count(self, brand=ALL, score='attractiveness_score', search=None):
+        """조건에 맞는 후보 수 (페이지 수 계산용)"""
+        return len(self._select(brand, score, search))
+
+    def top(self, brand=ALL, score='attractiveness_score', k=60, search=None):
+        """브랜드·정렬 기준·행정동 검색어로 상위 k개 후보 (전체 후보 중에서)"""
+        return self._frame(self._select(brand, score, search)[:k])
+
+    def page(self, brand=ALL, score='attractiveness_score', page=0, page_size=24, search=None):
+        """
+        page번째(0부터) 묶음만 DataFrame으로 변환 → (결과, 조건에 맞는 전체 후보 수)
+        보이는 페이지의 행만 만들기 때문에 후보 수가 늘어도 응답 크기는 일정합니다.
+        """
+        pairs = self._select(brand, score, search)
+        start = max(page, 0) * page_size
+        return self._frame(pairs[start:start + page_size]), len(pairs)
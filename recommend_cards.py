@@ -0,0 +1,89 @@
+"""
+입지 추천 카드 그리드 (단일 컴포넌트)
+
+카드마다 st.markdown을 호출하면 rerun마다 카드 수만큼 큰 HTML 조각이 전송됩니다.
+여기서는 현재 페이지 후보만 배열의 배열(JSON)로 압축해 HTML 한 벌에 싣고,
+카드 마크업은 iframe 안의 JS가 배열에서 그립니다.
+"""
+
+import json
+import math
+
+import numpy as np
+
+# 카드 한 장에 필요한 컬럼 (JSON 배열 순서)
+CARD_COLUMNS = [
+    'dong_name', 'brand', 'attractiveness_score', 'demand_score',
+    'competition_score', 'cost_score', 'total_workers', 'cafe_count', 'monthly_sales',
+]
+CARD_ROW_PX = 232       # 카드 한 줄 높이 (여백 포함)
+GRID_COLS = 3
+
+_TEMPLATE = """
+<style>
+  body { margin: 0; font-family: 'Noto Sans KR', sans-serif; color: __TEXT__; }
+  .grid { display: grid; grid-template-columns: repeat(__COLS__, 1fr); gap: 12px; }
+  .card { background: __SURFACE__; border: 1px solid __BORDER__; border-radius: 10px; padding: 16px; }
+  .rank { font-size: .7rem; color: __SUB__; }
+  .dong { font-size: 1rem; font-weight: 700; margin: 4px 0; }
+  .pill { padding: 2px 8px; border-radius: 10px; font-size: .75rem; font-weight: 600; }
+  .note { font-size: .72rem; color: __SUB__; margin-left: 6px; }
+  .scores { display: grid; grid-template-columns: 1fr 1fr; gap: 6px; margin-top: 12px; }
+  .score { background: __SURFACE2__; border-radius: 6px; padding: 8px; }
+  .score .label { font-size: .65rem; color: __SUB__; }
+  .score .val { font-size: 1.1rem; font-weight: 700; }
+  .foot { font-size: .72rem; color: __SUB__; margin-top: 8px; }
+</style>
+<div class="grid" id="grid"></div>
+<script>
+  const ROWS = __ROWS__;
+  const COLORS = __COLORS__;
+  const START = __START__;
+  const esc = s => String(s).replace(/[&<>"']/g, c => ({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c]));
+  const fmt = v => (v === null || v === 0) ? '-' : v.toFixed(1);
+  const box = (label, v, color) =>
+    `<div class="score"><div class="label">${label}</div><div class="val" style="color:${color}">${fmt(v)}</div></div>`;
+  document.getElementById('grid').innerHTML = ROWS.map((r, i) => {
+    const [dong, brand, attr, demand, comp, cost, workers, cafes, sales] = r;
+    const color = COLORS[brand] || '#888';
+    const attrColor = attr > 60 ? '#4ECDC4' : attr > 40 ? '#FFE66D' : '#FF6B6B';
+    return `<div class="card" style="border-top:3px solid ${color}">
+      <div class="rank">#${START + i} 추천</div>
+      <div class="dong">${esc(dong)}</div>
+      <span class="pill" style="background:${color}25;color:${color}">${esc(brand)}</span>
+      <span class="note">미진출 지역</span>
+      <div class="scores">${box('매력도', attr, attrColor)}${box('수요', demand, '#4ECDC4')}${box('경쟁', comp, '#FFE66D')}${box('비용', cost, '#A8E6CF')}</div>
+      <div class="foot">근로자 ${(workers || 0).toLocaleString()}명 · 카페 ${cafes || 0}개 · 월매출 ${((sales || 0) / 1e8).toFixed(1)}억</div>
+    </div>`;
+  }).join('');
+</script>
+"""
+
+
+def card_rows(df_page):
+    """추천 결과 DataFrame → 카드용 배열의 배열 (NaN은 null)"""
+    values = df_page[CARD_COLUMNS].astype(object)
+    return [[None if isinstance(v, float) and math.isnan(v) else
+             (v.item() if isinstance(v, np.generic) else v) for v in row]
+            for row in values.itertuples(index=False)]
+
+
+def _json(value):
+    # </script> 종료 방지
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+
+
+def cards_html(df_page, brand_colors, theme, start_rank=1):
+    """현재 페이지 후보 → (HTML, iframe 높이 px)"""
+    html = (_TEMPLATE
+            .replace('__ROWS__', _json(card_rows(df_page)))
+            .replace('__COLORS__', _json(brand_colors))
+            .replace('__START__', str(int(start_rank)))
+            .replace('__COLS__', str(GRID_COLS))
+            .replace('__TEXT__', theme['text'])
+            .replace('__SUB__', theme['text_sub'])
+            .replace('__SURFACE__', theme['surface'])
+            .replace('__SURFACE2__', theme['surface2'])
+            .replace('__BORDER__', theme['border']))
+    height = math.ceil(len(df_page) / GRID_COLS) * CARD_ROW_PX
+    return html, height
@@ -0,0 +1,176 @@
+"""
+매장별 경쟁·포화 지표 (preprocess.py → map_points 컬럼 · dong_data 행정동 요약)
+
+저가 브랜드 매장 전체를 격자 인덱스(spatial_index.StoreIndex) 하나에 넣고
+모든 매장을 한 번에 질의합니다.
+  nearest_same_m   같은 브랜드 다른 매장 중 가장 가까운 곳까지 거리 (m, 자기 자신 제외)
+  nearest_other_m  다른 저가 브랜드 매장 중 가장 가까운 곳까지 거리 (m)
+  within_<r>m      반경 r m 안의 다른 저가 브랜드 매장 수 (같은 브랜드 포함, 자기 자신 제외)
+  saturation       within_300m 기준 포화 단계 ('여유' / '보통' / '과밀')
+
+매장마다 주변 셀만 훑으므로 전수 비교(O(n²)) 없이 매장 수에 거의 비례해 늘어납니다.
+해당 매장이 없으면(브랜드에 매장이 하나뿐 등) 거리는 None입니다.
+
+검증·벤치마크 (전수 비교 일치 확인 + 가상 매장 n개 소요 시간):
+    python saturation.py [--stores 500000]
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from spatial_index import DEFAULT_CELL_M, StoreIndex, haversine_m
+
+RADII_M = (100, 300, 500)
+SATURATION_RADIUS_M = 300
+SATURATION_LEVELS = ['여유', '보통', '과밀']
+# within_300m이 2 미만 → 여유, 6 미만 → 보통, 그 이상 → 과밀 (서울 저가 브랜드 분포 사분위 기준)
+SATURATION_BINS = [2, 6]
+SATURATION_COLORS = {'여유': '#4ECDC4', '보통': '#FFE66D', '과밀': '#FF6B6B'}
+# 격자 셀 하나에 매장이 평균 이 정도 들어가도록 셀 크기를 고름 (MIN_CELL_M ~ DEFAULT_CELL_M)
+CELL_TARGET_STORES = 4
+MIN_CELL_M = 20.0
+
+NEAREST_COLUMNS = ['nearest_same_m', 'nearest_other_m']
+WITHIN_COLUMNS = [f'within_{r}m' for r in RADII_M]
+METRIC_COLUMNS = NEAREST_COLUMNS + WITHIN_COLUMNS + ['saturation']
+# dong_data에 붙는 행정동별 요약 (매장 없는 동은 None)
+DONG_COLUMNS = ['median_nearest_same_m', 'median_nearest_other_m',
+                f'avg_within_{SATURATION_RADIUS_M}m', 'crowded_share']
+
+
+def saturation_level(counts):
+    """반경 내 다른 매장 수 배열 → 포화 단계 이름 배열"""
+    levels = np.searchsorted(SATURATION_BINS, np.asarray(counts), side='right')
+    return np.array(SATURATION_LEVELS, dtype=object)[levels]
+
+
+def metric_cell_m(lat, lng):
+    """
+    매장 밀도에 맞춘 격자 셀 크기 (m)
+    기본 셀에서 매장 하나가 속한 셀의 평균 매장 수를 재고, CELL_TARGET_STORES개 안팎이 되도록 줄입니다.
+    (셀이 너무 크면 최근접·경계 후보가 늘고, 너무 작으면 훑을 셀이 늘어남)
+    """
+    if len(lat) == 0:
+        return DEFAULT_CELL_M
+    probe = StoreIndex(lat, lng, np.zeros(len(lat), dtype=np.int64), ['all'])
+    per_cell = (probe.ends - probe.starts).astype(np.float64)
+    crowd = (per_cell ** 2).sum() / per_cell.sum()
+    return float(np.clip(DEFAULT_CELL_M * np.sqrt(CELL_TARGET_STORES / crowd), MIN_CELL_M, DEFAULT_CELL_M))
+
+
+def store_metrics(lat, lng, brand_codes, brands, radii=RADII_M, cell_m=None):
+    """
+    매장 좌표·브랜드 번호 → 매장별 지표 DataFrame (입력 순서, 거리는 0.1 m 단위 반올림)
+    최근접 거리는 브랜드별로 한 번씩(같은 브랜드 · 나머지 브랜드), 반경 내 수는 전체 한 번에 질의합니다.
+    cell_m을 주지 않으면 metric_cell_m으로 매장 밀도에 맞춰 고릅니다.
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    lng = np.asarray(lng, dtype=np.float64)
+    brand_codes = np.asarray(brand_codes, dtype=np.int64)
+    index = StoreIndex(lat, lng, brand_codes, brands, cell_m or metric_cell_m(lat, lng))
+
+    same = np.full(len(lat), np.inf)
+    other = np.full(len(lat), np.inf)
+    for code in range(len(brands)):
+        members = np.flatnonzero(brand_codes == code)
+        if not len(members):
+            continue
+        same[members] = index.nearest_many(lat[members], lng[members], code, exclude=members)[1]
+        rivals = [c for c in range(len(brands)) if c != code]
+        if rivals:
+            other[members] = index.nearest_many(lat[members], lng[members], rivals)[1]
+
+    within = index.radius_count_many(lat, lng, list(radii)) - 1
+    df = pd.DataFrame({
+        'nearest_same_m': np.round(np.where(np.isfinite(same), same, np.nan), 1),
+        'nearest_other_m': np.round(np.where(np.isfinite(other), other, np.nan), 1),
+    })
+    for k, r in enumerate(radii):
+        df[f'within_{r}m'] = within[:, k]
+    df['saturation'] = saturation_level(df[f'within_{SATURATION_RADIUS_M}m'])
+    return df
+
+
+def dong_summary(metrics, dong_codes):
+    """매장별 지표 + 매장 행정동코드 → 행정동코드 인덱스의 요약 DataFrame (DONG_COLUMNS)"""
+    g = metrics.assign(dong_code=np.asarray(dong_codes).astype(str),
+                       crowded=(metrics['saturation'] == SATURATION_LEVELS[-1]) * 100.0).groupby('dong_code')
+    return pd.DataFrame({
+        'median_nearest_same_m': g['nearest_same_m'].median().round(1),
+        'median_nearest_other_m': g['nearest_other_m'].median().round(1),
+        f'avg_within_{SATURATION_RADIUS_M}m': g[f'within_{SATURATION_RADIUS_M}m'].mean().round(2),
+        'crowded_share': g['crowded'].mean().round(1),
+    })
+
+
+# ─────────────────────────────────────────────
+# 검증 · 벤치마크
+# ─────────────────────────────────────────────
+def _brute_metrics(lat, lng, brand_codes, radii=RADII_M):
+    """전수 거리 행렬로 같은 지표 계산 (검증용, O(n²) 메모리)"""
+    dist = haversine_m(lat[:, None], lng[:, None], lat[None, :], lng[None, :])
+    np.fill_diagonal(dist, np.inf)
+    same_brand = brand_codes[:, None] == brand_codes[None, :]
+    df = pd.DataFrame({
+        'nearest_same_m': np.where(same_brand, dist, np.inf).min(axis=1),
+        'nearest_other_m': np.where(same_brand, np.inf, dist).min(axis=1),
+    })
+    for r in radii:
+        df[f'within_{r}m'] = (dist <= r).sum(axis=1)
+    return df.replace(np.inf, np.nan).round(1)
+
+
+def _synthetic_stores(lat, lng, n, seed=0):
+    """실제 매장 좌표 주변(표준편차 약 800 m)에 가상 매장 n개 생성 — 밀집 지역일수록 더 촘촘"""
+    rng = np.random.default_rng(seed)
+    pick = rng.integers(0, len(lat), n)
+    return (lat[pick] + rng.normal(0, 800 / 111_000, n),
+            lng[pick] + rng.normal(0, 800 / 88_000, n),
+            rng.integers(0, 5, n))
+
+
+def _benchmark(json_path, n_stores, n_check=3000):
+    import json
+
+    with open(json_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get('format') == 'columnar-v1':
+        from dashboard_payload import from_columnar
+        data = from_columnar(data)
+    brands = data['brands']
+    pts = data['map_points']
+    lat = np.array([p['lat'] for p in pts])
+    lng = np.array([p['lng'] for p in pts])
+    codes = np.array([brands.index(p['brand']) for p in pts])
+
+    # 1) 실제 매장 일부를 전수 비교와 대조
+    sub = slice(0, min(n_check, len(pts)))
+    got = store_metrics(lat[sub], lng[sub], codes[sub], brands)
+    want = _brute_metrics(lat[sub], lng[sub], codes[sub])
+    ok = all(np.allclose(got[c], want[c], equal_nan=True) for c in want.columns)
+    print(f"전수 비교 ({len(got):,}개 매장): 결과 일치: {ok}")
+
+    # 2) 가상 매장 n개 소요 시간
+    s_lat, s_lng, s_codes = _synthetic_stores(lat, lng, n_stores)
+    t0 = time.perf_counter()
+    metrics = store_metrics(s_lat, s_lng, s_codes, brands)
+    elapsed = time.perf_counter() - t0
+    print(f"가상 매장 {n_stores:,}개: {elapsed:.1f} s "
+          f"(반경 {SATURATION_RADIUS_M} m 내 다른 매장 중앙값 "
+          f"{metrics[f'within_{SATURATION_RADIUS_M}m'].median():.0f}개)")
+    print(metrics['saturation'].value_counts().reindex(SATURATION_LEVELS).to_string())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='매장별 경쟁·포화 지표 검증 및 벤치마크')
+    parser.add_argument('json_path', nargs='?',
+                        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dashboard_data.json'),
+                        help='매장 좌표를 읽을 대시보드 JSON (기본: dashboard_data.json)')
+    parser.add_argument('--stores', type=int, default=500_000,
+                        help='벤치마크용 가상 매장 수 (기본 500,000)')
+    args = parser.parse_args()
+    _benchmark(args.json_path, args.stores)
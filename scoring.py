@@ -0,0 +1,59 @@
+"""
+매력도 점수 재계산 (사용자 가중치)
+
+seoul_dong_attractiveness.csv의 점수는 고정 가중치로 미리 계산되어 있습니다.
+  수요 = (정규화_매출×0.5 + 정규화_종사자×0.5)×100
+  경쟁 = (1 − 정규화_카페수)×100
+  비용 = (1 − 정규화_부동산가)×100
+  매력도 = 수요×0.4 + 경쟁×0.3 + 비용×0.3
+ScoreModel은 Min-Max 정규화한 원본 지표를 NumPy 배열로 들고 있다가
+가중치가 바뀌면 모든 행정동 점수를 한 번의 벡터 연산으로 다시 계산합니다.
+
+정규화 대상은 원본 점수가 있는 행정동(매력도 CSV에 있는 동)이며,
+점수가 없던 동은 재계산 후에도 NaN입니다.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+Weights = namedtuple('Weights', ['demand', 'competition', 'cost', 'sales_share'])
+DEFAULT_WEIGHTS = Weights(demand=0.4, competition=0.3, cost=0.3, sales_share=0.5)
+
+
+def _minmax(values, mask):
+    """mask 행 기준 Min-Max 정규화 (범위가 0이면 0)"""
+    v = values[mask]
+    lo, hi = (np.nanmin(v), np.nanmax(v)) if len(v) else (0.0, 0.0)
+    out = np.full(len(values), np.nan)
+    out[mask] = (values[mask] - lo) / (hi - lo) if hi > lo else 0.0
+    return out
+
+
+class ScoreModel:
+    def __init__(self, df_dong):
+        self.mask = df_dong['attractiveness_score'].notna().to_numpy()
+        # 정규화된 원본 지표 (mask 밖은 NaN)
+        self.sales = _minmax(df_dong['monthly_sales'].to_numpy(dtype=np.float64), self.mask)
+        self.workers = _minmax(df_dong['total_workers'].to_numpy(dtype=np.float64), self.mask)
+        self.cafes = _minmax(df_dong['cafe_count'].to_numpy(dtype=np.float64), self.mask)
+        self.price = _minmax(df_dong['avg_price_per_m2'].to_numpy(dtype=np.float64), self.mask)
+
+    def compute(self, weights=DEFAULT_WEIGHTS):
+        """
+        가중치 → {'demand_score', 'competition_score', 'cost_score', 'attractiveness_score'} 배열
+        세 가중치의 합이 1이 아니어도 합으로 나눠 0~100 범위를 유지합니다.
+        """
+        w = Weights(*weights)
+        demand = (self.sales * w.sales_share + self.workers * (1 - w.sales_share)) * 100
+        competition = (1 - self.cafes) * 100
+        cost = (1 - self.price) * 100
+        total = w.demand + w.competition + w.cost
+        attractiveness = (demand * w.demand + competition * w.competition + cost * w.cost) / total \
+            if total > 0 else np.where(self.mask, 0.0, np.nan)
+        return {
+            'demand_score': demand,
+            'competition_score': competition,
+            'cost_score': cost,
+            'attractiveness_score': attractiveness,
+        }
@@ -0,0 +1,220 @@
+"""
+후보 좌표 일괄 입지 점수 (what-if)
+
+주소 후보(위경도)와 진출 브랜드를 받아 후보마다
+  - 소속 행정동 (경계 GeoJSON을 주면 폴리곤 포함 판정, 없으면 가장 가까운 행정동 중심 좌표)
+  - 반경 내 같은 브랜드 / 전체 저가 브랜드 매장 수 (map_points 기준)
+  - 행정동의 수요·비용 점수
+를 붙이고, 행정동 경쟁 점수 대신 반경 내 경쟁으로 계산한 지역 경쟁 점수로
+매력도와 같은 가중 합산(site_score)을 계산합니다. 모든 계산은 후보 배열 단위로
+벡터화되어 있고, 파일 입력은 청크 단위로 읽고 바로 써서 메모리를 일정하게 유지합니다.
+
+사용법:
+    python site_scoring.py candidates.csv --brand 메가커피 -o scored.csv [--radius 500] [--boundaries dong.geojson]
+    python site_scoring.py --benchmark [--n 100000]
+
+행정동 중심 좌표는 preprocess.py가 dong_data의 center_lat/center_lng로 저장합니다.
+중심 좌표가 없는 이전 payload는 --boundaries가 필요합니다.
+
+입력 CSV는 lat, lng (또는 latitude, longitude) 컬럼이 필요하며,
+나머지 컬럼은 결과에 그대로 유지됩니다.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_store import DataStore, payload_version
+from dong_polygons import PolygonIndex
+from scoring import DEFAULT_WEIGHTS, Weights
+from spatial_index import StoreIndex, load_or_build
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+LOCAL_RADIUS_M = 500.0
+SATURATION_STORES = 10      # 반경 내 (가중) 매장 수가 이 이상이면 지역 경쟁 점수 0
+SAME_BRAND_WEIGHT = 2.0     # 같은 브랜드 매장은 자기잠식이라 2배로 계산
+MAX_ASSIGN_M = 3000.0       # 가장 가까운 행정동 중심이 이보다 멀면(서울 밖 등) 행정동을 배정하지 않음
+CENTER_COLS = ['center_lat', 'center_lng']
+CHUNK_SIZE = 20_000         # 한 번에 벡터화할 후보 수 (반경 탐색 임시 배열 크기 제한)
+LAT_COLS = ['lat', 'latitude', '위도']
+LNG_COLS = ['lng', 'longitude', '경도']
+
+
+class SiteScorer:
+    def __init__(self, df_dong, brands, store_index,
+                 weights=DEFAULT_WEIGHTS, radius_m=LOCAL_RADIUS_M, polygons=None):
+        """
+        polygons: dong_polygons.PolygonIndex (없으면 df_dong의 행정동 중심 좌표 중 가장 가까운 곳으로 배정)
+        """
+        self.brands = list(brands)
+        self.index = store_index
+        self.weights = Weights(*weights)
+        self.radius_m = float(radius_m)
+        self.polygons = polygons
+        self.dongs = (df_dong.assign(dong_code=df_dong['dong_code'].astype(str))
+                      .set_index('dong_code')[['dong_name', 'demand_score', 'cost_score']])
+        if polygons is None:
+            if not set(CENTER_COLS) <= set(df_dong.columns):
+                raise ValueError("payload에 행정동 중심 좌표(center_lat/center_lng)가 없습니다. "
+                                 "preprocess.py를 다시 실행하거나 --boundaries로 경계 GeoJSON을 지정하세요.")
+            centers = df_dong.dropna(subset=CENTER_COLS)
+            self.center_codes = centers['dong_code'].astype(str).to_numpy()
+            # 행정동 중심을 매장 하나짜리 브랜드처럼 넣어 최근접 질의 재사용
+            self.centers = StoreIndex(centers['center_lat'].to_numpy(dtype=np.float64),
+                                      centers['center_lng'].to_numpy(dtype=np.float64),
+                                      np.zeros(len(centers), dtype=np.int64), ['dong'])
+
+    def assign_dongs(self, lats, lngs):
+        """후보 좌표 → 행정동코드 배열 (경계 밖 · 중심에서 MAX_ASSIGN_M 초과면 '')"""
+        if self.polygons is not None:
+            return self.polygons.assign_codes(lats, lngs).astype(str)
+        nearest, dist = self.centers.nearest_many(lats, lngs)
+        assigned = (nearest >= 0) & (dist <= MAX_ASSIGN_M)
+        return np.where(assigned, self.center_codes[np.maximum(nearest, 0)], '')
+
+    def score(self, lats, lngs, brand):
+        """후보 좌표 배열 → 점수 DataFrame (입력 순서 유지)"""
+        if brand not in self.brands:
+            raise ValueError(f"알 수 없는 브랜드: {brand} (가능: {', '.join(self.brands)})")
+        lats = np.asarray(lats, dtype=np.float64)
+        lngs = np.asarray(lngs, dtype=np.float64)
+        parts = [self._score_chunk(lats[i:i + CHUNK_SIZE], lngs[i:i + CHUNK_SIZE], brand)
+                 for i in range(0, len(lats), CHUNK_SIZE)]
+        return pd.concat(parts, ignore_index=True) if parts else self._score_chunk(lats, lngs, brand)
+
+    def _score_chunk(self, lats, lngs, brand):
+        dong_code = self.assign_dongs(lats, lngs)
+        nearest_m = self.index.nearest_many(lats, lngs)[1]
+
+        same = self.index.radius_count_many(lats, lngs, self.radius_m, brand)
+        total = self.index.radius_count_many(lats, lngs, self.radius_m)
+        pressure = (total - same) + same * SAME_BRAND_WEIGHT
+        local_competition = np.clip(1 - pressure / SATURATION_STORES, 0, 1) * 100
+
+        dong = self.dongs.reindex(dong_code)
+        demand = dong['demand_score'].to_numpy(dtype=np.float64)
+        cost = dong['cost_score'].to_numpy(dtype=np.float64)
+        w = self.weights
+        site_score = (demand * w.demand + local_competition * w.competition + cost * w.cost) \
+            / (w.demand + w.competition + w.cost)
+
+        r = int(self.radius_m)
+        return pd.DataFrame({
+            'dong_code': dong_code,
+            'dong_name': dong['dong_name'].to_numpy(),
+            'nearest_store_m': nearest_m.round(1),
+            f'same_brand_{r}m': same,
+            f'all_brands_{r}m': total,
+            'demand_score': demand,
+            'cost_score': cost,
+            'local_competition_score': local_competition,
+            'site_score': site_score,
+        })
+
+
+def load_scorer(base_dir=BASE_DIR, weights=DEFAULT_WEIGHTS, radius_m=LOCAL_RADIUS_M, boundaries=None):
+    """
+    대시보드 데이터(최신 payload, 포맷 무관)와 공간 인덱스로 SiteScorer 생성
+    boundaries: 행정동 경계 GeoJSON 경로 (주면 후보의 행정동을 폴리곤으로 판정)
+    """
+    store = DataStore(*payload_version(base_dir))
+    index = load_or_build(base_dir, store.df_map, store.brands)
+    polygons = PolygonIndex.from_geojson(boundaries) if boundaries else None
+    return SiteScorer(store.df_dong, store.brands, index, weights, radius_m, polygons)
+
+
+def score_sites(lats, lngs, brand, scorer=None, **kwargs):
+    """후보 좌표 배열 일괄 점수 (scorer가 없으면 load_scorer(**kwargs)로 생성)"""
+    scorer = scorer or load_scorer(**kwargs)
+    return scorer.score(lats, lngs, brand)
+
+
+def _find_col(columns, names):
+    for name in names:
+        if name in columns:
+            return name
+    raise ValueError(f"좌표 컬럼이 없습니다: {' / '.join(names)} 중 하나가 필요합니다")
+
+
+def score_file(in_path, out_path, brand, scorer=None, chunksize=CHUNK_SIZE, **kwargs):
+    """
+    CSV 후보 파일을 청크 단위로 읽어 점수를 붙여 바로 씀 (out_path가 '-'이면 표준 출력)
+    반환: 처리한 후보 수
+    """
+    scorer = scorer or load_scorer(**kwargs)
+    out = sys.stdout if out_path == '-' else open(out_path, 'w', encoding='utf-8-sig', newline='')
+    n = 0
+    try:
+        for chunk in pd.read_csv(in_path, chunksize=chunksize, encoding='utf-8-sig'):
+            lat_col, lng_col = _find_col(chunk.columns, LAT_COLS), _find_col(chunk.columns, LNG_COLS)
+            scored = scorer.score(chunk[lat_col].to_numpy(), chunk[lng_col].to_numpy(), brand)
+            result = pd.concat([chunk.reset_index(drop=True), scored], axis=1)
+            result.to_csv(out, index=False, header=(n == 0))
+            n += len(chunk)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return n
+
+
+# ─────────────────────────────────────────────
+# 벤치마크: 서울 범위 임의 후보 N개 일괄 점수
+# ─────────────────────────────────────────────
+def _benchmark(n=100_000, seed=0, boundaries=None):
+    t0 = time.perf_counter()
+    scorer = load_scorer(boundaries=boundaries)
+    print(f"준비 (데이터 + 공간 인덱스): {time.perf_counter() - t0:.2f}s")
+
+    lat, lng = scorer.index.lat, scorer.index.lng
+    rng = np.random.default_rng(seed)
+    q_lat = rng.uniform(lat.min(), lat.max(), n)
+    q_lng = rng.uniform(lng.min(), lng.max(), n)
+    brand = scorer.brands[0]
+
+    t0 = time.perf_counter()
+    result = scorer.score(q_lat, q_lng, brand)
+    elapsed = time.perf_counter() - t0
+    print(f"후보 {n:,}개 ({brand}, 반경 {scorer.radius_m:.0f} m): {elapsed:.2f}s "
+          f"({elapsed / n * 1e6:.1f} µs/후보), 행정동 배정 {(result['dong_code'] != '').mean():.1%}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='후보 좌표 일괄 입지 점수')
+    parser.add_argument('candidates', nargs='?', help='후보 CSV (lat, lng 컬럼)')
+    parser.add_argument('--brand', help='진출 브랜드')
+    parser.add_argument('-o', '--output', default='-', help='결과 CSV 경로 (기본: 표준 출력)')
+    parser.add_argument('--radius', type=float, default=LOCAL_RADIUS_M,
+                        help=f'지역 경쟁 반경 m (기본 {LOCAL_RADIUS_M:.0f})')
+    parser.add_argument('--chunksize', type=int, default=CHUNK_SIZE,
+                        help=f'한 번에 읽을 후보 수 (기본 {CHUNK_SIZE:,})')
+    parser.add_argument('--boundaries', metavar='GEOJSON',
+                        help='행정동 경계 GeoJSON (주면 후보의 행정동을 폴리곤으로 판정, 없으면 가장 가까운 행정동 중심)')
+    parser.add_argument('--benchmark', action='store_true', help='임의 후보로 처리 속도 측정')
+    parser.add_argument('--n', type=int, default=100_000, help='벤치마크 후보 수 (기본 100,000)')
+    args = parser.parse_args(argv)
+    if not args.benchmark and not (args.candidates and args.brand):
+        parser.error('후보 CSV와 --brand가 필요합니다 (또는 --benchmark)')
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        if args.benchmark:
+            _benchmark(args.n, boundaries=args.boundaries)
+            return
+
+        t0 = time.perf_counter()
+        n = score_file(args.candidates, args.output, args.brand,
+                       chunksize=args.chunksize, radius_m=args.radius, boundaries=args.boundaries)
+    except ValueError as err:
+        sys.exit(f"❌ {err}")
+    print(f"✅ 후보 {n:,}개 점수 계산 완료 ({time.perf_counter() - t0:.2f}s)", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
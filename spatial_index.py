@@ -0,0 +1,602 @@
+"""
+매장 좌표 공간 인덱스 (격자 버킷)
+
+map_points(저가 브랜드 매장)를 평면 좌표(m)로 투영한 뒤 (브랜드, 격자 셀) 순으로
+정렬해 두고, 질의 시 주변 셀만 꺼내 하버사인 거리로 정확히 거릅니다.
+  - radius_count / radius_query : 반경 내 매장 수 / 목록
+  - radius_count_many           : 후보 지점 여러 개를 한 번에 (벡터화, 반경 여러 개 동시)
+  - nearest_many                : 지점 여러 개의 최근접 매장 (벡터화, 자기 자신 제외 가능)
+  - knn                         : 가까운 k개 매장 (대상 매장이 적으면 전체 거리 한 번에)
+  - bbox                        : 위경도 사각형 내 매장 (매장이 적으면 위도순 배열 이분 탐색)
+
+preprocess.py가 spatial_index.npz로 저장하고 app.py가 불러 씁니다.
+
+벤치마크 (전수 탐색과 결과·속도 비교):
+    python spatial_index.py [dashboard_data.json]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+from stage_cache import array_digest
+
+EARTH_RADIUS_M = 6_371_008.8
+M_PER_DEG_LAT = EARTH_RADIUS_M * np.pi / 180
+# 투영 왜곡(위도에 따른 경도 1도 길이 차이)을 덮기 위해 후보 셀 탐색 반경을 약간 넓힘
+SEARCH_MARGIN = 1.01
+DEFAULT_CELL_M = 250.0
+# 대상 매장이 이 수 이하면 셀을 훑지 않고 전체를 한 번에 비교 (셀 키 생성·조회 고정 비용이 더 큼)
+# 가상 매장 2천~30만 개로 잰 손익분기점 기준
+KNN_SCAN_MAX_STORES = 8_000
+BBOX_SCAN_MAX_STORES = 40_000
+INDEX_FILENAME = 'spatial_index.npz'
+
+
+def haversine_m(lat1, lng1, lat2, lng2):
+    """두 좌표(배열 가능) 사이의 거리(m)"""
+    lat1, lng1, lat2, lng2 = map(np.radians, (lat1, lng1, lat2, lng2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def unit_xyz(lat, lng):
+    """위경도 → 단위구 위의 3차원 좌표 (현(chord) 길이 순서 = 대원 거리 순서)"""
+    lat, lng = np.radians(lat), np.radians(lng)
+    return np.stack([np.cos(lat) * np.cos(lng), np.cos(lat) * np.sin(lng), np.sin(lat)], axis=-1)
+
+
+def _chord2(a_xyz, ia, b_xyz, ib):
+    """a_xyz[ia]와 b_xyz[ib] 쌍별 단위구 현 길이 제곱 (좌표축별로 모아 (쌍 수, 3) 배열을 만들지 않음)"""
+    out = (a_xyz[:, 0][ia] - b_xyz[:, 0][ib]) ** 2
+    out += (a_xyz[:, 1][ia] - b_xyz[:, 1][ib]) ** 2
+    out += (a_xyz[:, 2][ia] - b_xyz[:, 2][ib]) ** 2
+    return out
+
+
+def source_digest(lat, lng, brand_codes, brands):
+    """매장 좌표 · 브랜드 번호 · 브랜드 목록(입력 순서 그대로)의 내용 해시"""
+    return array_digest(np.asarray(lat, dtype=np.float64), np.asarray(lng, dtype=np.float64),
+                        np.asarray(brand_codes, dtype=np.int64), np.array(list(brands), dtype=str))
+
+
+def frame_arrays(df, brands, lat='lat', lng='lng', brand='brand'):
+    """매장 DataFrame → (위도, 경도, 브랜드 번호) 배열"""
+    codes = {b: i for i, b in enumerate(brands)}
+    brand_codes = np.array([codes[b] for b in df[brand].astype(str)], dtype=np.int64)
+    return df[lat].to_numpy(dtype=np.float64), df[lng].to_numpy(dtype=np.float64), brand_codes
+
+
+def _expand_ranges(starts, lengths):
+    """[start, start+length) 구간들을 이어 붙인 정수 배열 (파이썬 루프 없이)"""
+    total = int(lengths.sum())
+    offsets = np.cumsum(lengths) - lengths
+    return np.repeat(starts - offsets, lengths) + np.arange(total)
+
+
+class StoreIndex:
+    def __init__(self, lat, lng, brand_codes, brands, cell_m=DEFAULT_CELL_M):
+        """
+        lat, lng     : 매장 좌표 배열
+        brand_codes  : 매장별 브랜드 번호 (brands의 인덱스)
+        brands       : 브랜드 이름 리스트
+        반환되는 매장 번호는 모두 입력 배열 기준 위치입니다.
+        """
+        lat = np.asarray(lat, dtype=np.float64)
+        lng = np.asarray(lng, dtype=np.float64)
+        brand_codes = np.asarray(brand_codes, dtype=np.int64)
+        self.brands = list(brands)
+        self.cell_m = float(cell_m)
+        self.size = len(lat)
+        # 저장된 인덱스를 다시 쓸 때 지금 데이터와 같은지 비교하는 키 (load_or_build)
+        self.source = source_digest(lat, lng, brand_codes, self.brands)
+
+        # 등장방형 투영 기준점 (한 도시 규모에서는 오차 무시 가능, 최종 판정은 하버사인)
+        self.lat0 = float(lat.mean()) if self.size else 37.5665
+        self.lng0 = float(lng.mean()) if self.size else 126.9780
+        self.m_per_deg_lng = M_PER_DEG_LAT * np.cos(np.radians(self.lat0))
+
+        cx, cy = self._cell_xy(lat, lng)
+        self.cx_min = int(cx.min()) if self.size else 0
+        self.cy_min = int(cy.min()) if self.size else 0
+        self.nx = int(cx.max()) - self.cx_min + 1 if self.size else 1
+        self.ny = int(cy.max()) - self.cy_min + 1 if self.size else 1
+        self.n_cells = self.nx * self.ny
+
+        # (브랜드, 셀) 키로 정렬 → 브랜드별 셀 구간이 연속 메모리
+        keys = brand_codes * self.n_cells + (cx - self.cx_min) * self.ny + (cy - self.cy_min)
+        order = np.argsort(keys, kind='stable')
+        self.order = order
+        self.lat = lat[order]
+        self.lng = lng[order]
+        self.brand_codes = brand_codes[order]
+        self.keys, self.starts = np.unique(keys[order], return_index=True)
+        # 브랜드 b의 매장 = 정렬 위치 brand_bounds[b] ~ brand_bounds[b + 1]
+        self.brand_bounds = np.searchsorted(self.brand_codes, np.arange(len(self.brands) + 1))
+        self.ends = np.append(self.starts[1:], self.size)
+        self.xyz = unit_xyz(self.lat, self.lng)
+        self._slots = None
+        self._lat_sorted = None
+
+    # ─────────────────────────────────────────
+    # 생성 / 저장
+    # ─────────────────────────────────────────
+    @classmethod
+    def from_frame(cls, df, brands, lat='lat', lng='lng', brand='brand', cell_m=DEFAULT_CELL_M):
+        return cls(*frame_arrays(df, brands, lat, lng, brand), brands, cell_m)
+
+    def save(self, path):
+        inverse = np.empty_like(self.order)
+        inverse[self.order] = np.arange(self.size)
+        np.savez_compressed(
+            path,
+            lat=self.lat[inverse], lng=self.lng[inverse],
+            brand_codes=self.brand_codes[inverse],
+            brands=np.array(self.brands), cell_m=self.cell_m,
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as z:
+            return cls(z['lat'], z['lng'], z['brand_codes'], z['brands'].tolist(), float(z['cell_m']))
+
+    # ─────────────────────────────────────────
+    # 내부 헬퍼
+    # ─────────────────────────────────────────
+    def _cell_xy(self, lat, lng):
+        x = (np.asarray(lng, dtype=np.float64) - self.lng0) * self.m_per_deg_lng
+        y = (np.asarray(lat, dtype=np.float64) - self.lat0) * M_PER_DEG_LAT
+        return np.floor(x / self.cell_m).astype(np.int64), np.floor(y / self.cell_m).astype(np.int64)
+
+    def _brand_codes(self, brand):
+        if brand is None:
+            return np.arange(len(self.brands))
+        if isinstance(brand, (str, int, np.integer)):
+            brand = [brand]
+        return np.array([self.brands.index(b) if isinstance(b, str) else int(b) for b in brand])
+
+    def _pool(self, codes):
+        """브랜드 번호 배열 → 해당 매장의 정렬 위치 (브랜드가 하나거나 전체면 slice)"""
+        if len(codes) == len(self.brands):
+            return slice(0, self.size)
+        if len(codes) == 1:
+            return slice(int(self.brand_bounds[codes[0]]), int(self.brand_bounds[codes[0] + 1]))
+        return _expand_ranges(self.brand_bounds[codes], self.brand_bounds[codes + 1] - self.brand_bounds[codes])
+
+    def _pool_size(self, codes):
+        return int((self.brand_bounds[codes + 1] - self.brand_bounds[codes]).sum())
+
+    def _cell_keys(self, cx0, cx1, cy0, cy1, brand):
+        """셀 범위(양 끝 포함) × 브랜드 → 정렬 키 배열 (격자 밖 셀은 제외)"""
+        cx = np.arange(max(cx0, self.cx_min), min(cx1, self.cx_min + self.nx - 1) + 1) - self.cx_min
+        cy = np.arange(max(cy0, self.cy_min), min(cy1, self.cy_min + self.ny - 1) + 1) - self.cy_min
+        cells = (cx[:, None] * self.ny + cy[None, :]).ravel()
+        return (self._brand_codes(brand)[:, None] * self.n_cells + cells[None, :]).ravel()
+
+    def _gather(self, keys):
+        """정렬 키 목록 → 해당 셀에 속한 매장의 정렬 위치 배열"""
+        if self.size == 0:
+            return np.empty(0, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        pos = pos[self.keys[pos] == keys]
+        return _expand_ranges(self.starts[pos], self.ends[pos] - self.starts[pos])
+
+    def _key_slots(self):
+        """정렬 키 → self.keys 위치 조밀 배열 (없는 키는 -1) — 여러 창 셀을 이분 탐색 없이 조회"""
+        if self._slots is None:
+            self._slots = np.full(len(self.brands) * self.n_cells, -1, dtype=np.int64)
+            self._slots[self.keys] = np.arange(len(self.keys))
+        return self._slots
+
+    def _lat_band(self, min_lat, max_lat):
+        """
+        위도 구간 안 매장 → (경도, 브랜드 번호, 입력 위치) 배열 (위도순 정렬 배열에서 이분 탐색, 복사 없는 슬라이스)
+        """
+        if self._lat_sorted is None:
+            by_lat = np.argsort(self.lat, kind='stable')
+            self._lat_sorted = self.lat[by_lat]
+            self._lat_cols = (self.lng[by_lat], self.brand_codes[by_lat], self.order[by_lat])
+        lo = self._lat_sorted.searchsorted(min_lat, 'left')
+        hi = self._lat_sorted.searchsorted(max_lat, 'right')
+        lng, codes, idx = self._lat_cols
+        return lng[lo:hi], codes[lo:hi], idx[lo:hi]
+
+    def _candidates(self, lat, lng, radius_m, brand):
+        r_lat = radius_m * SEARCH_MARGIN / M_PER_DEG_LAT
+        r_lng = radius_m * SEARCH_MARGIN / (M_PER_DEG_LAT * np.cos(np.radians(lat)))
+        cx0, cy0 = self._cell_xy(lat - r_lat, lng - r_lng)
+        cx1, cy1 = self._cell_xy(lat + r_lat, lng + r_lng)
+        return self._gather(self._cell_keys(int(cx0), int(cx1), int(cy0), int(cy1), brand))
+
+    # ─────────────────────────────────────────
+    # 질의
+    # ─────────────────────────────────────────
+    def radius_query(self, lat, lng, radius_m, brand=None):
+        """반경 내 매장 (입력 위치 배열, 거리 m) — 거리순 정렬"""
+        cand = self._candidates(lat, lng, radius_m, brand)
+        dist = haversine_m(lat, lng, self.lat[cand], self.lng[cand])
+        mask = dist <= radius_m
+        cand, dist = cand[mask], dist[mask]
+        order = np.argsort(dist, kind='stable')
+        return self.order[cand[order]], dist[order]
+
+    def radius_count(self, lat, lng, radius_m, brand=None):
+        cand = self._candidates(lat, lng, radius_m, brand)
+        return int((haversine_m(lat, lng, self.lat[cand], self.lng[cand]) <= radius_m).sum())
+
+    def _spans(self, lats, radius_m):
+        """
+        모든 질의에 같은 모양으로 씌울 셀 창의 반폭 (span_x, span_y)
+        (x 방향은 질의 중 가장 고위도 지점에서의 경도 1도 길이 기준)
+        """
+        lng_stretch = np.cos(np.radians(self.lat0)) / np.cos(np.radians(np.abs(lats).max()))
+        span_x = int(np.ceil(radius_m * SEARCH_MARGIN * lng_stretch / self.cell_m))
+        span_y = int(np.ceil(radius_m * SEARCH_MARGIN / self.cell_m))
+        return span_x, span_y
+
+    def _pairs_many(self, lats, lngs, radius_m, brand):
+        """
+        여러 질의 지점의 반경 후보를 한 번에 펼침 (질의 루프 없이 벡터화)
+        반환: (질의 번호, 매장 정렬 위치) 평탄 배열 — 반경 밖 후보도 포함
+        """
+        n_q = len(lats)
+        if n_q == 0 or self.size == 0:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty
+
+        span_x, span_y = self._spans(lats, radius_m)
+        qx, qy = self._cell_xy(lats, lngs)
+        dx = np.arange(-span_x, span_x + 1)
+        dy = np.arange(-span_y, span_y + 1)
+        wx = (qx[:, None, None] + dx[None, :, None]).repeat(len(dy), axis=2)
+        wy = (qy[:, None, None] + dy[None, None, :]).repeat(len(dx), axis=1)
+        inside = ((wx >= self.cx_min) & (wx < self.cx_min + self.nx)
+                  & (wy >= self.cy_min) & (wy < self.cy_min + self.ny))
+        cells = (wx - self.cx_min) * self.ny + (wy - self.cy_min)
+        codes = self._brand_codes(brand)
+
+        qid = np.broadcast_to(np.arange(n_q)[:, None, None, None], (n_q, len(codes)) + cells.shape[1:])
+        keys = codes[None, :, None, None] * self.n_cells + cells[:, None, :, :]
+        valid = np.broadcast_to(inside[:, None, :, :], keys.shape)
+        qid, keys = qid[valid], keys[valid]
+
+        # 키 → 셀 구간 [start, end)
+        slot = self._key_slots()[keys]
+        found = slot >= 0
+        qid, slot = qid[found], slot[found]
+        starts, lengths = self.starts[slot], self.ends[slot] - self.starts[slot]
+
+        # 구간 펼치기: 질의 번호와 매장 정렬 위치의 평탄 배열
+        point = _expand_ranges(starts, lengths)
+        return np.repeat(qid, lengths), point
+
+    def _window_counter(self, codes):
+        """
+        브랜드 묶음의 셀별 매장 수 2차원 누적합 → window_count(qx, qy, rx, ry)
+        (질의 셀 ±rx, ±ry 창 안의 매장 수를 셀을 훑지 않고 네 칸 조회로 계산)
+        """
+        in_brand = np.isin(self.keys // self.n_cells, codes)
+        counts = np.bincount(self.keys[in_brand] % self.n_cells,
+                             weights=(self.ends - self.starts)[in_brand], minlength=self.n_cells)
+        sat = np.zeros((self.nx + 1, self.ny + 1), dtype=np.int64)
+        sat[1:, 1:] = counts.reshape(self.nx, self.ny).cumsum(0).cumsum(1)
+
+        def window_count(qx, qy, rx, ry):
+            x0 = np.clip(qx - rx - self.cx_min, 0, self.nx)
+            x1 = np.clip(qx + rx - self.cx_min + 1, 0, self.nx)
+            y0 = np.clip(qy - ry - self.cy_min, 0, self.ny)
+            y1 = np.clip(qy + ry - self.cy_min + 1, 0, self.ny)
+            return sat[x1, y1] - sat[x0, y1] - sat[x1, y0] + sat[x0, y0]
+
+        return window_count
+
+    def _query_chunks(self, lats, lngs, radius_m, codes, chunk_pairs):
+        """
+        _pairs_many가 만들 (질의, 후보) 쌍이 묶음마다 chunk_pairs 안팎이 되도록 질의를 나눔
+        지점별 후보 수를 누적합 창으로 미리 세므로 매장이 몰린 곳은 묶음이 작아집니다.
+        반환: 질의 구간 slice 리스트
+        """
+        n_q = len(lats)
+        if n_q == 0:
+            return []
+        span_x, span_y = self._spans(lats, radius_m)
+        qx, qy = self._cell_xy(lats, lngs)
+        # 창 셀 키 생성 비용도 후보 쌍처럼 메모리를 쓰므로 함께 셈
+        cost = (self._window_counter(codes)(qx, qy, span_x, span_y)
+                + (2 * span_x + 1) * (2 * span_y + 1) * len(codes))
+        cum = np.cumsum(cost)
+        bounds = np.searchsorted(cum, np.arange(chunk_pairs, cum[-1], chunk_pairs), side='right')
+        bounds = np.unique(np.r_[0, bounds, n_q])
+        return [slice(a, b) for a, b in zip(bounds[:-1], bounds[1:])]
+
+    def radius_count_many(self, lats, lngs, radius_m, brand=None, chunk_pairs=4_000_000):
+        """
+        여러 후보 지점의 반경 내 매장 수를 한 번에 계산 (질의 루프 없이 벡터화)
+        질의마다 격자 열(x) 단위로, 원 안에 완전히 들어가는 셀 구간은 셀 순 누적 매장 수로 바로 세고
+        원 경계에 걸친 셀의 매장만 거리를 계산합니다 (반경이 셀보다 클수록 거리 계산이 크게 줄어듦).
+        반환: 지점별 매장 수 배열 (radius_m이 반경 목록이면 지점 × 반경 2차원 배열)
+        """
+        lats = np.asarray(lats, dtype=np.float64)
+        lngs = np.asarray(lngs, dtype=np.float64)
+        radii = np.atleast_1d(np.asarray(radius_m, dtype=np.float64))
+        counts = np.zeros((len(lats), len(radii)), dtype=np.int64)
+        codes = self._brand_codes(brand)
+        if len(lats) == 0 or self.size == 0:
+            return counts if np.ndim(radius_m) else counts[:, 0]
+
+        # 브랜드 묶음 매장을 셀 순으로 다시 정렬 → 한 열의 연속 셀 구간 = 연속 매장 구간
+        point_cell = np.repeat(self.keys % self.n_cells, self.ends - self.starts)
+        pool = np.flatnonzero(np.isin(self.brand_codes, codes))
+        pool = pool[np.argsort(point_cell[pool], kind='stable')]
+        first = np.searchsorted(point_cell[pool], np.arange(self.n_cells + 1))
+        pool_xyz = self.xyz[pool]
+
+        # 질의 좌표 (격자 원점 기준 투영 m)와 질의 위도에서의 경도 방향 축척
+        g = self.cell_m
+        qxm = (lngs - self.lng0) * self.m_per_deg_lng - self.cx_min * g
+        qym = (lats - self.lat0) * M_PER_DEG_LAT - self.cy_min * g
+        scale = np.cos(np.radians(lats)) / np.cos(np.radians(self.lat0))
+        q_xyz = unit_xyz(lats, lngs)
+
+        for k, r in enumerate(radii):
+            # 셀 판정은 투영 오차를 덮도록 안쪽은 좁게, 바깥쪽은 넓게 / 경계 매장은 현 길이²로 정확히 판정
+            r_in, r_out = r / SEARCH_MARGIN, r * SEARCH_MARGIN
+            limit = (2 * np.sin(r / (2 * EARTH_RADIUS_M))) ** 2
+            span = int(np.ceil(r_out / (scale.min() * g)))
+            d = np.arange(-span, span + 1)
+            for sl in self._query_chunks(lats, lngs, r, codes, chunk_pairs):
+                cx = np.floor(qxm[sl] / g).astype(np.int64)[:, None] + d[None, :]
+                x0 = cx * g - qxm[sl, None]
+                x1 = x0 + g
+                near = np.where((x0 <= 0) & (x1 >= 0), 0.0, np.minimum(np.abs(x0), np.abs(x1))) * scale[sl, None]
+                far = np.maximum(np.abs(x0), np.abs(x1)) * scale[sl, None]
+                h_out = np.sqrt(np.maximum(r_out ** 2 - near ** 2, 0.0))
+                h_in = np.sqrt(np.maximum(r_in ** 2 - far ** 2, 0.0))
+
+                # 열마다 원과 겹치는 셀 [o0, o1) ⊇ 원 안에 완전히 들어가는 셀 [i0, i1)
+                qy = qym[sl, None]
+                col_ok = (cx >= 0) & (cx < self.nx) & (near < r_out)
+                o0 = np.clip(np.floor((qy - h_out) / g), 0, self.ny).astype(np.int64)
+                o1 = np.clip(np.floor((qy + h_out) / g) + 1, 0, self.ny).astype(np.int64)
+                o1 = np.where(col_ok, o1, o0)
+                i0 = np.clip(np.ceil((qy - h_in) / g).astype(np.int64), o0, o1)
+                i1 = np.clip(np.floor((qy + h_in) / g).astype(np.int64), i0, o1)
+                i1 = np.where(far < r_in, i1, i0)
+
+                base = np.clip(cx, 0, self.nx - 1) * self.ny
+                f_o0, f_o1 = first[base + o0], first[base + o1]
+                f_i0, f_i1 = first[base + i0], first[base + i1]
+                counts[sl, k] = (f_i1 - f_i0).sum(axis=1)
+
+                # 경계 셀 구간 [o0, i0) · [i1, o1)의 매장만 펼쳐 거리 판정
+                qid = np.broadcast_to(np.arange(sl.start, sl.stop)[:, None], cx.shape)
+                seg_start = np.concatenate([f_o0.ravel(), f_i1.ravel()])
+                seg_len = np.concatenate([(f_i0 - f_o0).ravel(), (f_o1 - f_i1).ravel()])
+                qid = np.concatenate([qid.ravel(), qid.ravel()])[seg_len > 0]
+                seg_start, seg_len = seg_start[seg_len > 0], seg_len[seg_len > 0]
+                point = _expand_ranges(seg_start, seg_len)
+                qrep = np.repeat(qid, seg_len)
+                chord = _chord2(q_xyz, qrep, pool_xyz, point)
+                counts[sl, k] += np.bincount(qrep[chord <= limit] - sl.start, minlength=sl.stop - sl.start)
+        return counts if np.ndim(radius_m) else counts[:, 0]
+
+    def _occupied_ring(self, qx, qy, codes, min_count=1):
+        """
+        지점별로 매장이 min_count개 이상 들어오는 가장 작은 셀 창 반경 r (창 = (2r+1)² 셀)
+        셀별 매장 수의 2차원 누적합에서 r을 이분 탐색합니다.
+        """
+        window_count = self._window_counter(codes)
+
+        # 상한: 격자 밖 지점도 격자 전체를 덮는 창 크기
+        lo = np.zeros(len(qx), dtype=np.int64)
+        hi = np.maximum(np.abs(qx - self.cx_min), np.abs(qy - self.cy_min)) + max(self.nx, self.ny)
+        while (lo < hi).any():
+            mid = (lo + hi) // 2
+            found = window_count(qx, qy, mid, mid) >= min_count
+            hi = np.where(found, mid, hi)
+            lo = np.where(found, lo, mid + 1)
+        return lo
+
+    def nearest_many(self, lats, lngs, brand=None, exclude=None, chunk_pairs=4_000_000):
+        """
+        여러 지점 각각의 가장 가까운 매장 (입력 위치 배열, 거리 m) — 벡터화
+        지점마다 매장이 들어오는 최소 셀 창을 구하고, 그 창의 대각선 반경 안에서
+        같은 창 크기끼리 묶어 거리를 한 번에 계산합니다. 창이 너무 넓은 묶음
+        (매장이 드문 외곽)은 셀을 훑는 대신 해당 브랜드 매장 전체와 직접 비교합니다.
+
+        exclude: 지점별로 건너뛸 매장 번호(입력 위치, -1이면 없음) — 인덱스의 매장 자신을
+                 질의할 때 자기 자신을 빼고 최근접 매장을 찾는 용도. 해당 매장이 없으면 (-1, inf)
+        """
+        lats = np.asarray(lats, dtype=np.float64)
+        lngs = np.asarray(lngs, dtype=np.float64)
+        n_q = len(lats)
+        nearest = np.full(n_q, -1, dtype=np.int64)
+        best = np.full(n_q, np.inf)
+        codes = self._brand_codes(brand)
+        pool = np.flatnonzero(np.isin(self.brand_codes, codes))
+        if n_q == 0 or not len(pool):
+            return nearest, best
+        if exclude is not None:
+            exclude = np.asarray(exclude, dtype=np.int64)
+
+        # 후보 비교는 단위구 현 길이 제곱으로 (하버사인과 순서 동일, 삼각함수 없음)
+        q_xyz = unit_xyz(lats, lngs)
+        qx, qy = self._cell_xy(lats, lngs)
+        # 제외할 매장이 창 안에 있을 수 있으므로 그때는 두 개 이상 들어오는 창
+        ring = self._occupied_ring(qx, qy, codes, min_count=1 if exclude is None else 2)
+        for r in np.unique(ring):
+            group = np.flatnonzero(ring == r)
+            # 창 안 매장까지의 거리 ≤ 창 대각선 → 이 반경 안에 최근접 매장이 반드시 있음
+            radius = (r + 1) * self.cell_m * np.sqrt(2) * SEARCH_MARGIN
+            span = np.ceil(radius * SEARCH_MARGIN / self.cell_m * 1.05)
+            q, j = [], []
+            if (2 * span + 1) ** 2 * len(codes) * 20 < len(pool):
+                for sl in self._query_chunks(lats[group], lngs[group], radius, codes, chunk_pairs):
+                    sub = group[sl]
+                    qrep, point = self._pairs_many(lats[sub], lngs[sub], radius, codes)
+                    chord = _chord2(q_xyz, sub[qrep], self.xyz, point)
+                    if exclude is not None:
+                        chord[self.order[point] == exclude[sub[qrep]]] = np.inf
+                    # 후보는 질의 순으로 이어져 있으므로 구간별 최솟값 → 구간 안 첫 최솟값 위치
+                    starts = np.flatnonzero(np.r_[True, qrep[1:] != qrep[:-1]])
+                    seg_min = np.minimum.reduceat(chord, starts)
+                    hits = np.flatnonzero(chord == np.repeat(seg_min, np.diff(np.r_[starts, len(chord)])))
+                    first = hits[np.r_[True, qrep[hits[1:]] != qrep[hits[:-1]]]]
+                    first = first[np.isfinite(chord[first])]
+                    q.append(sub[qrep[first]])
+                    j.append(point[first])
+            else:
+                step = max(1, chunk_pairs // len(pool))
+                for i in range(0, len(group), step):
+                    chunk = group[i:i + step]
+                    # 단위 벡터끼리는 내적이 클수록 가까움 (현 길이² = 2 − 2·내적) → 행렬곱 한 번
+                    dots = q_xyz[chunk] @ self.xyz[pool].T
+                    if exclude is not None:
+                        dots[self.order[pool][None, :] == exclude[chunk][:, None]] = -np.inf
+                    top = dots.argmax(axis=1)
+                    ok = np.isfinite(dots[np.arange(len(chunk)), top])
+                    q.append(chunk[ok])
+                    j.append(pool[top[ok]])
+            q, j = np.concatenate(q), np.concatenate(j)
+            nearest[q] = self.order[j]
+            best[q] = haversine_m(lats[q], lngs[q], self.lat[j], self.lng[j])
+        return nearest, best
+
+    def knn(self, lat, lng, k, brand=None):
+        """
+        가까운 k개 매장 (입력 위치 배열, 거리 m). 반경을 두 배씩 넓혀 가며 탐색
+        대상 매장이 KNN_SCAN_MAX_STORES 이하면 전체 거리를 한 번에 계산 (같은 거리는 입력 순서대로)
+        """
+        codes = self._brand_codes(brand)
+        available = self._pool_size(codes)
+        k = min(k, available)
+        if k == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        if available <= KNN_SCAN_MAX_STORES:
+            pool = self._pool(codes)
+            dist = haversine_m(lat, lng, self.lat[pool], self.lng[pool])
+            idx = self.order[pool]
+            if k < available:
+                near = dist <= np.partition(dist, k - 1)[k - 1]
+                dist, idx = dist[near], idx[near]
+            top = np.lexsort((idx, dist))[:k]
+            return idx[top], dist[top]
+        radius = self.cell_m
+        while True:
+            idx, dist = self.radius_query(lat, lng, radius, brand)
+            # 반경 안에 k개 이상이면 그 k개가 전체에서 가장 가까운 k개
+            if len(idx) >= k:
+                return idx[:k], dist[:k]
+            radius *= 2
+
+    def bbox(self, min_lat, min_lng, max_lat, max_lng, brand=None):
+        """
+        위경도 사각형 안의 매장 (입력 위치 배열, 원래 순서)
+        매장이 BBOX_SCAN_MAX_STORES 이하면 셀 대신 위도 구간을 이분 탐색해 경도·브랜드만 거름
+        """
+        if self.size <= BBOX_SCAN_MAX_STORES:
+            lng, codes, idx = self._lat_band(min_lat, max_lat)
+            mask = (lng >= min_lng) & (lng <= max_lng)
+            if brand is not None:
+                mask &= np.isin(codes, self._brand_codes(brand))
+            return np.sort(idx[mask])
+        cx0, cy0 = self._cell_xy(min_lat, min_lng)
+        cx1, cy1 = self._cell_xy(max_lat, max_lng)
+        cand = self._gather(self._cell_keys(int(cx0), int(cx1), int(cy0), int(cy1), brand))
+        lat, lng = self.lat[cand], self.lng[cand]
+        mask = (lat >= min_lat) & (lat <= max_lat) & (lng >= min_lng) & (lng <= max_lng)
+        return np.sort(self.order[cand[mask]])
+
+
+def load_or_build(base_dir, df_map, brands):
+    """
+    preprocess.py가 만든 spatial_index.npz가 있으면 불러오고, 없거나 맞지 않으면 df_map으로 생성
+    저장된 매장 좌표 · 브랜드 · 브랜드 목록의 내용 해시가 df_map과 다르면(이전 데이터로 만든 파일) 새로 만듭니다.
+    """
+    lat, lng, brand_codes = frame_arrays(df_map, brands)
+    path = os.path.join(base_dir, INDEX_FILENAME)
+    if os.path.exists(path):
+        index = StoreIndex.load(path)
+        if index.source == source_digest(lat, lng, brand_codes, brands):
+            return index
+    return StoreIndex(lat, lng, brand_codes, brands)
+
+
+# ─────────────────────────────────────────────
+# 벤치마크: 격자 인덱스 vs 전수 탐색
+# ─────────────────────────────────────────────
+def _benchmark(json_path, n_queries=2000, radius_m=300.0, k=5, seed=0):
+    import json
+
+    with open(json_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get('format') == 'columnar-v1':
+        from dashboard_payload import from_columnar
+        data = from_columnar(data)
+
+    brands = data['brands']
+    pts = data['map_points']
+    lat = np.array([p['lat'] for p in pts])
+    lng = np.array([p['lng'] for p in pts])
+    codes = np.array([brands.index(p['brand']) for p in pts])
+
+    t0 = time.perf_counter()
+    index = StoreIndex(lat, lng, codes, brands)
+    print(f"인덱스 생성: {len(pts):,}개 매장, {len(index.keys):,}개 (브랜드,셀) 버킷, "
+          f"{(time.perf_counter() - t0) * 1e3:.1f} ms")
+
+    rng = np.random.default_rng(seed)
+    q_lat = rng.uniform(lat.min(), lat.max(), n_queries)
+    q_lng = rng.uniform(lng.min(), lng.max(), n_queries)
+    q_brand = rng.integers(0, len(brands), n_queries)
+
+    def timed(label, fn, brute):
+        t0 = time.perf_counter()
+        got = [fn(i) for i in range(n_queries)]
+        t_idx = (time.perf_counter() - t0) / n_queries * 1e6
+        t0 = time.perf_counter()
+        want = [brute(i) for i in range(n_queries)]
+        t_brute = (time.perf_counter() - t0) / n_queries * 1e6
+        ok = all(np.array_equal(np.asarray(a), np.asarray(b)) for a, b in zip(got, want))
+        print(f"  {label:<28} 인덱스 {t_idx:8.1f} µs/질의   전수 {t_brute:8.1f} µs/질의   "
+              f"x{t_brute / t_idx:5.1f}   결과 일치: {ok}")
+
+    def brute_dist(i):
+        return haversine_m(q_lat[i], q_lng[i], lat, lng)
+
+    print(f"\n질의 {n_queries:,}회 (반경 {radius_m:.0f} m, k={k})")
+    timed(f"radius_count (브랜드별)",
+          lambda i: index.radius_count(q_lat[i], q_lng[i], radius_m, int(q_brand[i])),
+          lambda i: int(((brute_dist(i) <= radius_m) & (codes == q_brand[i])).sum()))
+    timed("radius_count (전체)",
+          lambda i: index.radius_count(q_lat[i], q_lng[i], radius_m),
+          lambda i: int((brute_dist(i) <= radius_m).sum()))
+    timed("knn (브랜드별)",
+          lambda i: index.knn(q_lat[i], q_lng[i], k, int(q_brand[i]))[0],
+          lambda i: np.flatnonzero(codes == q_brand[i])[
+              np.argsort(brute_dist(i)[codes == q_brand[i]], kind='stable')[:k]])
+    half = 0.005
+    timed("bbox (±0.005°)",
+          lambda i: index.bbox(q_lat[i] - half, q_lng[i] - half, q_lat[i] + half, q_lng[i] + half),
+          lambda i: np.flatnonzero((lat >= q_lat[i] - half) & (lat <= q_lat[i] + half)
+                                   & (lng >= q_lng[i] - half) & (lng <= q_lng[i] + half)))
+
+    t0 = time.perf_counter()
+    many = index.radius_count_many(q_lat, q_lng, radius_m)
+    t_many = (time.perf_counter() - t0) / n_queries * 1e6
+    ok = np.array_equal(many, [int((brute_dist(i) <= radius_m).sum()) for i in range(n_queries)])
+    print(f"  {'radius_count_many (일괄)':<28} 인덱스 {t_many:8.1f} µs/질의   결과 일치: {ok}")
+
+    t0 = time.perf_counter()
+    near_idx, near_dist = index.nearest_many(q_lat, q_lng)
+    t_many = (time.perf_counter() - t0) / n_queries * 1e6
+    ok = np.allclose(near_dist, [brute_dist(i).min() for i in range(n_queries)])
+    print(f"  {'nearest_many (일괄)':<28} 인덱스 {t_many:8.1f} µs/질의   결과 일치: {ok}")
+
+
+if __name__ == '__main__':
+    default_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dashboard_data.json')
+    _benchmark(sys.argv[1] if len(sys.argv) > 1 else default_path)
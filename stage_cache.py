@@ -0,0 +1,176 @@
+"""
+전처리 단계별 캐시 (preprocess.py 증분 실행용)
+
+각 단계의 캐시 키는 다음 값들의 해시입니다.
+  - 입력 파일의 내용 해시 (크기/수정시각이 같으면 이전 해시 재사용)
+  - 상위 단계의 캐시 키
+  - 단계 파라미터 (예: 스트리밍 여부)
+  - 전처리 코드 자체의 해시
+
+키는 입력만으로 계산되므로 실제로 실행하지 않고도 어떤 단계가 적중/미적중할지
+알 수 있습니다(--explain). 중간 결과 DataFrame은 Parquet으로 저장합니다.
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import perf_log
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def _sha256_file(path, block_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _sha256_text(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def array_digest(*arrays):
+    """
+    배열 내용 해시 (dtype·모양 포함)
+    preprocess.py가 저장한 파생 파일(npz)이 지금 읽은 payload와 같은 데이터로 만든 것인지 확인할 때 씁니다.
+    """
+    h = hashlib.sha256()
+    for a in arrays:
+        a = np.ascontiguousarray(a)
+        h.update(f'{a.dtype.str}{a.shape}|'.encode('utf-8'))
+        h.update(a.tobytes())
+    return h.hexdigest()
+
+
+class Stage:
+    """캐시 가능한 전처리 단계 하나"""
+
+    def __init__(self, cache, name, label, deps, outputs):
+        self.cache = cache
+        self.name = name
+        self.label = label
+        self.deps = deps          # {의존성 이름: fingerprint}
+        self.outputs = outputs    # 단계가 직접 쓰는 최종 산출물 경로 (emit 단계)
+        self.key = _sha256_text(json.dumps([name, deps], sort_keys=True))
+        self.hit, self.reason = cache._check(self)
+        self._result = None
+        self._done = False
+
+    @property
+    def path(self):
+        return os.path.join(self.cache.cache_dir, f'{self.name}-{self.key[:16]}.parquet')
+
+    def run(self, fn):
+        """
+        캐시 적중 시 Parquet에서 DataFrame을 읽고, 아니면 fn()을 실행해 저장합니다.
+        같은 실행 안에서는 결과를 한 번만 계산합니다.
+        """
+        if self._done:
+            return self._result
+        with perf_log.timer(f'stage:{self.name}', source='preprocess', hit=self.hit) as span:
+            if self.hit:
+                self._result = pd.read_parquet(self.path)
+                print(f"  {self.label} → 캐시 사용 ({len(self._result):,}행)")
+            else:
+                self._result = fn()
+                self._result.to_parquet(self.path)
+                self.cache._commit(self, stored=True)
+            span.fields['rows'] = len(self._result)
+        self._done = True
+        return self._result
+
+    def commit(self):
+        """DataFrame을 저장하지 않는 단계(최종 JSON 저장 등)를 마친 뒤 호출"""
+        self.cache._commit(self, stored=False)
+        self._done = True
+
+
+class StageCache:
+    def __init__(self, cache_dir, code_files=(), force=False):
+        self.cache_dir = cache_dir
+        self.force = force
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self.manifest_path = os.path.join(cache_dir, MANIFEST_NAME)
+        self.manifest = {'files': {}, 'stages': {}}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                self.manifest = json.load(f)
+
+        self.code_fingerprint = _sha256_text(''.join(self.fingerprint(p) for p in code_files))
+        self.stages = []
+
+    def fingerprint(self, path):
+        """파일 내용 해시. 크기와 수정 시각이 그대로면 이전에 계산한 값을 재사용"""
+        path = os.path.abspath(path)
+        if not os.path.exists(path):
+            return 'missing'
+        st = os.stat(path)
+        entry = self.manifest['files'].get(path)
+        if entry and entry['size'] == st.st_size and entry['mtime_ns'] == st.st_mtime_ns:
+            return entry['sha256']
+        digest = _sha256_file(path)
+        self.manifest['files'][path] = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha256': digest}
+        return digest
+
+    def stage(self, name, label=None, files=(), upstream=(), params=None, outputs=()):
+        deps = {'code': self.code_fingerprint}
+        for path in files:
+            deps[f'file:{os.path.basename(path)}'] = self.fingerprint(path)
+        for st in upstream:
+            deps[f'stage:{st.name}'] = st.key
+        if params:
+            deps['params'] = json.dumps(params, sort_keys=True)
+
+        stage = Stage(self, name, label or name, deps, list(outputs))
+        self.stages.append(stage)
+        return stage
+
+    def _check(self, stage):
+        """(적중 여부, 이유) 반환"""
+        if self.force:
+            return False, '--force'
+        prev = self.manifest['stages'].get(stage.name)
+        if prev is None:
+            return False, '캐시 없음'
+        if prev['key'] != stage.key:
+            changed = sorted(k for k in set(prev['deps']) | set(stage.deps)
+                             if prev['deps'].get(k) != stage.deps.get(k))
+            return False, '변경: ' + ', '.join(changed)
+        for path in stage.outputs:
+            if prev.get('outputs', {}).get(path) != self.fingerprint(path):
+                return False, f'산출물 없음/변경: {os.path.basename(path)}'
+        if prev.get('stored') and not os.path.exists(stage.path):
+            return False, '캐시 파일 없음'
+        return True, '입력 동일'
+
+    def _commit(self, stage, stored):
+        prev = self.manifest['stages'].get(stage.name)
+        if prev and prev['key'] != stage.key:
+            old_path = os.path.join(self.cache_dir, f"{stage.name}-{prev['key'][:16]}.parquet")
+            if os.path.exists(old_path):
+                os.remove(old_path)
+        self.manifest['stages'][stage.name] = {
+            'key': stage.key,
+            'deps': stage.deps,
+            'stored': stored,
+            'outputs': {p: self.fingerprint(p) for p in stage.outputs},
+        }
+        self.save()
+
+    def save(self):
+        with open(self.manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+
+    def explain(self):
+        """단계별 캐시 적중/미적중 표 출력"""
+        print(f"\n🗂️  캐시 상태 ({self.cache_dir})")
+        for st in self.stages:
+            mark = 'HIT ' if st.hit else 'MISS'
+            print(f"  {mark}  {st.name:<16} {st.key[:12]}  {st.reason}")
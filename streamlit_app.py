@@ -1,8 +1,12 @@
 import streamlit as st
 import streamlit.components.v1 as components
+import base64
+import gzip
 import json
 import os
 
+from dashboard_payload import MANIFEST_FILENAME, is_sections, load_payload, resolve_payload_path
+
 # 페이지 설정 (전체 화면 최적화)
 st.set_page_config(
     page_title="서울 카페 입지 분석 대시보드",
@@ -37,26 +41,65 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def load_and_inject():
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+HTML_PATH = os.path.join(BASE_DIR, "index.html")
+
+# 데이터를 gzip+base64로 주입하고 브라우저에서 DecompressionStream으로 해제
+# (DASHBOARD_COMPRESS=0 이면 원본 JSON을 그대로 주입)
+# 섹션 분할 포맷(dashboard_sections/)은 manifest는 그대로, 섹션은 파일별 gzip+base64로 주입하고
+# 브라우저는 각 섹션을 해당 탭을 처음 열 때 해제·파싱합니다.
+COMPRESS_PAYLOAD = os.environ.get("DASHBOARD_COMPRESS", "1") != "0"
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def build_html(html_mtime, data_path, data_mtime, compress):
+    """
+    데이터를 주입한 최종 HTML 생성
+    파일 수정 시각이 인자에 포함되어 있어 파일이 바뀔 때만 다시 만들고,
+    그 외에는 모든 세션·rerun이 같은 문자열을 공유합니다.
+    """
     # 1. index.html 읽기
-    with open("index.html", "r", encoding="utf-8") as f:
+    with open(HTML_PATH, "r", encoding="utf-8") as f:
         html_content = f.read()
 
-    # 2. dashboard_data.json 읽기
-    if os.path.exists("dashboard_data.json"):
-        with open("dashboard_data.json", "r", encoding="utf-8") as f:
-            json_data = json.load(f)
+    # 2. 섹션 분할 포맷: manifest + 섹션별 gzip+base64 (index.html이 쓰지 않는 density_grid는 제외)
+    manifest = load_payload(data_path) if data_path and data_path.endswith(MANIFEST_FILENAME) else None
+    if manifest is not None and is_sections(manifest):
+        sections = {}
+        for name, entry in manifest["sections"].items():
+            if name == "density_grid":
+                continue
+            with open(os.path.join(os.path.dirname(data_path), entry["file"]), "rb") as f:
+                sections[name] = base64.b64encode(gzip.compress(f.read(), compresslevel=9)).decode("ascii")
+        text = json.dumps({"manifest": manifest, "sections": sections}, ensure_ascii=False).replace("</", "<\\/")
+        injection_code = f"<script>window.DATA_SECTIONS = {text};</script>"
+        return html_content.replace("<body", f"{injection_code}<body")
+
+    # 3. 단일 파일: 데이터 파일을 파싱하지 않고 바이트 그대로 읽기
+    if data_path:
+        with open(data_path, "rb") as f:
+            raw = f.read()
     else:
-        json_data = {"error": "data not found"}
+        raw = json.dumps({"error": "data not found"}).encode("utf-8")
+
+    # 4. HTML에 데이터 주입
+    if compress:
+        encoded = base64.b64encode(gzip.compress(raw, compresslevel=9)).decode("ascii")
+        injection_code = f'<script>window.DATA_GZIP = "{encoded}";</script>'
+    else:
+        # </script> 가 문자열 안에 있어도 태그가 닫히지 않도록 이스케이프
+        text = raw.decode("utf-8").replace("</", "<\\/")
+        injection_code = f"<script>window.DATA = {text};</script>"
 
-    # 3. HTML에 데이터 주입
-    # <script> 태그 바로 다음에 window.DATA 주입 로직 삽입
-    injection_code = f"<script>window.DATA = {json.dumps(json_data, ensure_ascii=False)};</script>"
-    
     # <body> 태그 시작 직후에 주입
-    final_html = html_content.replace("<body", f"{injection_code}<body")
-    
-    return final_html
+    return html_content.replace("<body", f"{injection_code}<body")
+
+
+def load_and_inject():
+    # 섹션 분할/컬럼형/JSON 중 최신 데이터 파일 선택 (index.html이 세 포맷 모두 해석)
+    data_path = resolve_payload_path(BASE_DIR)
+    data_mtime = os.path.getmtime(data_path) if data_path else None
+    return build_html(os.path.getmtime(HTML_PATH), data_path, data_mtime, COMPRESS_PAYLOAD)
 
 try:
     html = load_and_inject()
@@ -0,0 +1,215 @@
+"""
+벤치마크용 합성 입력 CSV 생성
+
+preprocess.py가 읽는 4개 CSV를 같은 컬럼 구성으로 만듭니다.
+  - brand_analysis_master.csv          행정동별 브랜드 매장 수 · 종사자 · 매출 (동마다 여러 행)
+  - seoul_dong_attractiveness.csv      행정동 지표 + 수요/경쟁/비용/매력도 점수
+  - seoul_caffee_data_with_coords.csv  전체 카페 (행정동코드, 사업장명, 브랜드, 위경도)
+  - seoul_caffee_data_with_brand.csv   전체 카페 (위경도 없음)
+
+scale=1은 실제 서울 규모(행정동 약 425개, 카페 약 24,000개, 저가 브랜드 약 2,400개)이고
+scale=N이면 행정동·카페 수가 모두 N배가 됩니다. 같은 seed면 항상 같은 파일이 나옵니다.
+
+--months N을 주면 out_dir/YYYYMM/ 폴더 N개에 월별 스냅샷을 만듭니다
+(매달 카페 약 1% 폐점 · 1.5% 개점, 행정동 매출·종사자 수 변동). preprocess.py --history 입력용.
+
+사용법:
+    python synthetic_data.py bench/10x --scale 10
+    python synthetic_data.py bench/history --months 24
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+BRANDS = ['더벤티', '매머드커피', '메가커피', '빽다방', '컴포즈커피']
+BRAND_SHARE = [0.16, 0.10, 0.34, 0.17, 0.23]       # 저가 브랜드 매장 비율
+OTHER_BRANDS = ['스타벅스', '이디야', '투썸플레이스', '할리스', '']   # ''는 개인 카페
+GU_CODES = [110, 140, 170, 200, 215, 230, 260, 290, 305, 320, 350, 380, 410,
+            440, 470, 500, 530, 545, 560, 590, 620, 650, 680, 710, 740]
+NAME_HEAD = list('가나다라마바사아자차카타파하강남서북동신정성화청')
+NAME_TAIL = list('림산천원곡정수포촌양현암계림평교')
+
+DONGS_PER_SCALE = 425
+CAFES_PER_SCALE = 24_000
+LOW_COST_SHARE = 0.10
+MISSING_COORD_RATE = 0.02
+MASTER_ROWS_PER_DONG = 2
+LAT_RANGE = (37.43, 37.69)
+LNG_RANGE = (126.80, 127.18)
+AGE_COLS = ['연령대_10_매출_금액', '연령대_20_매출_금액', '연령대_30_매출_금액',
+            '연령대_40_매출_금액', '연령대_50_매출_금액', '연령대_60_이상_매출_금액']
+AGE_SHARE = [0.01, 0.24, 0.28, 0.20, 0.15, 0.12]
+# 월별 스냅샷 (--months)
+FIRST_MONTH = (2024, 1)
+MONTHLY_CLOSE_RATE = 0.010
+MONTHLY_OPEN_RATE = 0.015
+
+
+def _dongs(rng, n):
+    """행정동 코드·이름·중심 좌표 (구 코드 25개에 고르게 배분)"""
+    gu = np.array(GU_CODES)[np.arange(n) % len(GU_CODES)]
+    seq = np.arange(n) // len(GU_CODES)
+    codes = [f"11{g:03d}{k + 1:05d}" for g, k in zip(gu, seq)]
+    heads = rng.choice(NAME_HEAD, n)
+    tails = rng.choice(NAME_TAIL, n)
+    names = [f"{h}{t}{k // 3 + 1 if k % 3 else ''}동" for h, t, k in zip(heads, tails, seq)]
+    # 이름 중복 방지 (행정동명은 검색·표시용이라 구분되어야 함)
+    seen = {}
+    for i, name in enumerate(names):
+        seen[name] = seen.get(name, 0) + 1
+        if seen[name] > 1:
+            names[i] = f"{name[:-1]}제{seen[name]}동"
+    lat = rng.uniform(*LAT_RANGE, n)
+    lng = rng.uniform(*LNG_RANGE, n)
+    return pd.DataFrame({'code': codes, 'name': names, 'lat': lat, 'lng': lng})
+
+
+def _cafes(rng, dongs, n, weight, start=0):
+    """
+    전체 카페 (동 가중치 weight: 일부 상권 동에 카페가 몰리도록 로그정규 분포)
+    start: 사업장명 일련번호 시작값 (월별 신규 개점 매장이 기존 이름과 겹치지 않도록)
+    """
+    dong_idx = rng.choice(len(dongs), n, p=weight / weight.sum())
+    is_low = rng.random(n) < LOW_COST_SHARE
+    brand = np.where(is_low,
+                     rng.choice(BRANDS, n, p=BRAND_SHARE),
+                     rng.choice(OTHER_BRANDS, n))
+    prefix = np.where(brand == '', '카페', brand)
+    names = (pd.Series(prefix) + ' ' + dongs['name'].to_numpy()[dong_idx]
+             + ' ' + pd.Series(np.arange(start, start + n)).astype(str) + '호점')
+    lat = dongs['lat'].to_numpy()[dong_idx] + rng.normal(0, 0.004, n)
+    lng = dongs['lng'].to_numpy()[dong_idx] + rng.normal(0, 0.005, n)
+    missing = rng.random(n) < MISSING_COORD_RATE
+    return pd.DataFrame({
+        '행정동코드': dongs['code'].to_numpy()[dong_idx],
+        '사업장명': names,
+        '브랜드': brand,
+        '영업상태명': '영업',
+        'latitude': np.where(missing, np.nan, lat.round(7)),
+        'longitude': np.where(missing, np.nan, lng.round(7)),
+        '_dong': dong_idx,
+    })
+
+
+def _minmax(v):
+    lo, hi = v.min(), v.max()
+    return (v - lo) / (hi - lo) if hi > lo else np.zeros_like(v)
+
+
+def _write_snapshot(rng, out_dir, dongs, cafes, workers, sales, price):
+    """한 시점의 4개 CSV 저장. 반환: 저가 브랜드 매장 수"""
+    os.makedirs(out_dir, exist_ok=True)
+    n_dong = len(dongs)
+    cafe_count = np.bincount(cafes['_dong'], minlength=n_dong)
+
+    # 1) brand_analysis_master.csv — 동마다 여러 행 (브랜드 수·종사자는 max, 매출은 sum으로 집계됨)
+    low = cafes[cafes['브랜드'].isin(BRANDS)]
+    counts = pd.crosstab(low['_dong'], low['브랜드']).reindex(index=range(n_dong), columns=BRANDS, fill_value=0)
+    rep = np.repeat(np.arange(n_dong), MASTER_ROWS_PER_DONG)
+    split = rng.dirichlet(np.ones(MASTER_ROWS_PER_DONG), n_dong).ravel()
+    row_sales = sales[rep] * split
+    master = pd.DataFrame({'행정동코드': dongs['code'].to_numpy()[rep]})
+    for b in BRANDS:
+        master[f'count_{b}'] = counts[b].to_numpy()[rep].astype(float)
+    master['total_workers'] = workers[rep]
+    master['female_workers'] = (workers * rng.uniform(0.35, 0.6, n_dong)).round()[rep]
+    master['당월_매출_금액'] = row_sales.round()
+    female = rng.uniform(0.4, 0.65, len(rep))
+    master['남성_매출_금액'] = (row_sales * (1 - female)).round()
+    master['여성_매출_금액'] = (row_sales * female).round()
+    age = rng.dirichlet(np.array(AGE_SHARE) * 40, len(rep))
+    for j, col in enumerate(AGE_COLS):
+        master[col] = (row_sales * age[:, j]).round()
+    master['행정동_코드_명'] = dongs['name'].to_numpy()[rep]
+    master.to_csv(os.path.join(out_dir, 'brand_analysis_master.csv'), index=False, encoding='utf-8-sig')
+
+    # 2) seoul_dong_attractiveness.csv — 일부 동은 점수 없음 (병합 시 NaN)
+    has_attr = rng.random(n_dong) < 0.95
+    demand = (_minmax(sales) * 0.5 + _minmax(workers) * 0.5) * 100
+    competition = (1 - _minmax(cafe_count.astype(float))) * 100
+    cost = (1 - _minmax(price)) * 100
+    attr = pd.DataFrame({
+        '행정동_코드': dongs['code'],
+        '행정동명': dongs['name'],
+        '총_매출': sales,
+        '총_직원수': workers.astype(int),
+        '카페_수': cafe_count,
+        'm²당_평균_가격': price.round(6),
+        '수요점수': demand,
+        '경쟁점수': competition,
+        '비용점수': cost,
+        '매력도점수': demand * 0.4 + competition * 0.3 + cost * 0.3,
+    })[has_attr]
+    attr.to_csv(os.path.join(out_dir, 'seoul_dong_attractiveness.csv'), index=False, encoding='utf-8-sig')
+
+    # 3) 4) 전체 카페 목록 (좌표 포함 / 미포함)
+    cafes = cafes.drop(columns='_dong')
+    cafes.to_csv(os.path.join(out_dir, 'seoul_caffee_data_with_coords.csv'), index=False, encoding='utf-8-sig')
+    cafes.drop(columns=['latitude', 'longitude']).to_csv(
+        os.path.join(out_dir, 'seoul_caffee_data_with_brand.csv'), index=False, encoding='utf-8-sig')
+    return len(low)
+
+
+def generate(out_dir, scale=1, seed=0, months=0):
+    """
+    out_dir에 4개 CSV 생성 (months > 0이면 out_dir/YYYYMM/ 폴더마다 월별 스냅샷)
+    반환: {'dongs': 행정동 수, 'cafes': 카페 수, 'low_cost': 저가 브랜드 매장 수} (마지막 달 기준)
+    """
+    rng = np.random.default_rng(seed)
+    n_dong = DONGS_PER_SCALE * scale
+    dongs = _dongs(rng, n_dong)
+    weight = rng.lognormal(0, 1.0, n_dong)
+    n_cafe = CAFES_PER_SCALE * scale
+    cafes = _cafes(rng, dongs, n_cafe, weight)
+
+    # 행정동별 지표
+    workers = rng.lognormal(8.5, 1.0, n_dong).round()
+    sales = (workers * rng.uniform(2e5, 1.2e6, n_dong)).round()
+    price = rng.lognormal(7.3, 0.35, n_dong)
+
+    if not months:
+        n_low = _write_snapshot(rng, out_dir, dongs, cafes, workers, sales, price)
+        return {'dongs': n_dong, 'cafes': len(cafes), 'low_cost': n_low}
+
+    year, month = FIRST_MONTH
+    next_no = n_cafe
+    for i in range(months):
+        if i:
+            # 폐점 · 개점 · 매출/종사자 변동
+            cafes = cafes[rng.random(len(cafes)) >= MONTHLY_CLOSE_RATE]
+            n_new = rng.binomial(n_cafe, MONTHLY_OPEN_RATE)
+            cafes = pd.concat([cafes, _cafes(rng, dongs, n_new, weight, start=next_no)], ignore_index=True)
+            next_no += n_new
+            sales = (sales * rng.lognormal(0.003, 0.04, n_dong)).round()
+            workers = (workers * rng.lognormal(0.001, 0.02, n_dong)).round()
+        n_low = _write_snapshot(rng, os.path.join(out_dir, f'{year:04d}{month:02d}'),
+                                dongs, cafes, workers, sales, price)
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return {'dongs': n_dong, 'cafes': len(cafes), 'low_cost': n_low, 'months': months}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='벤치마크용 합성 입력 CSV 생성')
+    parser.add_argument('out_dir', help='CSV를 저장할 폴더')
+    parser.add_argument('--scale', type=int, default=1, help='규모 배수 (1 = 서울 실제 규모)')
+    parser.add_argument('--seed', type=int, default=0, help='난수 seed (기본 0)')
+    parser.add_argument('--months', type=int, default=0,
+                        help='N개월 월별 스냅샷을 out_dir/YYYYMM/ 폴더에 생성 (기본 0 = 단일 시점)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    t0 = time.perf_counter()
+    stats = generate(args.out_dir, args.scale, args.seed, args.months)
+    months = f"{stats['months']}개월, " if args.months else ''
+    print(f"✅ {args.out_dir}: {months}행정동 {stats['dongs']:,}개, 카페 {stats['cafes']:,}개 "
+          f"(저가 브랜드 {stats['low_cost']:,}개), {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == '__main__':
+    main()